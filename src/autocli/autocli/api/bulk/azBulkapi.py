@@ -0,0 +1,56 @@
+import json
+
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, APIRouter, Body, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from autocli.core.bulk.az_bulk_destroy import BulkDestroyer
+from autocli.core.lib.fanout_util import async_resolve_subscriptions
+from autocli.core.lib.results import json_default
+from autocli.core.lib.trackingId_util import TrackingIdGenerator
+
+router = APIRouter()
+
+
+@router.post("/destroy")
+async def destroy(
+    resourceGroups: List[str] = Body([], embed=True),
+    virtualNetworks: List[Dict[str, str]] = Body([], embed=True),
+    selector: Optional[str] = Body(None, embed=True),
+    parallelism: int = Body(8, embed=True, ge=1, le=64),
+    dryRun: bool = Body(False, embed=True),
+    subscriptions: List[str] = Body([], embed=True),
+):
+    trackId = TrackingIdGenerator().trackingId()
+    if any(not vnet.get("resourceGroup") or not vnet.get("name") for vnet in virtualNetworks):
+        raise HTTPException(status_code=400, detail="Every virtualNetworks entry needs resourceGroup and name")
+    try:
+        destroyer = BulkDestroyer(
+            trackingId=trackId,
+            resource_groups=resourceGroups,
+            virtual_networks=virtualNetworks,
+            selector=selector,
+            parallelism=parallelism,
+            # Deletes stay in AZURE_SUBSCRIPTION_ID unless subscriptions are named
+            subscriptions=await async_resolve_subscriptions(subscriptions) if subscriptions else None,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        # Resolved before streaming so a failed selector lookup is an error status, not a truncated stream
+        await run_in_threadpool(destroyer.targets)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Could not list the resources to delete: {e}")
+
+    def ndjson():
+        # One line per resource as its delete is confirmed; the stream ends once every delete finished
+        for record in destroyer.plan() if dryRun else destroyer.destroy():
+            yield json.dumps(record, default=json_default) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+app = FastAPI()
+app.include_router(router)
@@ -0,0 +1,79 @@
+import json
+
+from typing import Optional
+
+from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from autocli.core.jobs.job_runner import get_job_runner
+from autocli.core.lib.CONSTANTS import WATCH_TIMEOUT
+from autocli.core.lib.results import json_default
+from autocli.core.watch.progress_hub import get_progress_hub
+
+router = APIRouter()
+
+
+def event_stream(events) -> StreamingResponse:
+    """
+    Serve a ProgressHub stream as server-sent events, a comment line keeps idle connections open.
+    """
+
+    async def sse():
+        sequence = 0
+        try:
+            async for event in events:
+                if event is None:
+                    yield ": keep-alive\n\n"
+                    continue
+                sequence += 1
+                yield f"id: {sequence}\nevent: {event['event']}\ndata: {json.dumps(event, default=json_default)}\n\n"
+        finally:
+            # Leaves the shared pollers at once when the client disconnects
+            await events.aclose()
+
+    # No buffering by reverse proxies, each event has to reach the client as it happens
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(sse(), media_type="text/event-stream", headers=headers)
+
+
+@router.get("/events/resourceGroup/{rg_name}")
+async def resource_group_events(
+    rg_name: str,
+    subscription: Optional[str] = None,
+    follow: bool = False,
+    timeout: float = Query(WATCH_TIMEOUT, gt=0, le=WATCH_TIMEOUT),
+):
+    hub = get_progress_hub()
+    return event_stream(hub.watch_resource(rg_name, subscription_id=subscription, follow=follow, timeout=timeout))
+
+
+@router.get("/events/resourceGroup/{rg_name}/virtual-network/{vnet_name}")
+async def virtual_network_events(
+    rg_name: str,
+    vnet_name: str,
+    subscription: Optional[str] = None,
+    follow: bool = False,
+    timeout: float = Query(WATCH_TIMEOUT, gt=0, le=WATCH_TIMEOUT),
+):
+    hub = get_progress_hub()
+    return event_stream(
+        hub.watch_resource(rg_name, vnet_name, subscription_id=subscription, follow=follow, timeout=timeout)
+    )
+
+
+@router.get("/events/tracking/{trackingId}")
+async def tracking_events(
+    trackingId: str,
+    follow: bool = False,
+    timeout: float = Query(WATCH_TIMEOUT, gt=0, le=WATCH_TIMEOUT),
+):
+    operations = await run_in_threadpool(get_job_runner().store.find, trackingId)
+    if not operations:
+        raise HTTPException(status_code=404, detail=f"No operations were submitted with trackingId {trackingId}")
+    hub = get_progress_hub()
+    return event_stream(hub.watch_tracking(trackingId, operations, follow=follow, timeout=timeout))
+
+
+app = FastAPI()
+app.include_router(router)
@@ -0,0 +1,37 @@
+import json
+
+from typing import Optional
+
+from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from autocli.core.lib.log_index import get_log_index
+from autocli.core.lib.results import json_default
+
+router = APIRouter()
+
+
+@router.get("/logs")
+async def lookup_logs(
+    trackingId: Optional[str] = None,
+    correlationId: Optional[str] = None,
+    resource: Optional[str] = None,
+    expand: bool = False,
+):
+    if not (trackingId or correlationId or resource):
+        raise HTTPException(status_code=400, detail="Give a trackingId, correlationId or resource to look up")
+    # SQLite and mmap reads are blocking, keep them off the event loop
+    records = await run_in_threadpool(
+        get_log_index().lookup, trackingId=trackingId, correlationId=correlationId, resource=resource, expand=expand
+    )
+
+    def ndjson():
+        for record in records:
+            yield json.dumps(record, default=json_default) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+app = FastAPI()
+app.include_router(router)
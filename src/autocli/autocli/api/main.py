@@ -1,8 +1,49 @@
-from fastapi import FastAPI
-from autocli.api.azVnetapi import router as vnetRouter
-from autocli.api.azRGapi import router as rgRouter
+from contextlib import asynccontextmanager
 
-app = FastAPI()
+import time
+
+from fastapi import FastAPI, Request
+from autocli.api.bulk.azBulkapi import router as bulkRouter
+from autocli.api.events.azEventsapi import router as eventsRouter
+from autocli.api.logs.azLogsapi import router as logsRouter
+from autocli.api.metrics.azMetricsapi import router as metricsRouter
+from autocli.api.network.vnet.azVnetapi import router as vnetRouter
+from autocli.api.operations.azOperationsapi import router as operationsRouter
+from autocli.api.rg.azRGapi import router as rgRouter
+from autocli.core.jobs.job_runner import get_job_runner
+from autocli.core.lib.CONSTANTS import METRICS_ENABLED
+from autocli.core.lib.metrics_util import API_REQUEST_SECONDS
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Bind the job runner to this event loop, taking over jobs left unfinished by a previous worker
+    get_job_runner()
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(vnetRouter)
 app.include_router(rgRouter)
+app.include_router(operationsRouter)
+app.include_router(metricsRouter)
+app.include_router(bulkRouter)
+app.include_router(eventsRouter)
+app.include_router(logsRouter)
+
+if METRICS_ENABLED:
+
+    @app.middleware("http")
+    async def record_latency(request: Request, call_next):
+        started = time.perf_counter()
+        response = await call_next(request)
+        # Label by route template, not raw path, so resource names do not explode the series count
+        route = request.scope.get("route")
+        API_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            request.method,
+            getattr(route, "path", "unmatched"),
+            str(response.status_code),
+        )
+        return response
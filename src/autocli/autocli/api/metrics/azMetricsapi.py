@@ -0,0 +1,18 @@
+from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from autocli.core.lib.CONSTANTS import METRICS_ENABLED
+from autocli.core.lib.metrics_util import render
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled, set AUTOCLI_METRICS=1")
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+
+app = FastAPI()
+app.include_router(router)
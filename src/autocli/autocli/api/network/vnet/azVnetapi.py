@@ -1,29 +1,105 @@
 import json
 
-from fastapi import FastAPI, APIRouter
+from typing import List, Optional
 
-from autocli.core.az_vnet_checker import VnetChecker
-from autocli.core.az_vnet_create import VirtualNetworkCreator
+from fastapi import FastAPI, APIRouter, Body, HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from autocli.core.network.vnets.az_vnet_checker import AsyncVnetChecker
+from autocli.core.network.vnets.az_vnet_lister import AsyncVnetLister
+from autocli.core.network.ipam.subnet_layout import parse_subnets
+from autocli.core.lib.fanout_util import (
+    async_fan_out,
+    async_merge_streams,
+    async_resolve_subscriptions,
+    fans_out,
+    tag_results,
+)
+from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION
 from autocli.core.lib.trackingId_util import TrackingIdGenerator
+from autocli.api.operations.azOperationsapi import submit_job
 
-trackId = TrackingIdGenerator().trackingId()
 router = APIRouter()
 
 
 @router.get("/resourceGroup/{rg_name}/location/{location}/virtual-network/{vnet_name}")
-def check_resource_group(rg_name: str, location: str, vnet_name: str):
-    checker = VnetChecker(location=location, rg_name=rg_name, vnet_name=vnet_name, trackingId=trackId)
-    response = checker.vnet_check()
-    response = json.loads(response)
-    return response
-
-
-@router.post("/resourceGroup/{rg_name}/location/{location}/virtual-network/{vnet_name}")
-def create_resource_group(rg_name: str, location: str, vnet_name: str):
-    creator = VirtualNetworkCreator(rg_name=rg_name, location=location, trackingId=trackId, vnet_name=vnet_name)
-    response = creator.vnet_create()
-    response = json.loads(response)
-    return response
+async def check_resource_group(rg_name: str, location: str, vnet_name: str, subscription: Optional[str] = None):
+    trackId = TrackingIdGenerator().trackingId()
+    # Without ?subscription= a check answers for AZURE_SUBSCRIPTION_ID only, whatever AUTOCLI_SUBSCRIPTIONS holds
+    subscriptions = await async_resolve_subscriptions(subscription or DEV_AZURE_SUBSCRIPTION)
+    results = await async_fan_out(
+        subscriptions,
+        lambda subscription_id: AsyncVnetChecker(
+            location=location,
+            rg_name=rg_name,
+            vnet_name=vnet_name,
+            trackingId=trackId,
+            subscription_id=subscription_id,
+        ).vnet_check(),
+    )
+    if not fans_out(subscription):
+        # The single-object response unless several subscriptions ("*" included) were asked for explicitly
+        _, response = results[0]
+        if isinstance(response, Exception):
+            raise response
+        return response.to_dict()
+    return tag_results(results, subscriptions)
+
+
+@router.post("/resourceGroup/{rg_name}/location/{location}/virtual-network/{vnet_name}", status_code=202)
+async def create_resource_group(
+    rg_name: str, location: str, vnet_name: str, response: Response, subscription: Optional[str] = None
+):
+    trackId = TrackingIdGenerator().trackingId()
+    params = {"rg_name": rg_name, "location": location, "vnet_name": vnet_name, "subscription_id": subscription}
+    return await submit_job(response, "virtualNetwork.create", params, trackId)
+
+
+@router.post("/resourceGroup/{rg_name}/location/{location}/virtual-network/{vnet_name}/subnets", status_code=202)
+async def create_subnets(
+    rg_name: str,
+    location: str,
+    vnet_name: str,
+    response: Response,
+    subnets: List[str] = Body(..., embed=True),
+    subscription: Optional[str] = None,
+):
+    trackId = TrackingIdGenerator().trackingId()
+    try:
+        # Validated here so a bad size is a 400 instead of a failed operation
+        layout = parse_subnets(subnets)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    params = {
+        "rg_name": rg_name,
+        "location": location,
+        "vnet_name": vnet_name,
+        "subnets": layout,
+        "subscription_id": subscription,
+    }
+    return await submit_job(response, "virtualNetwork.create", params, trackId)
+
+
+@router.get("/virtual-networks")
+async def list_virtual_networks(
+    resourceGroup: Optional[str] = None,
+    top: Optional[int] = None,
+    filter: Optional[str] = None,
+    subscription: Optional[str] = None,
+):
+    trackId = TrackingIdGenerator().trackingId()
+    subscriptions = await async_resolve_subscriptions(subscription)
+
+    def stream(subscription_id):
+        return AsyncVnetLister(
+            trackingId=trackId, rg_name=resourceGroup, top=top, filter=filter, subscription_id=subscription_id
+        ).vnet_list()
+
+    async def ndjson():
+        async for vnet in async_merge_streams(subscriptions, stream):
+            yield json.dumps(vnet) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 
 app = FastAPI()
@@ -0,0 +1,31 @@
+from fastapi import FastAPI, APIRouter, HTTPException, Response
+from starlette.concurrency import run_in_threadpool
+
+from autocli.core.jobs.job_runner import JobQueueFull, get_job_runner
+
+router = APIRouter()
+
+
+async def submit_job(response: Response, kind: str, params: dict, trackingId: str) -> dict:
+    """
+    Queue a core job for a 202 route and point the client at its operation status.
+    The job is persisted to SQLite first, off the event loop.
+    """
+    try:
+        operation_id = await run_in_threadpool(get_job_runner().submit, kind, params, trackingId)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    response.headers["Location"] = f"/operations/{operation_id}"
+    return {"operationId": operation_id, "status": "queued", "trackingId": trackingId}
+
+
+@router.get("/operations/{operation_id}")
+async def get_operation(operation_id: str):
+    operation = await run_in_threadpool(get_job_runner().store.get, operation_id)
+    if operation is None:
+        raise HTTPException(status_code=404, detail=f"Operation {operation_id} not found")
+    return operation
+
+
+app = FastAPI()
+app.include_router(router)
@@ -1,29 +1,70 @@
 import json
 
-from fastapi import FastAPI, APIRouter
+from typing import Optional
 
-from autocli.core.az_vnet_checker import ResourceGroupChecker
-from autocli.core.az_vnet_create import ResourceGroupCreator
+from fastapi import FastAPI, APIRouter, Response
+from fastapi.responses import StreamingResponse
+
+from autocli.core.rg.az_rg_checker import AsyncResourceGroupChecker
+from autocli.core.rg.az_rg_lister import AsyncResourceGroupLister
+from autocli.core.lib.fanout_util import (
+    async_fan_out,
+    async_merge_streams,
+    async_resolve_subscriptions,
+    fans_out,
+    tag_results,
+)
+from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION
 from autocli.core.lib.trackingId_util import TrackingIdGenerator
+from autocli.api.operations.azOperationsapi import submit_job
 
-trackId = TrackingIdGenerator().trackingId()
 router = APIRouter()
 
 
 @router.get("/location/{location}/resourceGroup/{rg_name}")
-def check_resource_group(rg_name: str, location: str):
-    checker = ResourceGroupChecker(location=location, rg_name=rg_name, trackingId=trackId)
-    response = checker.rg_check()
-    response = json.loads(response)
-    return response
-
-
-@router.post("/location/{location}/resourceGroup/{rg_name}")
-def create_resource_group(rg_name: str, location: str):
-    creator = ResourceGroupCreator(location=location, rg_name=rg_name, trackingId=trackId)
-    response = creator.rg_create()
-    response = json.loads(response)
-    return response
+async def check_resource_group(rg_name: str, location: str, subscription: Optional[str] = None):
+    trackId = TrackingIdGenerator().trackingId()
+    # Without ?subscription= a check answers for AZURE_SUBSCRIPTION_ID only, whatever AUTOCLI_SUBSCRIPTIONS holds
+    subscriptions = await async_resolve_subscriptions(subscription or DEV_AZURE_SUBSCRIPTION)
+    results = await async_fan_out(
+        subscriptions,
+        lambda subscription_id: AsyncResourceGroupChecker(
+            location=location, rg_name=rg_name, trackingId=trackId, subscription_id=subscription_id
+        ).rg_check(),
+    )
+    if not fans_out(subscription):
+        # The single-object response unless several subscriptions ("*" included) were asked for explicitly
+        _, response = results[0]
+        if isinstance(response, Exception):
+            raise response
+        return response.to_dict()
+    return tag_results(results, subscriptions)
+
+
+@router.post("/location/{location}/resourceGroup/{rg_name}", status_code=202)
+async def create_resource_group(rg_name: str, location: str, response: Response, subscription: Optional[str] = None):
+    trackId = TrackingIdGenerator().trackingId()
+    params = {"rg_name": rg_name, "location": location, "subscription_id": subscription}
+    return await submit_job(response, "resourceGroup.create", params, trackId)
+
+
+@router.get("/resourceGroups")
+async def list_resource_groups(
+    top: Optional[int] = None, filter: Optional[str] = None, subscription: Optional[str] = None
+):
+    trackId = TrackingIdGenerator().trackingId()
+    subscriptions = await async_resolve_subscriptions(subscription)
+
+    def stream(subscription_id):
+        return AsyncResourceGroupLister(
+            trackingId=trackId, top=top, filter=filter, subscription_id=subscription_id
+        ).rg_list()
+
+    async def ndjson():
+        async for rg in async_merge_streams(subscriptions, stream):
+            yield json.dumps(rg) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 
 app = FastAPI()
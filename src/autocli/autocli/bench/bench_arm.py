@@ -0,0 +1,269 @@
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+
+from autocli.bench.mock_arm import MockArmServer
+
+FLOWS = ("check", "async-check", "create", "bulk", "reapply")
+
+
+def _configure_env(base_url: str, workdir: str, cache: bool):
+    """
+    Point the core at base_url with a static token and keep its cache, ledger, jobs and logs in workdir.
+    Must run before the first autocli.core import: CONSTANTS reads the environment once.
+    """
+    os.environ["AUTOCLI_ARM_BASE_URL"] = base_url
+    os.environ.setdefault("AUTOCLI_ARM_TOKEN", "mock")
+    os.environ.setdefault("AZURE_SUBSCRIPTION_ID", "00000000-0000-0000-0000-000000000000")
+    os.environ.setdefault("AUTOCLI_LRO_INITIAL_DELAY", "0.05")
+    os.environ["AUTOCLI_CACHE"] = "1" if cache else "0"
+    os.environ["AUTOCLI_CACHE_PATH"] = os.path.join(workdir, "inventory.db")
+    os.environ["AUTOCLI_IPAM_LEDGER_PATH"] = os.path.join(workdir, "ipam.db")
+    os.environ["AUTOCLI_JOBS_PATH"] = os.path.join(workdir, "jobs.db")
+    os.environ["AUTOCLI_LOG_FOLDER"] = os.path.join(workdir, "logs")
+
+
+def _percentile(samples: list, percent: float) -> float:
+    # Nearest rank on the sorted samples
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(round(percent / 100 * len(ordered))) - 1))]
+
+
+def _summary(flow: str, latencies: list, errors: int, elapsed: float) -> dict:
+    return {
+        "flow": flow,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def _measure(flow: str, call, items: list, concurrency: int) -> dict:
+    """
+    Run call(item) for every item on concurrency threads; call returns True on success.
+    """
+
+    def timed(item):
+        started = time.perf_counter()
+        ok = call(item)
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        outcomes = list(pool.map(timed, items))
+    elapsed = time.perf_counter() - started
+    return _summary(flow, [seconds for seconds, _ in outcomes], sum(1 for _, ok in outcomes if not ok), elapsed)
+
+
+def _measure_async(flow: str, call, items: list, concurrency: int) -> dict:
+    """
+    Await call(item) for every item on one event loop, at most concurrency at a time.
+    """
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def timed(item):
+            async with semaphore:
+                started = time.perf_counter()
+                ok = await call(item)
+                return time.perf_counter() - started, ok
+
+        return await asyncio.gather(*(timed(item) for item in items))
+
+    started = time.perf_counter()
+    outcomes = asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    return _summary(flow, [seconds for seconds, _ in outcomes], sum(1 for _, ok in outcomes if not ok), elapsed)
+
+
+def _manifest(run_id: str, location: str, groups: int, vnets: int) -> dict:
+    from autocli.core.bulk.manifest import parse_manifest
+
+    return parse_manifest(
+        {
+            "resourceGroups": [
+                {
+                    "name": f"bench-{run_id}-bulk{group}",
+                    "location": location,
+                    "virtualNetworks": [
+                        {"name": f"vnet{index}", "prefixLength": 24, "subnets": ["web:26", "app:26"]}
+                        for index in range(vnets)
+                    ],
+                }
+                for group in range(groups)
+            ]
+        }
+    )
+
+
+def _bulk(flow: str, manifest: dict, concurrency: int) -> dict:
+    """
+    One manifest apply. Latencies are the time from the start of the apply until each resource finished.
+    """
+    from autocli.core.bulk.az_bulk_apply import BulkApplier
+
+    applier = BulkApplier(manifest, trackingId=uuid.uuid4(), parallelism=concurrency)
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for record in applier.apply():
+        latencies.append(time.perf_counter() - started)
+        errors += record["status"] != "succeeded"
+    return _summary(flow, latencies, errors, time.perf_counter() - started)
+
+
+def run_benchmarks(flows: list, requests: int, concurrency: int, location: str = "eastus") -> list:
+    """
+    Run the selected flows against whatever AUTOCLI_ARM_BASE_URL points at and return one summary per flow.
+    check/async-check read VNets created by an unmeasured setup step, create makes new /24 VNets,
+    bulk applies a manifest of requests VNets over a few RGs and reapply runs that manifest again (all no-ops).
+    """
+    from autocli.core.rg.az_rg_create import ResourceGroupCreator
+    from autocli.core.network.vnets.az_vnet_checker import AsyncVnetChecker, VnetChecker
+    from autocli.core.network.vnets.az_vnet_create import VirtualNetworkCreator
+
+    run_id = uuid.uuid4().hex[:8]
+    rg_name = f"bench-{run_id}"
+    ResourceGroupCreator(rg_name=rg_name, location=location, trackingId=run_id).rg_create()
+
+    def create(name):
+        creator = VirtualNetworkCreator(
+            rg_name=rg_name, location=location, vnet_name=name, trackingId=run_id, prefix_length=24
+        )
+        return creator.vnet_create().isProvisioned == "Yes"
+
+    def check(name):
+        checker = VnetChecker(location=location, rg_name=rg_name, vnet_name=name, trackingId=run_id)
+        return checker.vnet_check().isProvisioned == "Yes"
+
+    async def async_check(name):
+        checker = AsyncVnetChecker(location=location, rg_name=rg_name, vnet_name=name, trackingId=run_id)
+        return (await checker.vnet_check()).isProvisioned == "Yes"
+
+    names = [f"vnet{index}" for index in range(requests)]
+    results = []
+    if "check" in flows or "async-check" in flows:
+        _measure("setup", create, names, concurrency)
+    if "check" in flows:
+        results.append(_measure("check", check, names, concurrency))
+    if "async-check" in flows:
+        results.append(_measure_async("async-check", async_check, names, concurrency))
+    if "create" in flows:
+        results.append(_measure("create", create, [f"created{index}" for index in range(requests)], concurrency))
+    if "bulk" in flows or "reapply" in flows:
+        groups = max(1, requests // 25)
+        manifest = _manifest(run_id, location, groups, max(1, requests // groups))
+        bulk = _bulk("bulk", manifest, concurrency)
+        if "bulk" in flows:
+            results.append(bulk)
+        if "reapply" in flows:
+            results.append(_bulk("reapply", manifest, concurrency))
+    return results
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """
+    Return a message per flow whose throughput dropped or whose p99 grew by more than tolerance.
+    """
+    previous = {entry["flow"]: entry for entry in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result["flow"])
+        if before is None:
+            continue
+        if result["throughput"] < before["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{result['flow']}: throughput {result['throughput']}/s, baseline {before['throughput']}/s"
+            )
+        if result["p99_ms"] > before["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{result['flow']}: p99 {result['p99_ms']}ms, baseline {before['p99_ms']}ms")
+    return regressions
+
+
+@click.command()
+@click.option("--base-url", default=None, help="ARM endpoint to use instead of starting a mock server in-process.")
+@click.option(
+    "--flows", default=",".join(FLOWS), show_default=True, help="Comma separated flows: " + ", ".join(FLOWS) + "."
+)
+@click.option("--requests", default=200, show_default=True, help="Operations per flow.")
+@click.option("--concurrency", default=16, show_default=True, help="Threads (or coroutines) per flow.")
+@click.option("--latency", default=0.02, show_default=True, help="In-process mock: seconds per response.")
+@click.option("--jitter", default=0.01, show_default=True, help="In-process mock: extra random seconds.")
+@click.option("--provision-time", default=0.1, show_default=True, help="In-process mock: seconds a PUT stays Updating.")
+@click.option("--write-rate", type=float, default=None, help="In-process mock: writes per second before 429s.")
+@click.option("--cache/--no-cache", default=False, show_default=True, help="Use the inventory cache.")
+@click.option("--json", "json_path", default=None, help="Write the results to this file.")
+@click.option("--baseline", default=None, help="Results file from an earlier run to compare against.")
+@click.option("--tolerance", default=0.25, show_default=True, help="Allowed slowdown against the baseline.")
+def main(
+    base_url,
+    flows,
+    requests,
+    concurrency,
+    latency,
+    jitter,
+    provision_time,
+    write_rate,
+    cache,
+    json_path,
+    baseline,
+    tolerance,
+):
+    """Benchmark check, create and bulk flows against a mock ARM server, fully offline."""
+    selected = [flow.strip() for flow in flows.split(",") if flow.strip()]
+    unknown = set(selected) - set(FLOWS)
+    if unknown:
+        raise click.BadParameter(f"Unknown flows: {', '.join(sorted(unknown))}", param_hint="--flows")
+    server = None
+    if base_url is None:
+        # A one second burst, so a rate limit shows up as 429s within a short run
+        server = MockArmServer(
+            latency=latency,
+            jitter=jitter,
+            provision_time=provision_time,
+            write_rate=write_rate,
+            burst=max(1, int(write_rate or 100)),
+        )
+        base_url = server.start().base_url
+    with tempfile.TemporaryDirectory(prefix="autocli-bench-") as workdir:
+        _configure_env(base_url, workdir, cache)
+        try:
+            results = run_benchmarks(selected, requests, concurrency)
+        finally:
+            if server is not None:
+                server.stop()
+    click.echo(f"{'flow':<12} {'requests':>8} {'errors':>6} {'ops/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+    for result in results:
+        click.echo(
+            f"{result['flow']:<12} {result['requests']:>8} {result['errors']:>6} {result['throughput']:>9} "
+            f"{result['p50_ms']:>9} {result['p99_ms']:>9}"
+        )
+    if server is not None:
+        click.echo(f"mock ARM: {server.state.requests} requests, {server.state.throttled} throttled")
+    if json_path:
+        with open(json_path, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+    if baseline:
+        with open(baseline) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), tolerance)
+        for regression in regressions:
+            click.echo(f"REGRESSION {regression}", err=True)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
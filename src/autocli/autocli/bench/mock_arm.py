@@ -0,0 +1,478 @@
+import ipaddress
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import click
+
+NETWORK = ("providers", "microsoft.network", "virtualnetworks")
+
+
+class _Bucket:
+    """
+    ARM-style per-category request budget, refilled continuously at rate per second.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def take(self):
+        """
+        Return (allowed, remaining, retry_after seconds).
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self.tokens < 1:
+            return False, 0, (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        return True, int(self.tokens), 0.0
+
+
+class MockArmState:
+    """
+    In-memory ARM: resource groups, virtual networks and their subnets keyed by lowercased resource path,
+    with provisioningState transitions and async operations that complete after provision_time.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        provision_time: float = 0.0,
+        page_size: int = 100,
+        read_rate: float = None,
+        write_rate: float = None,
+        burst: int = 100,
+        retry_after: int = 0,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.provision_time = provision_time
+        self.page_size = page_size
+        # Seconds suggested to pollers in Retry-After, 0 leaves the poll interval to the client
+        self.retry_after = retry_after
+        self.resources = {}
+        self.operations = {}
+        self.requests = 0
+        self.throttled = 0
+        self.lock = threading.Lock()
+        self.buckets = {}
+        if read_rate:
+            self.buckets["reads"] = _Bucket(read_rate, burst)
+        if write_rate:
+            self.buckets["writes"] = _Bucket(write_rate, burst)
+            self.buckets["deletes"] = _Bucket(write_rate, burst)
+
+    def advance(self):
+        """
+        Finish every operation whose time has come. Called under the lock at the start of each request.
+        """
+        now = time.monotonic()
+        for operation in self.operations.values():
+            if operation["status"] == "InProgress" and operation["done_at"] <= now:
+                operation["status"] = "Succeeded"
+                operation["finish"]()
+
+    def start_operation(self, finish) -> str:
+        operation_id = uuid.uuid4().hex
+        self.operations[operation_id] = {
+            "status": "InProgress",
+            "done_at": time.monotonic() + self.provision_time,
+            "finish": finish,
+        }
+        return operation_id
+
+    def children(self, key: str) -> list:
+        return [child for child in self.resources if child.startswith(key + "/")]
+
+
+class MockArmHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockARM/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self) -> MockArmState:
+        return self.server.state
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str):
+        state = self.state
+        # Before anything can answer: _send reads it, also for a 400 on a body that is not JSON
+        self.remaining = None
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        if state.latency or state.jitter:
+            time.sleep(state.latency + random.uniform(0, state.jitter))
+        split = urlsplit(self.path)
+        self.query = parse_qs(split.query)
+        parts = [part for part in split.path.split("/") if part]
+        self.parts = parts
+        self.key = "/" + "/".join(parts).lower()
+        try:
+            body = json.loads(raw) if raw else {}
+        except ValueError:
+            return self._error(400, "InvalidRequestContent", "Request body is not valid JSON")
+        with state.lock:
+            state.requests += 1
+            state.advance()
+            category = "reads" if method == "GET" else "deletes" if method == "DELETE" else "writes"
+            bucket = state.buckets.get(category)
+            if bucket is not None:
+                allowed, self.remaining, wait = bucket.take()
+                if not allowed:
+                    state.throttled += 1
+                    self.remaining = (category, 0)
+                    return self._send(
+                        429,
+                        {"error": {"code": "TooManyRequests", "message": "Mock ARM request budget exhausted"}},
+                        {"Retry-After": str(max(1, math.ceil(wait)))},
+                    )
+                self.remaining = (category, self.remaining)
+            return self._route(method, parts, body)
+
+    def _route(self, method: str, parts: list, body: dict):
+        lowered = [part.lower() for part in parts]
+        if lowered[:2] == ["mock", "operations"] and len(parts) == 3 and method == "GET":
+            return self._operation(parts[2])
+        if lowered == ["subscriptions"] and method == "GET":
+            return self._subscriptions()
+        if len(parts) < 3 or lowered[0] != "subscriptions":
+            return self._error(404, "InvalidResourceType", f"No mock route for {self.path}")
+        rest = lowered[2:]
+        sub_key = "/" + "/".join(lowered[:2]) + "/"
+        if rest == ["resourcegroups"] and method == "GET":
+            return self._list(lambda key: key.startswith(sub_key) and key.count("/") == 4 and "/resourcegroups/" in key)
+        if len(rest) == 2 and rest[0] == "resourcegroups":
+            return {"GET": self._get, "PUT": self._put_group, "DELETE": self._delete}[method](body)
+        if tuple(rest) == NETWORK and method == "GET":
+            return self._list(
+                lambda key: key.startswith(sub_key) and key.count("/") == 8 and "/virtualnetworks/" in key
+            )
+        if len(rest) >= 5 and rest[0] == "resourcegroups" and tuple(rest[2:5]) == NETWORK:
+            rg_key = "/" + "/".join(lowered[:4])
+            if len(rest) == 5 and method == "GET":
+                return self._list(lambda key: key.startswith(rg_key + "/providers/") and key.count("/") == 8)
+            if len(rest) == 6:
+                return {"GET": self._get, "PUT": self._put_vnet, "DELETE": self._delete}[method](body)
+            if len(rest) == 7 and rest[6] == "subnets" and method == "GET":
+                vnet_key = self.key.rsplit("/", 1)[0]
+                return self._list(lambda key: key.startswith(vnet_key + "/subnets/") and key.count("/") == 10)
+            if len(rest) == 8 and rest[6] == "subnets":
+                return {"GET": self._get, "PUT": self._put_subnet, "DELETE": self._delete}[method](body)
+        return self._error(404, "InvalidResourceType", f"No mock route for {method} {self.path}")
+
+    # --- responses ---
+
+    def _send(self, status: int, body=None, headers: dict = None):
+        payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("x-ms-correlation-request-id", str(uuid.uuid4()))
+        self.send_header("x-ms-request-id", str(uuid.uuid4()))
+        if self.remaining is not None:
+            category, remaining = self.remaining
+            self.send_header(f"x-ms-ratelimit-remaining-subscription-{category}", str(remaining))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status: int, code: str, message: str):
+        return self._send(status, {"error": {"code": code, "message": message}})
+
+    def _operation_headers(self, operation_id: str) -> dict:
+        url = f"http://{self.headers.get('Host')}/mock/operations/{operation_id}?api-version=2022-09-01"
+        headers = {"Azure-AsyncOperation": url, "Location": url}
+        if self.state.retry_after:
+            headers["Retry-After"] = str(self.state.retry_after)
+        return headers
+
+    def _operation(self, operation_id: str):
+        operation = self.state.operations.get(operation_id)
+        if operation is None:
+            return self._error(404, "OperationNotFound", f"Operation {operation_id} not found")
+        return self._send(200, {"status": operation["status"]})
+
+    def _list(self, match):
+        """
+        Serve a list one page at a time, following up with a nextLink carrying $skiptoken.
+        """
+        items = [self.state.resources[key] for key in sorted(self.state.resources) if match(key)]
+        skip = int(self.query.get("$skiptoken", ["0"])[0])
+        top = int(self.query.get("$top", [self.state.page_size])[0])
+        page = {"value": items[skip : skip + top]}
+        if skip + top < len(items):
+            query = {key: values[0] for key, values in self.query.items()}
+            query["$skiptoken"] = str(skip + top)
+            page["nextLink"] = f"http://{self.headers.get('Host')}{urlsplit(self.path).path}?{urlencode(query)}"
+        return self._send(200, page)
+
+    def _subscriptions(self):
+        # Every subscription that holds a resource, so "*" fan-outs can be exercised
+        seen = sorted({key.split("/")[2] for key in self.state.resources})
+        value = [{"id": f"/subscriptions/{sub}", "subscriptionId": sub, "state": "Enabled"} for sub in seen]
+        return self._send(200, {"value": value})
+
+    def _get(self, body: dict):
+        resource = self.state.resources.get(self.key)
+        if resource is None:
+            code = "ResourceGroupNotFound" if len(self.parts) == 4 else "ResourceNotFound"
+            return self._error(404, code, f"Resource {self.path} was not found")
+        if self.headers.get("If-None-Match") and self.headers.get("If-None-Match") == resource.get("etag"):
+            return self._send(304, None, {"ETag": resource["etag"]})
+        return self._send(200, resource, {"ETag": resource["etag"]})
+
+    # --- writes ---
+
+    def _resource_id(self) -> str:
+        return "/" + "/".join(self.parts)
+
+    def _stamp(self, resource: dict, state: str):
+        resource["etag"] = f'W/"{uuid.uuid4()}"'
+        resource.setdefault("properties", {})["provisioningState"] = state
+
+    def _located_elsewhere(self, existing: dict, body: dict) -> bool:
+        location = (body.get("location") or "").replace(" ", "").lower()
+        return existing is not None and existing["location"] != location
+
+    def _put_group(self, body: dict):
+        state = self.state
+        existing = state.resources.get(self.key)
+        if not body.get("location"):
+            return self._error(400, "LocationRequired", "The location property is required for this definition.")
+        if self._located_elsewhere(existing, body):
+            return self._error(
+                409,
+                "InvalidResourceGroupLocation",
+                f"Invalid resource group location '{body['location']}'. The Resource group already exists in location '{existing['location']}'.",
+            )
+        group = {
+            "id": self._resource_id(),
+            "name": self.parts[3],
+            "type": "Microsoft.Resources/resourceGroups",
+            "location": body["location"].replace(" ", "").lower(),
+            "tags": body.get("tags", {}),
+        }
+        # Resource group writes are synchronous in ARM
+        self._stamp(group, "Succeeded")
+        state.resources[self.key] = group
+        return self._send(200 if existing else 201, group)
+
+    def _put_vnet(self, body: dict):
+        state = self.state
+        rg_key = "/" + "/".join(self.key.split("/")[1:5])
+        if rg_key not in state.resources:
+            return self._error(404, "ResourceGroupNotFound", f"Resource group '{self.parts[3]}' could not be found.")
+        existing = state.resources.get(self.key)
+        if self._located_elsewhere(existing, body):
+            return self._error(
+                409,
+                "InvalidResourceLocation",
+                f"The resource '{self.parts[7]}' already exists in location '{existing['location']}' in resource group '{self.parts[3]}'. A resource with the same name cannot be created in location '{body['location']}'.",
+            )
+        properties = body.get("properties", {})
+        address_prefixes = properties.get("addressSpace", {}).get("addressPrefixes") or []
+        if not address_prefixes:
+            return self._error(400, "InvalidAddressSpace", "addressSpace.addressPrefixes is required")
+        problem = self._subnet_problem(address_prefixes, properties.get("subnets", []))
+        if problem:
+            return self._error(400, "NetcfgInvalidSubnet", problem)
+        vnet = {
+            "id": self._resource_id(),
+            "name": self.parts[7],
+            "type": "Microsoft.Network/virtualNetworks",
+            "location": body.get("location", "").replace(" ", "").lower(),
+            "tags": body.get("tags", {}),
+            "properties": {"addressSpace": {"addressPrefixes": address_prefixes}, "subnets": []},
+        }
+        # Subnets left out of the body are removed, as with a real PUT
+        for child in state.children(self.key):
+            state.resources.pop(child)
+        for subnet in properties.get("subnets", []):
+            resource = self._subnet_resource(vnet["id"], subnet)
+            state.resources[resource["id"].lower()] = resource
+            vnet["properties"]["subnets"].append(resource)
+        return self._provision(vnet, 200 if existing else 201)
+
+    def _put_subnet(self, body: dict):
+        state = self.state
+        vnet_key = self.key.rsplit("/subnets/", 1)[0]
+        vnet = state.resources.get(vnet_key)
+        if vnet is None:
+            return self._error(404, "ResourceNotFound", f"Virtual network '{self.parts[7]}' was not found")
+        subnet = self._subnet_resource(vnet["id"], {"name": self.parts[9], **body})
+        others = [s for s in vnet["properties"]["subnets"] if s["name"].lower() != self.parts[9].lower()]
+        problem = self._subnet_problem(vnet["properties"]["addressSpace"]["addressPrefixes"], others + [subnet])
+        if problem:
+            return self._error(400, "NetcfgInvalidSubnet", problem)
+        existing = state.resources.get(self.key)
+        vnet["properties"]["subnets"] = others + [subnet]
+        self._stamp(vnet, vnet["properties"]["provisioningState"])
+        return self._provision(subnet, 200 if existing else 201)
+
+    def _subnet_resource(self, vnet_id: str, subnet: dict) -> dict:
+        resource = {
+            "id": f"{vnet_id}/subnets/{subnet['name']}",
+            "name": subnet["name"],
+            "type": "Microsoft.Network/virtualNetworks/subnets",
+            "properties": {"addressPrefix": subnet.get("properties", {}).get("addressPrefix")},
+        }
+        self._stamp(resource, "Succeeded")
+        return resource
+
+    @staticmethod
+    def _subnet_problem(address_prefixes: list, subnets: list):
+        try:
+            spaces = [ipaddress.IPv4Network(prefix) for prefix in address_prefixes]
+            carved = []
+            for subnet in subnets:
+                network = ipaddress.IPv4Network(subnet.get("properties", {}).get("addressPrefix"))
+                if not any(network.subnet_of(space) for space in spaces):
+                    return f"Subnet '{subnet.get('name')}' {network} is not within the VNet address space"
+                for name, other in carved:
+                    if network.overlaps(other):
+                        return f"Subnet '{subnet.get('name')}' {network} overlaps subnet '{name}' {other}"
+                carved.append((subnet.get("name"), network))
+        except (TypeError, ValueError) as e:
+            return f"Invalid address prefix: {e}"
+        return None
+
+    def _provision(self, resource: dict, status: int):
+        """
+        Store resource as Updating and finish it after provision_time, answering with Azure-AsyncOperation.
+        """
+        state = self.state
+        key = resource["id"].lower()
+        if not state.provision_time:
+            self._stamp(resource, "Succeeded")
+            state.resources[key] = resource
+            return self._send(status, resource)
+        self._stamp(resource, "Updating")
+        state.resources[key] = resource
+
+        def finish():
+            if state.resources.get(key) is resource:
+                self._stamp(resource, "Succeeded")
+
+        operation_id = state.start_operation(finish)
+        return self._send(status, resource, self._operation_headers(operation_id))
+
+    def _delete(self, body: dict):
+        state = self.state
+        resource = state.resources.get(self.key)
+        if resource is None:
+            if len(self.parts) == 4:
+                return self._error(
+                    404, "ResourceGroupNotFound", f"Resource group '{self.parts[3]}' could not be found."
+                )
+            return self._send(204)
+        key = self.key
+
+        def finish():
+            for child in state.children(key) + [key]:
+                state.resources.pop(child, None)
+            if "/subnets/" in key:
+                vnet = state.resources.get(key.rsplit("/subnets/", 1)[0])
+                if vnet is not None:
+                    vnet["properties"]["subnets"] = [s for s in vnet["properties"]["subnets"] if s["id"].lower() != key]
+
+        if not state.provision_time:
+            finish()
+            return self._send(200)
+        self._stamp(resource, "Deleting")
+        operation_id = state.start_operation(finish)
+        return self._send(202, None, self._operation_headers(operation_id))
+
+
+class MockArmServer:
+    """
+    Mock ARM server on a background thread, usable as a context manager. base_url goes into AUTOCLI_ARM_BASE_URL.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, **options):
+        self.state = MockArmState(**options)
+        self.httpd = ThreadingHTTPServer((host, port), MockArmHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = self.state
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockArmServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="mock-arm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", show_default=True)
+@click.option("--port", default=8999, show_default=True)
+@click.option("--latency", default=0.0, show_default=True, help="Seconds added to every response.")
+@click.option("--jitter", default=0.0, show_default=True, help="Up to this many extra random seconds per response.")
+@click.option(
+    "--provision-time", default=0.0, show_default=True, help="Seconds a PUT/DELETE stays in progress (0: synchronous)."
+)
+@click.option("--page-size", default=100, show_default=True, help="List page size when $top is not given.")
+@click.option("--read-rate", type=float, default=None, help="Reads per second before answering 429.")
+@click.option("--write-rate", type=float, default=None, help="Writes/deletes per second before answering 429.")
+@click.option("--burst", default=100, show_default=True, help="Request budget available at once per category.")
+@click.option("--retry-after", default=0, show_default=True, help="Retry-After seconds on async operations (0: none).")
+def main(host, port, latency, jitter, provision_time, page_size, read_rate, write_rate, burst, retry_after):
+    """Serve a local stand-in for the ARM resource group, VNet and subnet endpoints."""
+    server = MockArmServer(
+        host=host,
+        port=port,
+        latency=latency,
+        jitter=jitter,
+        provision_time=provision_time,
+        page_size=page_size,
+        read_rate=read_rate,
+        write_rate=write_rate,
+        burst=burst,
+        retry_after=retry_after,
+    )
+    click.echo(
+        f"Mock ARM listening on {server.base_url}, use AUTOCLI_ARM_BASE_URL={server.base_url} AUTOCLI_ARM_TOKEN=mock"
+    )
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
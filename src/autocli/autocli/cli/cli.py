@@ -1,57 +1,374 @@
+import json
+import sys
+
+# A running daemon serves the command warm, before this process pays for the imports below
+if __name__ == "__main__":
+    from autocli.cli.daemon_client import forward
+
+    forward(sys.argv[1:])
+
 import click
 
+from autocli.core.bulk.az_bulk_apply import BulkApplier
+from autocli.core.bulk.az_bulk_destroy import BulkDestroyer
+from autocli.core.bulk.manifest import load_manifest
 from autocli.core.rg.az_rg_checker import ResourceGroupChecker
 from autocli.core.rg.az_rg_create import ResourceGroupCreator
+from autocli.core.rg.az_rg_lister import ResourceGroupLister
 from autocli.core.network.vnets.az_vnet_checker import VnetChecker
 from autocli.core.network.vnets.az_vnet_create import VirtualNetworkCreator
+from autocli.core.network.vnets.az_vnet_lister import VnetLister
+from autocli.core.lib.log_index import get_log_index
+from autocli.core.lib.log_util import enable_debug_output
+from autocli.core.lib.fanout_util import fan_out, fans_out, merge_streams, resolve_subscriptions, tag_results
+from autocli.core.lib.results import json_default
 from autocli.core.lib.trackingId_util import TrackingIdGenerator
+from autocli.core.lib.CONSTANTS import DAEMON_SOCKET, DEV_AZURE_SUBSCRIPTION, VNET_PREFIX_LENGTH
+from autocli.cli.daemon_client import control
+
+subscription_option = click.option(
+    "--subscription",
+    "subscriptions",
+    multiple=True,
+    help="Subscription id to run in, repeated or comma separated; '*' for every subscription the credential sees.",
+)
+
+
+def _subscriptions(values, fleet: bool) -> list:
+    # Lists default to every subscription in AUTOCLI_SUBSCRIPTIONS, checks and writes only to AZURE_SUBSCRIPTION_ID
+    if values:
+        return resolve_subscriptions(values)
+    return resolve_subscriptions() if fleet else [DEV_AZURE_SUBSCRIPTION]
+
+
+def _print_results(values, subscriptions: list, task):
+    """
+    Run task(subscription_id) in every subscription at once. Prints the Result as is unless --subscription asked for
+    several subscriptions ("*" included), then one JSON list, each entry tagged with its subscriptionId.
+    """
+    if not fans_out(values):
+        print(task(subscriptions[0]).to_json(indent=4))
+        return
+    print(json.dumps(tag_results(fan_out(subscriptions, task), subscriptions), indent=4, default=json_default))
 
 
 @click.group()
-def cli():
-    pass
+@click.option("--debug", is_flag=True, help="Print diagnostics, such as token cache hits and misses, on stderr.")
+def cli(debug):
+    if debug:
+        enable_debug_output()
 
 
 @cli.command()
 @click.argument("rg_name")
 @click.argument("location")
-def check_rg(rg_name, location):
+@subscription_option
+def check_rg(rg_name, location, subscriptions):
     """Check if a resource group exists."""
     trackId = TrackingIdGenerator().trackingId()
-    checker = ResourceGroupChecker(location=location, rg_name=rg_name, trackingId=trackId)
-    print(checker.rg_check())
+    _print_results(
+        subscriptions,
+        _subscriptions(subscriptions, fleet=False),
+        lambda subscription: ResourceGroupChecker(
+            location=location, rg_name=rg_name, trackingId=trackId, subscription_id=subscription
+        ).rg_check(),
+    )
 
 
 @cli.command()
 @click.argument("rg_name")
 @click.argument("location")
-def create_rg(rg_name, location):
+@subscription_option
+def create_rg(rg_name, location, subscriptions):
     """Create a resource group."""
     trackId = TrackingIdGenerator().trackingId()
-    creator = ResourceGroupCreator(location=location, rg_name=rg_name, trackingId=trackId)
-    print(creator.rg_create())
+    _print_results(
+        subscriptions,
+        _subscriptions(subscriptions, fleet=False),
+        lambda subscription: ResourceGroupCreator(
+            location=location, rg_name=rg_name, trackingId=trackId, subscription_id=subscription
+        ).rg_create(),
+    )
 
 
 @cli.command()
 @click.argument("rg_name")
 @click.argument("location")
 @click.argument("vnet_name")
-def check_vnet(rg_name, location, vnet_name):
+@subscription_option
+def check_vnet(rg_name, location, vnet_name, subscriptions):
     """Check if a virtual network exists."""
     trackId = TrackingIdGenerator().trackingId()
-    checker = VnetChecker(location=location, rg_name=rg_name, vnet_name=vnet_name, trackingId=trackId)
-    print(checker.vnet_check())
+    _print_results(
+        subscriptions,
+        _subscriptions(subscriptions, fleet=False),
+        lambda subscription: VnetChecker(
+            location=location, rg_name=rg_name, vnet_name=vnet_name, trackingId=trackId, subscription_id=subscription
+        ).vnet_check(),
+    )
 
 
 @cli.command()
 @click.argument("rg_name")
 @click.argument("location")
 @click.argument("vnet_name")
-def create_vnet(rg_name, location, vnet_name):
+@click.option("--address-prefix", default=None, help="Address prefix to use instead of allocating one.")
+@click.option(
+    "--prefix-length", default=VNET_PREFIX_LENGTH, show_default=True, help="Size of the allocated address prefix."
+)
+@subscription_option
+def create_vnet(rg_name, location, vnet_name, address_prefix, prefix_length, subscriptions):
     """Create a virtual network."""
     trackId = TrackingIdGenerator().trackingId()
-    creator = VirtualNetworkCreator(rg_name=rg_name, location=location, vnet_name=vnet_name, trackingId=trackId)
-    print(creator.vnet_create())
+    _print_results(
+        subscriptions,
+        _subscriptions(subscriptions, fleet=False),
+        lambda subscription: VirtualNetworkCreator(
+            rg_name=rg_name,
+            location=location,
+            vnet_name=vnet_name,
+            trackingId=trackId,
+            address_prefix=address_prefix,
+            prefix_length=prefix_length,
+            subscription_id=subscription,
+        ).vnet_create(),
+    )
+
+
+@cli.command()
+@click.argument("rg_name")
+@click.argument("location")
+@click.argument("vnet_name")
+@click.argument("subnets", nargs=-1, required=True)
+@click.option("--address-prefix", default=None, help="Address prefix to use if the virtual network does not exist.")
+@click.option(
+    "--prefix-length", default=VNET_PREFIX_LENGTH, show_default=True, help="Size of the allocated address prefix."
+)
+@subscription_option
+def create_subnets(rg_name, location, vnet_name, subnets, address_prefix, prefix_length, subscriptions):
+    """Carve subnets (name:length or length, e.g. web:24 app:26 27) in one virtual network PUT."""
+    trackId = TrackingIdGenerator().trackingId()
+    values, subscriptions = subscriptions, _subscriptions(subscriptions, fleet=False)
+    try:
+        creators = {
+            subscription: VirtualNetworkCreator(
+                rg_name=rg_name,
+                location=location,
+                vnet_name=vnet_name,
+                trackingId=trackId,
+                address_prefix=address_prefix,
+                prefix_length=prefix_length,
+                subnets=list(subnets),
+                subscription_id=subscription,
+            )
+            for subscription in subscriptions
+        }
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="SUBNETS")
+    _print_results(values, subscriptions, lambda subscription: creators[subscription].vnet_create())
+
+
+@cli.command()
+@click.option("--top", type=int, default=None, help="Page size requested from ARM.")
+@click.option(
+    "--filter", "odata_filter", default=None, help="ARM $filter, e.g. \"tagName eq 'env' and tagValue eq 'dev'\"."
+)
+@subscription_option
+def list_rgs(top, odata_filter, subscriptions):
+    """Stream every resource group as one JSON line each."""
+    trackId = TrackingIdGenerator().trackingId()
+    stream = merge_streams(
+        _subscriptions(subscriptions, fleet=True),
+        lambda subscription: ResourceGroupLister(
+            trackingId=trackId, top=top, filter=odata_filter, subscription_id=subscription
+        ).rg_list(),
+    )
+    for rg in stream:
+        print(json.dumps(rg), flush=True)
+
+
+@cli.command()
+@click.option("--rg", "rg_name", default=None, help="Only list virtual networks in this resource group.")
+@click.option("--top", type=int, default=None, help="Page size requested from ARM.")
+@click.option("--filter", "odata_filter", default=None, help="ARM $filter passed through to the list call.")
+@subscription_option
+def list_vnets(rg_name, top, odata_filter, subscriptions):
+    """Stream every virtual network as one JSON line each."""
+    trackId = TrackingIdGenerator().trackingId()
+    stream = merge_streams(
+        _subscriptions(subscriptions, fleet=True),
+        lambda subscription: VnetLister(
+            trackingId=trackId, rg_name=rg_name, top=top, filter=odata_filter, subscription_id=subscription
+        ).vnet_list(),
+    )
+    for vnet in stream:
+        print(json.dumps(vnet), flush=True)
+
+
+@cli.command()
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@click.option("--parallelism", default=8, show_default=True, help="Maximum resources created at the same time.")
+def apply(manifest, parallelism):
+    """Create every resource group and virtual network in a YAML/JSON manifest."""
+    trackId = TrackingIdGenerator().trackingId()
+    try:
+        spec = load_manifest(manifest)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="MANIFEST")
+    applier = BulkApplier(manifest=spec, trackingId=trackId, parallelism=parallelism)
+    failed = 0
+    # One JSON document per line, printed as each resource finishes
+    for result in applier.apply():
+        failed += result["status"] != "succeeded"
+        print(json.dumps(result, default=json_default), flush=True)
+    if failed:
+        raise SystemExit(1)
+
+
+@cli.command()
+@click.argument("manifest", type=click.Path(exists=True, dir_okay=False))
+@click.option("--parallelism", default=8, show_default=True, help="Maximum resources looked up at the same time.")
+def plan(manifest, parallelism):
+    """Show what apply would create, update or leave alone, without writing anything."""
+    trackId = TrackingIdGenerator().trackingId()
+    try:
+        spec = load_manifest(manifest)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint="MANIFEST")
+    applier = BulkApplier(manifest=spec, trackingId=trackId, parallelism=parallelism)
+    for result in applier.plan():
+        print(json.dumps(result, default=json_default), flush=True)
+
+
+@cli.command()
+@click.option("--rg", "rg_names", multiple=True, help="Resource group to delete with everything in it (repeatable).")
+@click.option("--vnet", "vnet_ids", multiple=True, help="Virtual network to delete, as RG_NAME/VNET_NAME (repeatable).")
+@click.option("--selector", default=None, help="Also delete resource groups and VNets tagged e.g. env=dev,ephemeral.")
+@click.option(
+    "--manifest",
+    type=click.Path(exists=True, dir_okay=False),
+    default=None,
+    help="Also delete every resource group and VNet in this manifest.",
+)
+@click.option("--parallelism", default=8, show_default=True, help="Maximum resources deleted at the same time.")
+@click.option("--dry-run", is_flag=True, help="Only print what would be deleted.")
+@click.option("--yes", is_flag=True, help="Do not ask for confirmation.")
+@subscription_option
+def destroy(rg_names, vnet_ids, selector, manifest, parallelism, dry_run, yes, subscriptions):
+    """Delete resource groups and virtual networks concurrently, waiting until every delete is confirmed."""
+    trackId = TrackingIdGenerator().trackingId()
+    rg_names = list(rg_names)
+    vnets = []
+    for vnet_id in vnet_ids:
+        rg_name, _, vnet_name = vnet_id.partition("/")
+        if not rg_name or not vnet_name:
+            raise click.BadParameter(f"{vnet_id} is not RG_NAME/VNET_NAME", param_hint="--vnet")
+        vnets.append({"resourceGroup": rg_name, "name": vnet_name})
+    try:
+        if manifest:
+            spec = load_manifest(manifest)
+            rg_names += spec["resourceGroups"]
+            vnets += spec["virtualNetworks"]
+        destroyer = BulkDestroyer(
+            trackingId=trackId,
+            resource_groups=rg_names,
+            virtual_networks=vnets,
+            selector=selector,
+            parallelism=parallelism,
+            subscriptions=_subscriptions(subscriptions, fleet=False),
+        )
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    try:
+        targets = list(destroyer.plan())
+    except Exception as e:
+        raise click.ClickException(f"Could not list the resources to delete: {e}")
+    if dry_run or not targets:
+        for target in targets:
+            print(json.dumps(target), flush=True)
+        return
+    if not yes:
+        for target in targets:
+            click.echo(
+                f"  {target['kind']} {target['subscriptionId']}/{target['resourceGroup']}/{target['name']}", err=True
+            )
+        click.confirm(f"Delete these {len(targets)} resources?", abort=True, err=True)
+    failed = 0
+    # One JSON document per line, printed as each delete is confirmed
+    for result in destroyer.destroy():
+        failed += result["status"] != "succeeded"
+        print(json.dumps(result, default=json_default), flush=True)
+    if failed:
+        raise SystemExit(1)
+
+
+@cli.command()
+@click.option("--tracking-id", default=None, help="Records of this trackingId.")
+@click.option("--correlation-id", default=None, help="Records of this ARM correlationId.")
+@click.option("--resource", default=None, help="Records about this resource group or virtual network name.")
+@click.option("--expand", is_flag=True, help="Also print every record of the trackingIds that matched.")
+@click.option("--reindex", is_flag=True, help="Rebuild the log index from the log files first.")
+def logs(tracking_id, correlation_id, resource, expand, reindex):
+    """Print the log records of an operation, oldest first, found through the sidecar log index."""
+    index = get_log_index()
+    if reindex:
+        click.echo(f"Indexed {index.reindex()} log records", err=True)
+        if not (tracking_id or correlation_id or resource):
+            return
+    try:
+        records = index.lookup(trackingId=tracking_id, correlationId=correlation_id, resource=resource, expand=expand)
+    except ValueError as e:
+        raise click.UsageError(str(e))
+    for record in records:
+        print(json.dumps(record, default=json_default), flush=True)
+
+
+@cli.group()
+def daemon():
+    """Keep a warm process serving the commands above, which then skip start-up and sign-in."""
+
+
+@daemon.command("start")
+@click.option("--foreground", is_flag=True, help="Serve from this process instead of a detached one.")
+@click.option("--socket", "socket_path", default=DAEMON_SOCKET, show_default=True, help="Unix socket to listen on.")
+def daemon_start(foreground, socket_path):
+    """Start the daemon, commands are forwarded to it while it runs."""
+    from autocli.cli.daemon import CliDaemon, start_background
+
+    status = control("status", socket_path)
+    if status is not None:
+        click.echo(f"Daemon {status['pid']} is already listening on {socket_path}", err=True)
+        return
+    if foreground:
+        try:
+            CliDaemon(cli, path=socket_path).serve()
+        except (OSError, RuntimeError) as e:
+            raise click.ClickException(str(e))
+        return
+    status = start_background(socket_path)
+    if status is None:
+        raise click.ClickException(f"The daemon did not start listening on {socket_path}")
+    print(json.dumps(status, indent=4))
+
+
+@daemon.command("stop")
+@click.option("--socket", "socket_path", default=DAEMON_SOCKET, show_default=True, help="Unix socket of the daemon.")
+def daemon_stop(socket_path):
+    """Stop the daemon once the commands it is serving finish."""
+    status = control("stop", socket_path)
+    if status is None:
+        raise click.ClickException(f"No daemon is listening on {socket_path}")
+    print(json.dumps(status, indent=4))
+
+
+@daemon.command("status")
+@click.option("--socket", "socket_path", default=DAEMON_SOCKET, show_default=True, help="Unix socket of the daemon.")
+def daemon_status(socket_path):
+    """Print the daemon's pid, uptime and number of commands served."""
+    status = control("status", socket_path)
+    if status is None:
+        raise click.ClickException(f"No daemon is listening on {socket_path}")
+    print(json.dumps(status, indent=4))
 
 
 if __name__ == "__main__":
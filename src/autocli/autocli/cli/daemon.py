@@ -0,0 +1,301 @@
+import array
+import contextvars
+import json
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from autocli.core.lib.CONSTANTS import DAEMON_IDLE_TIMEOUT, DAEMON_SOCKET, DEV_AZURE_SUBSCRIPTION
+from autocli.core.lib.log_util import logClient
+from autocli.cli.daemon_client import control, env_fingerprint
+
+# Commands served at the same time; worker threads are reused so their SQLite connections stay open
+_WORKERS = 16
+_MAX_HEADER = 1024 * 1024
+
+# The client streams of the command being served. A context variable: fan_out, merge_streams and DagExecutor run
+# their tasks in a copy of the caller's context, so worker threads write to the same client
+_routing = contextvars.ContextVar("autocli_daemon_routing", default=None)
+
+
+class _ClientGone(BaseException):
+    # Raised into a command whose client disconnected (Ctrl-C), not an Exception so core retries do not swallow it
+    pass
+
+
+class _Routing:
+    def __init__(self, streams: dict, gone: threading.Event):
+        self.streams = streams
+        self.gone = gone
+        # Cleared once the command returns: a worker that outlives it must not write to descriptors since closed
+        self.active = True
+
+
+def _route_stream_handlers(original, router):
+    # Handlers bound at import (AUTOCLI_DEBUG=1) hold the daemon's own stderr, send them through the router instead
+    for logger in [logging.getLogger()] + list(logging.Logger.manager.loggerDict.values()):
+        for handler in getattr(logger, "handlers", []):
+            if isinstance(handler, logging.StreamHandler) and handler.stream is original:
+                handler.setStream(router)
+
+
+class _StreamRouter:
+    """
+    Stand-in for sys.stdin, sys.stdout and sys.stderr that sends each command's I/O to the standard streams its
+    client passed over. Threads that are not serving a command, or one that has returned, use the daemon's own streams.
+    """
+
+    # click keeps one wrapper per stream object, a text stream with a real encoding is used as is
+    encoding = "utf-8"
+    errors = "replace"
+
+    def __init__(self, name: str, default):
+        self.name = name
+        self.default = default
+
+    def _target(self):
+        routing = _routing.get()
+        return routing.streams[self.name] if routing is not None and routing.active else self.default
+
+    def write(self, text):
+        routing = _routing.get()
+        if routing is not None and routing.active and routing.gone.is_set():
+            raise _ClientGone()
+        return self._target().write(text)
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+
+class CliDaemon:
+    """
+    Long-lived process serving CLI commands over a Unix socket, so imports, ARM tokens, connection pools and
+    inventory caches stay warm between runs. cli.py forwards its argv with its stdin, stdout and stderr and exits
+    with the status sent back; anything the daemon declines runs in-process instead.
+    """
+
+    def __init__(self, command, path: str = DAEMON_SOCKET, idle_timeout: float = DAEMON_IDLE_TIMEOUT):
+        self.command = command
+        self.path = path
+        self.idle_timeout = idle_timeout
+        # Commands only run here under the environment and, for relative paths, the directory the daemon started in
+        self.fingerprint = env_fingerprint()
+        self.cwd = os.getcwd()
+        self.started = time.time()
+        self.served = 0
+        self.active = 0
+        self.last_used = time.monotonic()
+        self.logger = logClient("autocliDaemon")
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "socket": self.path,
+                "uptime": round(time.time() - self.started, 1),
+                "served": self.served,
+                "active": self.active,
+            }
+
+    def serve(self):
+        """
+        Listen until stopped, sent SIGTERM or idle for idle_timeout seconds.
+        """
+        if control("status", self.path) is not None:
+            raise RuntimeError(f"A daemon is already listening on {self.path}")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        if os.path.exists(self.path):
+            # Left behind by a daemon that did not shut down
+            os.unlink(self.path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only this user may connect: whoever does runs commands with the daemon's credentials
+        umask = os.umask(0o177)
+        try:
+            listener.bind(self.path)
+        finally:
+            os.umask(umask)
+        listener.listen(64)
+        listener.settimeout(1)
+        stderr = sys.stderr
+        sys.stdin = _StreamRouter("stdin", sys.stdin)
+        sys.stdout = _StreamRouter("stdout", sys.stdout)
+        sys.stderr = _StreamRouter("stderr", stderr)
+        _route_stream_handlers(stderr, sys.stderr)
+        signal.signal(signal.SIGTERM, lambda signum, frame: self._stopping.set())
+        threading.Thread(target=self._warm_up, name="autocli-daemon-warmup", daemon=True).start()
+        self.logger.info(f"Daemon {os.getpid()} listening on {self.path}")
+        pool = ThreadPoolExecutor(max_workers=_WORKERS, thread_name_prefix="autocli-daemon")
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn, _ = listener.accept()
+                except socket.timeout:
+                    with self._lock:
+                        idle = not self.active and time.monotonic() - self.last_used
+                    if self.idle_timeout and idle and idle > self.idle_timeout:
+                        self.logger.info(f"Daemon {os.getpid()} idle for {int(idle)}s, exiting")
+                        break
+                    continue
+                conn.settimeout(None)
+                pool.submit(self._handle, conn)
+        finally:
+            listener.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            pool.shutdown(wait=True)
+            self.logger.info(f"Daemon {os.getpid()} stopped after {self.served} commands")
+
+    def _warm_up(self):
+        # The first forwarded command should not pay for the token or the connection pool either
+        try:
+            from autocli.core.lib.http_util import get_transport
+            from autocli.core.lib.token_util import get_token_cache
+
+            get_token_cache().get_token()
+            get_transport(DEV_AZURE_SUBSCRIPTION)
+        except Exception as e:
+            self.logger.warning(f"Daemon warm-up failed, the first command will sign in: {e}")
+
+    def _handle(self, conn: socket.socket):
+        fds = []
+        try:
+            request, fds = self._receive(conn)
+            if "control" in request:
+                conn.sendall(json.dumps(self._control(request["control"])).encode() + b"\n")
+                return
+            reason = self._decline(request, fds)
+            if reason:
+                self.logger.info(f"Declined {request.get('argv')}: {reason}")
+                conn.sendall(json.dumps({"accepted": False, "reason": reason}).encode() + b"\n")
+                return
+            conn.sendall(b'{"accepted": true}\n')
+            code = self._run(request["argv"], fds, conn)
+            conn.sendall(json.dumps({"exit": code}).encode() + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client was interrupted before its exit status could be sent
+            pass
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Daemon connection failed: {e}")
+        finally:
+            for fd in fds:
+                os.close(fd)
+            conn.close()
+
+    @staticmethod
+    def _receive(conn: socket.socket):
+        """
+        Read the request line and the file descriptors sent along with it.
+        """
+        data, ancdata, _, _ = conn.recvmsg(65536, socket.CMSG_LEN(3 * array.array("i").itemsize))
+        fds = array.array("i")
+        for level, kind, payload in ancdata:
+            if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+                fds.frombytes(payload[: len(payload) - len(payload) % fds.itemsize])
+        while not data.endswith(b"\n"):
+            chunk = conn.recv(65536)
+            if not chunk or len(data) > _MAX_HEADER:
+                raise ValueError("Incomplete daemon request")
+            data += chunk
+        return json.loads(data), list(fds)
+
+    def _control(self, command: str) -> dict:
+        if command == "stop":
+            self._stopping.set()
+            return dict(self.status(), stopping=True)
+        if command == "status":
+            return self.status()
+        return {"error": f"Unknown control command {command}"}
+
+    def _decline(self, request: dict, fds: list):
+        if len(fds) != 3:
+            return "the standard streams were not passed"
+        if request.get("env") != self.fingerprint:
+            return "AZURE_* or AUTOCLI_* settings differ from the daemon's"
+        if request.get("relativePaths") and request.get("cwd") != self.cwd:
+            return "relative paths given from another directory"
+        if not isinstance(request.get("argv"), list):
+            return "no command given"
+        return None
+
+    def _run(self, argv: list, fds: list, conn: socket.socket) -> int:
+        streams = {
+            "stdin": os.fdopen(fds[0], "r", encoding="utf-8", errors="replace", closefd=False),
+            "stdout": os.fdopen(fds[1], "w", encoding="utf-8", errors="replace", buffering=1, closefd=False),
+            "stderr": os.fdopen(fds[2], "w", encoding="utf-8", errors="replace", buffering=1, closefd=False),
+        }
+        gone = threading.Event()
+        # The client sends nothing after its request, end of stream means it went away
+        threading.Thread(target=self._watch_client, args=(conn, gone), daemon=True).start()
+        with self._lock:
+            self.active += 1
+        routing = _Routing(streams, gone)
+        token = _routing.set(routing)
+        began = time.monotonic()
+        try:
+            self.command.main(args=argv, prog_name="cli.py", standalone_mode=True)
+            code = 0
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except _ClientGone:
+            code = 130
+        except Exception:
+            traceback.print_exc()
+            code = 1
+        finally:
+            routing.active = False
+            _routing.reset(token)
+            for stream in streams.values():
+                try:
+                    stream.flush()
+                except (OSError, ValueError):
+                    pass
+            with self._lock:
+                self.active -= 1
+                self.served += 1
+                self.last_used = time.monotonic()
+        self.logger.info(f"Served {argv} exit {code} in {time.monotonic() - began:.3f}s")
+        return code
+
+    @staticmethod
+    def _watch_client(conn: socket.socket, gone: threading.Event):
+        try:
+            conn.recv(1)
+        except OSError:
+            pass
+        gone.set()
+
+
+def start_background(path: str = DAEMON_SOCKET, wait: float = 15):
+    """
+    Start the daemon as a detached process and return its status once it listens, None if it did not come up.
+    """
+    import subprocess
+
+    env = dict(os.environ)
+    # The daemon imports autocli the same way this process did
+    env["PYTHONPATH"] = os.pathsep.join(entry for entry in sys.path if entry)
+    cli_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cli.py")
+    with open(os.devnull, "r+b") as devnull:
+        subprocess.Popen(
+            [sys.executable, cli_path, "daemon", "start", "--foreground", "--socket", path],
+            stdin=devnull,
+            stdout=devnull,
+            stderr=devnull,
+            start_new_session=True,
+            env=env,
+        )
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        status = control("status", path)
+        if status is not None:
+            return status
+        time.sleep(0.1)
+    return None
@@ -0,0 +1,128 @@
+import array
+import hashlib
+import json
+import os
+import socket
+import sys
+
+from autocli.core.lib.CONSTANTS import DAEMON_ENABLED, DAEMON_SOCKET
+
+# Kept to the standard library: this module runs before cli.py imports anything heavy
+
+# Commands that manage the daemon, and options that change the process they run in, always run in-process
+LOCAL_COMMANDS = ("daemon",)
+LOCAL_OPTIONS = ("--debug",)
+
+
+def supported() -> bool:
+    # Standard streams are handed over as file descriptors on a Unix socket
+    return hasattr(socket, "AF_UNIX") and hasattr(socket, "SCM_RIGHTS")
+
+
+def env_fingerprint() -> str:
+    """
+    Hash of the AZURE_* and AUTOCLI_* settings. The daemon read its configuration once at start,
+    a command run with different settings is not served by it.
+    """
+    settings = sorted(
+        (key, value)
+        for key, value in os.environ.items()
+        if key.startswith(("AZURE_", "AUTOCLI_")) and not key.startswith("AUTOCLI_DAEMON")
+    )
+    return hashlib.sha256(json.dumps(settings).encode()).hexdigest()
+
+
+def has_relative_paths(argv: list) -> bool:
+    # Relative file arguments, such as manifests, only resolve from the caller's directory
+    for arg in argv:
+        value = arg.split("=", 1)[1] if arg.startswith("--") and "=" in arg else arg
+        if value and not os.path.isabs(value) and os.path.exists(value):
+            return True
+    return False
+
+
+def _forwardable(argv: list) -> bool:
+    if not argv or argv[0] in LOCAL_COMMANDS or any(arg in LOCAL_OPTIONS for arg in argv):
+        return False
+    # The confirmation prompt of destroy needs this process's terminal
+    if argv[0] == "destroy" and not ("--yes" in argv or "--dry-run" in argv):
+        return False
+    return True
+
+
+def _connect(path: str) -> socket.socket:
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+    except OSError:
+        conn.close()
+        raise
+    return conn
+
+
+def control(command: str, path: str = DAEMON_SOCKET, timeout: float = 5):
+    """
+    Send a control command ("status" or "stop") to the daemon and return its reply, None when none is listening.
+    """
+    if not supported() or not os.path.exists(path):
+        return None
+    try:
+        conn = _connect(path)
+    except OSError:
+        return None
+    try:
+        conn.settimeout(timeout)
+        conn.sendall(json.dumps({"control": command}).encode() + b"\n")
+        return json.loads(conn.makefile("rb").readline() or b"null")
+    except (OSError, ValueError):
+        return None
+    finally:
+        conn.close()
+
+
+def forward(argv: list, path: str = DAEMON_SOCKET):
+    """
+    Run the command in the warm daemon when one is listening and exit with its status.
+    Returns without having done anything when there is no daemon or it declines the command,
+    the caller then runs it in-process.
+    """
+    if not DAEMON_ENABLED or not supported() or not _forwardable(argv) or not os.path.exists(path):
+        return
+    try:
+        conn = _connect(path)
+    except OSError:
+        # A socket left behind by a daemon that is gone
+        return
+    request = {
+        "argv": argv,
+        "cwd": os.getcwd(),
+        "relativePaths": has_relative_paths(argv),
+        "env": env_fingerprint(),
+    }
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        # The daemon reads and writes this process's stdin, stdout and stderr directly
+        fds = array.array("i", [sys.stdin.fileno(), sys.stdout.fileno(), sys.stderr.fileno()])
+        conn.sendmsg([json.dumps(request).encode() + b"\n"], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, fds)])
+        replies = conn.makefile("rb")
+        reply = json.loads(replies.readline() or b"{}")
+    except (OSError, ValueError, AttributeError):
+        conn.close()
+        return
+    if not reply.get("accepted"):
+        conn.close()
+        return
+    try:
+        status = json.loads(replies.readline() or b"{}")
+    except KeyboardInterrupt:
+        # Closing the connection makes the daemon abandon the command at its next output
+        conn.close()
+        sys.exit(130)
+    except (OSError, ValueError):
+        status = {}
+    conn.close()
+    if "exit" not in status:
+        sys.stderr.write("autocli: the daemon stopped before the command finished\n")
+        sys.exit(1)
+    sys.exit(status["exit"])
@@ -0,0 +1,117 @@
+from ..lib.dag_util import DagExecutor
+from ..lib.drift_util import UNKNOWN
+from ..lib.log_util import logClient
+from ..lib.results import Result
+from ..rg.az_rg_create import ResourceGroupCreator
+from ..network.vnets.az_vnet_create import VirtualNetworkCreator
+
+
+def _subscription_key(spec: dict) -> str:
+    return (spec.get("subscription") or "").lower()
+
+
+class BulkApplier:
+    """
+    Class to create every Resource Group and Virtual Network of a manifest, concurrently and in dependency order.
+    """
+
+    def __init__(self, manifest: dict, trackingId: str, parallelism: int = 8):
+        self.manifest = manifest
+        self.trackingId = str(trackingId)
+        self.parallelism = parallelism
+        self.logger = logClient("azureBulkApply", trackingId=trackingId)
+
+    def _graph(self):
+        """
+        Return (specs, dependencies): each VNet depends on its Resource Group when that RG is in the manifest.
+        Nodes carry the subscription, so same-named resources in different subscriptions are independent.
+        """
+        specs = {}
+        dependencies = {}
+        for rg in self.manifest.get("resourceGroups", []):
+            specs[("resourceGroup", _subscription_key(rg), rg["name"].lower())] = rg
+        for vnet in self.manifest.get("virtualNetworks", []):
+            node = ("virtualNetwork", _subscription_key(vnet), vnet["resourceGroup"].lower(), vnet["name"].lower())
+            specs[node] = vnet
+            rg_node = ("resourceGroup", _subscription_key(vnet), vnet["resourceGroup"].lower())
+            if rg_node in specs:
+                dependencies[node] = {rg_node}
+        return specs, dependencies
+
+    def _creator(self, node, spec: dict):
+        if node[0] == "resourceGroup":
+            return ResourceGroupCreator(
+                rg_name=spec["name"],
+                location=spec["location"],
+                trackingId=self.trackingId,
+                subscription_id=spec.get("subscription"),
+            )
+        return VirtualNetworkCreator(
+            rg_name=spec["resourceGroup"],
+            location=spec["location"],
+            vnet_name=spec["name"],
+            trackingId=self.trackingId,
+            address_prefix=spec["addressPrefix"],
+            prefix_length=spec["prefixLength"],
+            subnets=spec["subnets"],
+            subscription_id=spec.get("subscription"),
+        )
+
+    def apply(self):
+        """
+        Yield one record per resource as it finishes, "result" holds the creator's Result object.
+        Resources already in the desired state are only read, the creators skip their PUT.
+        """
+        specs, dependencies = self._graph()
+        self.logger.info(
+            f"Applying manifest with {len(specs)} resources, parallelism {self.parallelism} | trackingId {self.trackingId}"
+        )
+
+        def task(node):
+            creator = self._creator(node, specs[node])
+            return creator.rg_create() if node[0] == "resourceGroup" else creator.vnet_create()
+
+        return self._run(specs, dependencies, task, self._succeeded)
+
+    def plan(self):
+        """
+        Yield one record per resource with a PlanResult: create, update, noop or conflict. Only reads,
+        so every resource is looked up at once instead of in dependency order.
+        """
+        specs, _ = self._graph()
+        self.logger.info(
+            f"Planning manifest with {len(specs)} resources, parallelism {self.parallelism} | trackingId {self.trackingId}"
+        )
+
+        def task(node):
+            creator = self._creator(node, specs[node])
+            return creator.rg_plan() if node[0] == "resourceGroup" else creator.vnet_plan()
+
+        return self._run(specs, {}, task, self._planned)
+
+    def _run(self, specs: dict, dependencies: dict, task, succeeded):
+        executor = DagExecutor(parallelism=self.parallelism)
+        for node, outcome, result in executor.run(specs, dependencies, task, succeeded):
+            spec = specs[node]
+            yield {
+                "kind": node[0],
+                "name": spec["name"],
+                "resourceGroup": spec.get("resourceGroup", spec["name"]),
+                "subscriptionId": spec.get("subscription"),
+                "status": outcome,
+                "result": self._as_result(result),
+                "trackingId": self.trackingId,
+            }
+
+    @staticmethod
+    def _as_result(result):
+        # Failed and skipped nodes carry the exception text or skip reason instead of a Result
+        if isinstance(result, Result):
+            return result
+        return {"message": result}
+
+    def _succeeded(self, result) -> bool:
+        return getattr(result, "isProvisioned", None) == "Yes"
+
+    def _planned(self, result) -> bool:
+        return getattr(result, "action", UNKNOWN) != UNKNOWN
@@ -0,0 +1,167 @@
+from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION
+from ..lib.azure_clients import AzureClients
+from ..lib.dag_util import DagExecutor
+from ..lib.fanout_util import merge_streams
+from ..lib.log_util import logClient
+from ..lib.results import Result
+from ..rg.az_rg_delete import ResourceGroupDeleter
+from ..network.vnets.az_vnet_delete import VirtualNetworkDeleter
+from ..network.vnets.az_vnet_lister import resource_group_of
+
+
+def parse_selector(selector: str) -> list:
+    """
+    Parse a tag selector "env=dev,owner=team-net,ephemeral" into [(key, value)]; a bare key matches any value.
+    """
+    terms = []
+    for term in (selector or "").split(","):
+        term = term.strip()
+        if not term:
+            continue
+        key, _, value = term.partition("=")
+        if not key.strip():
+            raise ValueError(f"Selector term {term!r} has no tag name")
+        terms.append((key.strip(), value.strip() if "=" in term else None))
+    if not terms:
+        raise ValueError("Selector must name at least one tag, e.g. env=dev")
+    return terms
+
+
+def selector_matches(terms: list, tags: dict) -> bool:
+    # Azure tag names are case-insensitive, values are not
+    lowered = {key.lower(): value for key, value in (tags or {}).items()}
+    return all(key.lower() in lowered and (value is None or lowered[key.lower()] == value) for key, value in terms)
+
+
+class BulkDestroyer:
+    """
+    Class to delete Resource Groups and Virtual Networks, named or picked by tag selector, concurrently.
+    A Resource Group is deleted after the selected Virtual Networks inside it, so their IPAM leases are released first.
+    Named resources without their own "subscription" and the selector apply to every subscription given.
+    """
+
+    def __init__(
+        self,
+        trackingId: str,
+        resource_groups: list = None,
+        virtual_networks: list = None,
+        selector: str = None,
+        parallelism: int = 8,
+        subscriptions: list = None,
+    ):
+        self.trackingId = str(trackingId)
+        # Names, or {"name", "subscription"} like manifest resourceGroups
+        self.resource_groups = list(resource_groups or [])
+        # [{"resourceGroup", "name"}], the same shape as manifest virtualNetworks
+        self.virtual_networks = list(virtual_networks or [])
+        self.selector = parse_selector(selector) if selector is not None else None
+        self.parallelism = parallelism
+        self.subscriptions = list(subscriptions or [DEV_AZURE_SUBSCRIPTION])
+        self.logger = logClient("azureBulkDestroy", trackingId=trackingId)
+        self._targets = None
+        if not (self.resource_groups or self.virtual_networks or self.selector):
+            raise ValueError("Nothing to destroy: give resource groups, virtual networks or a selector")
+
+    def targets(self):
+        """
+        Return (specs, dependencies) for every resource to delete, listing each subscription once for a selector.
+        Each Resource Group depends on the selected Virtual Networks it contains.
+        """
+        if self._targets is not None:
+            return self._targets
+        specs = {}
+        for rg in self.resource_groups:
+            if isinstance(rg, str):
+                rg = {"name": rg}
+            for subscription in [rg["subscription"]] if rg.get("subscription") else self.subscriptions:
+                self._add(specs, subscription, rg["name"])
+        for vnet in self.virtual_networks:
+            for subscription in [vnet["subscription"]] if vnet.get("subscription") else self.subscriptions:
+                self._add(specs, subscription, vnet["resourceGroup"], vnet["name"])
+        if self.selector:
+            self._select(specs)
+        dependencies = {}
+        for node in specs:
+            if node[0] == "virtualNetwork" and ("resourceGroup", node[1], node[2]) in specs:
+                dependencies.setdefault(("resourceGroup", node[1], node[2]), set()).add(node)
+        self._targets = (specs, dependencies)
+        return self._targets
+
+    @staticmethod
+    def _add(specs: dict, subscription: str, rg_name: str, vnet_name: str = None):
+        spec = {"name": vnet_name or rg_name, "resourceGroup": rg_name, "subscription": subscription}
+        if vnet_name:
+            specs[("virtualNetwork", (subscription or "").lower(), rg_name.lower(), vnet_name.lower())] = spec
+        else:
+            specs[("resourceGroup", (subscription or "").lower(), rg_name.lower())] = spec
+
+    def _select(self, specs: dict):
+        # ARM filters Resource Groups on one tag at most, the rest of the selector is matched here
+        key, value = self.selector[0]
+        rg_filter = f"tagName eq '{key}'" + (f" and tagValue eq '{value}'" if value is not None else "")
+
+        def tagged(subscription):
+            api_client = AzureClients(subscription)
+            for rg in api_client.iter_resource_groups(filter=rg_filter):
+                yield subscription, rg["name"], None, rg.get("tags")
+            for vnet in api_client.iter_vnets():
+                yield subscription, resource_group_of(vnet.get("id", "")), vnet["name"], vnet.get("tags")
+
+        # Every subscription is listed at the same time
+        for subscription, rg_name, vnet_name, tags in merge_streams(self.subscriptions, tagged):
+            if selector_matches(self.selector, tags):
+                self._add(specs, subscription, rg_name, vnet_name)
+
+    def plan(self):
+        """
+        Yield one record per resource that destroy would delete, without deleting anything.
+        """
+        specs, _ = self.targets()
+        for node, spec in specs.items():
+            yield {
+                "kind": node[0],
+                "name": spec["name"],
+                "resourceGroup": spec["resourceGroup"],
+                "subscriptionId": spec["subscription"],
+                "status": "planned",
+                "trackingId": self.trackingId,
+            }
+
+    def destroy(self):
+        """
+        Yield one record per resource once its delete is confirmed (or failed), "result" holds the deleter's Result.
+        Returns after every delete has finished; Resource Groups whose Virtual Networks failed are skipped.
+        """
+        specs, dependencies = self.targets()
+        self.logger.info(
+            f"Destroying {len(specs)} resources in {len(self.subscriptions)} subscriptions, parallelism {self.parallelism} | trackingId {self.trackingId}"
+        )
+
+        def task(node):
+            spec = specs[node]
+            if node[0] == "resourceGroup":
+                return ResourceGroupDeleter(
+                    rg_name=spec["name"], trackingId=self.trackingId, subscription_id=spec["subscription"]
+                ).rg_delete()
+            return VirtualNetworkDeleter(
+                rg_name=spec["resourceGroup"],
+                vnet_name=spec["name"],
+                trackingId=self.trackingId,
+                subscription_id=spec["subscription"],
+            ).vnet_delete()
+
+        executor = DagExecutor(parallelism=self.parallelism)
+        for node, outcome, result in executor.run(specs, dependencies, task, self._succeeded):
+            spec = specs[node]
+            yield {
+                "kind": node[0],
+                "name": spec["name"],
+                "resourceGroup": spec["resourceGroup"],
+                "subscriptionId": spec["subscription"],
+                "status": outcome,
+                "result": result if isinstance(result, Result) else {"message": result},
+                "trackingId": self.trackingId,
+            }
+
+    def _succeeded(self, result) -> bool:
+        return getattr(result, "isDeleted", None) == "Yes"
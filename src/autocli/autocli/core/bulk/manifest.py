@@ -0,0 +1,87 @@
+import json
+import os
+
+import yaml
+
+from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION, VNET_PREFIX_LENGTH
+from ..network.ipam.subnet_layout import parse_subnets
+
+
+def load_manifest(path: str) -> dict:
+    """
+    Load a YAML or JSON manifest of resource groups and virtual networks.
+
+    subscription: 0000-...                # optional, default for every entry (AZURE_SUBSCRIPTION_ID otherwise)
+    resourceGroups:
+      - name: demo.eastus.rg
+        location: eastus
+        subscription: 1111-...            # optional, also used by the VNets below
+        virtualNetworks:
+          - name: demo.eastus.vnet
+            addressPrefix: 10.20.0.0/16   # optional, allocated by IPAM when omitted
+            prefixLength: 20              # optional, size of the allocated prefix (default /16)
+            subnets:                      # optional, carved out of the address space in the same PUT
+              - name: web
+                prefixLength: 24
+              - app:26                    # or "name:length" / a bare length
+    virtualNetworks:                      # optional, for VNets whose RG is managed elsewhere
+      - name: other.vnet
+        resourceGroup: other.rg
+        location: eastus
+
+    Returns {"resourceGroups": [{name, location, subscription}],
+             "virtualNetworks": [{name, resourceGroup, location, addressPrefix, prefixLength, subnets, subscription}]}.
+    """
+    with open(path) as manifest_file:
+        if os.path.splitext(path)[1].lower() in (".yaml", ".yml"):
+            raw = yaml.safe_load(manifest_file) or {}
+        else:
+            raw = json.load(manifest_file)
+    return parse_manifest(raw)
+
+
+def parse_manifest(raw: dict) -> dict:
+    if not isinstance(raw, dict):
+        raise ValueError("Manifest must be a mapping with 'resourceGroups' and/or 'virtualNetworks'")
+    resource_groups = []
+    virtual_networks = []
+    seen = set()
+    default_subscription = raw.get("subscription") or DEV_AZURE_SUBSCRIPTION
+    for rg in raw.get("resourceGroups") or []:
+        rg_name = _required(rg, "name", "resourceGroups entry")
+        location = _required(rg, "location", f"resourceGroup {rg_name}")
+        subscription = rg.get("subscription") or default_subscription
+        resource_groups.append({"name": rg_name, "location": location, "subscription": subscription})
+        for vnet in rg.get("virtualNetworks") or []:
+            virtual_networks.append(_vnet_spec(vnet, rg_name, location, subscription))
+    for vnet in raw.get("virtualNetworks") or []:
+        virtual_networks.append(_vnet_spec(vnet, None, None, default_subscription))
+    for vnet in virtual_networks:
+        key = ((vnet["subscription"] or "").lower(), vnet["resourceGroup"].lower(), vnet["name"].lower())
+        if key in seen:
+            raise ValueError(f"Virtual network {vnet['name']} in {vnet['resourceGroup']} is declared twice")
+        seen.add(key)
+    return {"resourceGroups": resource_groups, "virtualNetworks": virtual_networks}
+
+
+def _vnet_spec(vnet: dict, rg_name: str, location: str, subscription: str) -> dict:
+    vnet_name = _required(vnet, "name", "virtualNetworks entry")
+    rg_name = vnet.get("resourceGroup") or rg_name
+    location = vnet.get("location") or location
+    if not rg_name or not location:
+        raise ValueError(f"Virtual network {vnet_name} needs a resourceGroup and location")
+    return {
+        "name": vnet_name,
+        "resourceGroup": rg_name,
+        "location": location,
+        "addressPrefix": vnet.get("addressPrefix"),
+        "prefixLength": int(vnet.get("prefixLength") or VNET_PREFIX_LENGTH),
+        "subnets": parse_subnets(vnet.get("subnets")),
+        "subscription": vnet.get("subscription") or subscription,
+    }
+
+
+def _required(entry: dict, key: str, what: str) -> str:
+    if not isinstance(entry, dict) or not entry.get(key):
+        raise ValueError(f"Manifest {what} is missing '{key}'")
+    return entry[key]
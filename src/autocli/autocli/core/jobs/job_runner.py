@@ -0,0 +1,168 @@
+import asyncio
+import contextvars
+import functools
+import os
+import socket
+import threading
+import time
+import uuid
+
+from autocli.core.lib.CONSTANTS import JOBS_HEARTBEAT_INTERVAL, JOBS_QUEUE_SIZE, JOBS_STALE_AFTER, JOBS_WORKERS
+from ..lib.log_util import logClient
+from ..lib.metrics_util import span
+from ..rg.az_rg_create import AsyncResourceGroupCreator
+from ..network.vnets.az_vnet_create import AsyncVirtualNetworkCreator
+from .job_store import JobStore
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+async def _create_resource_group(params: dict, trackingId: str):
+    return await AsyncResourceGroupCreator(
+        rg_name=params["rg_name"],
+        location=params["location"],
+        trackingId=trackingId,
+        subscription_id=params.get("subscription_id"),
+    ).rg_create()
+
+
+async def _create_virtual_network(params: dict, trackingId: str):
+    return await AsyncVirtualNetworkCreator(
+        rg_name=params["rg_name"],
+        location=params["location"],
+        vnet_name=params["vnet_name"],
+        trackingId=trackingId,
+        **{
+            key: params[key]
+            for key in ("address_prefix", "prefix_length", "subnets", "subscription_id")
+            if params.get(key) is not None
+        },
+    ).vnet_create()
+
+
+# Job kind -> coroutine function(params, trackingId) returning a core Result
+JOB_KINDS = {
+    "resourceGroup.create": _create_resource_group,
+    "virtualNetwork.create": _create_virtual_network,
+}
+
+
+class JobQueueFull(Exception):
+    """
+    Raised by JobRunner.submit when every worker is busy and the queue is full.
+    """
+
+
+def get_job_runner() -> "JobRunner":
+    """
+    Return the process-wide JobRunner, taking over stale unfinished jobs on first use.
+    The first call must come from the event loop the jobs are to run on (the API's lifespan).
+    """
+    global _runner
+    if _runner is None:
+        with _runner_lock:
+            if _runner is None:
+                _runner = JobRunner(loop=asyncio.get_running_loop())
+                _runner.resume()
+    return _runner
+
+
+class JobRunner:
+    """
+    Runs create jobs as tasks of the async creators on one event loop, at most `workers` at a time, recording every
+    state change in the JobStore. A job waiting on ARM holds no thread, so one API worker drives many creates.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        store: JobStore = None,
+        workers: int = JOBS_WORKERS,
+        queue_size: int = JOBS_QUEUE_SIZE,
+    ):
+        self.store = store or JobStore()
+        self.capacity = workers + queue_size
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.logger = logClient("azureJobs")
+        self._loop = loop
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._slots = None
+        self._workers = workers
+        self._heartbeat = threading.Thread(target=self._beat, name="autocli-job-heartbeat", daemon=True)
+        self._heartbeat.start()
+
+    def submit(self, kind: str, params: dict, trackingId: str) -> str:
+        """
+        Persist a job and queue it on the runner's loop, returning its operation id. Blocking (SQLite), call it
+        from a worker thread.
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        with self._lock:
+            if self._pending >= self.capacity:
+                raise JobQueueFull(f"{self._pending} jobs already queued or running")
+            self._pending += 1
+        try:
+            job_id = self.store.create(kind, params, trackingId, self.owner)
+        except Exception:
+            self._done()
+            raise
+        self.logger.info(f"Queued {kind} job {job_id} | trackingId {trackingId}")
+        self._schedule(job_id, kind, params, trackingId)
+        return job_id
+
+    def resume(self):
+        """
+        Re-queue unfinished jobs left behind by a worker that stopped heartbeating (restart or crash).
+        Creates are idempotent PUTs, so running one again is safe.
+        """
+        for job_id, kind, params, trackingId in self.store.claim_stale(self.owner, JOBS_STALE_AFTER):
+            self.logger.info(f"Resuming {kind} job {job_id} | trackingId {trackingId}")
+            with self._lock:
+                self._pending += 1
+            self._schedule(job_id, kind, params, trackingId)
+
+    def _schedule(self, job_id: str, kind: str, params: dict, trackingId: str):
+        # Thread-safe, submit runs on a worker thread and resume on the heartbeat thread
+        asyncio.run_coroutine_threadsafe(self._run(job_id, kind, params, trackingId), self._loop)
+
+    async def _run(self, job_id: str, kind: str, params: dict, trackingId: str):
+        if self._slots is None:
+            # Created on the loop it guards
+            self._slots = asyncio.Semaphore(self._workers)
+        try:
+            async with self._slots:
+                await self._offload(self.store.start, job_id)
+                with span(f"job.{kind}", trackingId=trackingId):
+                    result = await JOB_KINDS[kind](params, trackingId)
+                status = "succeeded" if getattr(result, "isProvisioned", None) == "Yes" else "failed"
+                await self._offload(self.store.finish, job_id, status, result=result.to_dict())
+                self.logger.info(f"{kind} job {job_id} {status} | trackingId {trackingId}")
+        except Exception as e:
+            self.logger.error(f"{kind} job {job_id} raised: {e} | trackingId {trackingId}")
+            await self._offload(self.store.finish, job_id, "failed", error=str(e))
+        finally:
+            self._done()
+
+    @staticmethod
+    async def _offload(fn, *args, **kwargs):
+        # The JobStore is SQLite, kept off the loop the jobs share
+        return await asyncio.get_running_loop().run_in_executor(
+            None, contextvars.copy_context().run, functools.partial(fn, *args, **kwargs)
+        )
+
+    def _done(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _beat(self):
+        while True:
+            time.sleep(JOBS_HEARTBEAT_INTERVAL)
+            try:
+                self.store.heartbeat(self.owner)
+                # Also picks up jobs of sibling workers that died since this one started
+                self.resume()
+            except Exception as e:
+                self.logger.error(f"Job heartbeat failed: {e}")
@@ -0,0 +1,139 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from autocli.core.lib.CONSTANTS import JOBS_PATH
+
+UNFINISHED = ("queued", "running")
+_COLUMNS = "id, kind, params, trackingId, status, result, error, attempts, created_at, started_at, finished_at"
+
+
+def _timestamp(value):
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, tz=timezone.utc).isoformat()
+
+
+class JobStore:
+    """
+    Persistent SQLite store of asynchronous jobs, shared by every API worker process.
+    Each job records its owner so a restarted or crashed worker's unfinished jobs can be taken over.
+    """
+
+    def __init__(self, path: str = JOBS_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, kind TEXT NOT NULL, params TEXT NOT NULL, trackingId TEXT, "
+                "status TEXT NOT NULL, result TEXT, error TEXT, owner TEXT, attempts INTEGER NOT NULL DEFAULT 0, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_unfinished ON jobs (status, updated_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_tracking ON jobs (trackingId)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def create(self, kind: str, params: dict, trackingId: str, owner: str) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, params, trackingId, status, owner, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, kind, json.dumps(params), trackingId, owner, now, now),
+            )
+        return job_id
+
+    def start(self, job_id: str):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, started_at = ?, updated_at = ? WHERE id = ?",
+                (now, now, job_id),
+            )
+
+    def finish(self, job_id: str, status: str, result: dict = None, error: str = None):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result) if result is not None else None, error, now, now, job_id),
+            )
+
+    def heartbeat(self, owner: str):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET updated_at = ? WHERE owner = ? AND status IN (?, ?)", (time.time(), owner, *UNFINISHED)
+            )
+
+    def claim_stale(self, owner: str, stale_after: float) -> list:
+        """
+        Take over unfinished jobs nobody has heartbeated for stale_after seconds, return them as (id, kind, params, trackingId).
+        """
+        conn = self._connect()
+        now = time.time()
+        claimed = []
+        with conn:
+            rows = conn.execute(
+                "SELECT id, kind, params, trackingId FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (*UNFINISHED, now - stale_after),
+            ).fetchall()
+            for job_id, kind, params, trackingId in rows:
+                # Conditional update so two workers starting together cannot both claim a job
+                cur = conn.execute(
+                    "UPDATE jobs SET status = 'queued', owner = ?, updated_at = ? "
+                    "WHERE id = ? AND status IN (?, ?) AND updated_at < ?",
+                    (owner, now, job_id, *UNFINISHED, now - stale_after),
+                )
+                if cur.rowcount:
+                    claimed.append((job_id, kind, json.loads(params), trackingId))
+        return claimed
+
+    def get(self, job_id: str):
+        """
+        Return the job as the operation document served by the API, or None.
+        """
+        row = self._connect().execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._document(row) if row is not None else None
+
+    def find(self, trackingId: str) -> list:
+        """
+        Return every job submitted under trackingId as operation documents, oldest first.
+        """
+        rows = (
+            self._connect()
+            .execute(f"SELECT {_COLUMNS} FROM jobs WHERE trackingId = ? ORDER BY created_at", (trackingId,))
+            .fetchall()
+        )
+        return [self._document(row) for row in rows]
+
+    @staticmethod
+    def _document(row) -> dict:
+        job_id, kind, params, trackingId, status, result, error, attempts, created_at, started_at, finished_at = row
+        return {
+            "operationId": job_id,
+            "kind": kind,
+            "status": status,
+            "params": json.loads(params),
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "attempts": attempts,
+            "createdAt": _timestamp(created_at),
+            "startedAt": _timestamp(started_at),
+            "finishedAt": _timestamp(finished_at),
+            "trackingId": trackingId,
+        }
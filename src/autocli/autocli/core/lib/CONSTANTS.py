@@ -1,4 +1,107 @@
 import os
 
-log_folder = "/home/nodebrite/Desktop/AzureAutomatioin/src/autocli/autocli/logs"
+# Defaults to the package's logs/ folder
+log_folder = os.getenv(
+    "AUTOCLI_LOG_FOLDER",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "logs"),
+)
 DEV_AZURE_SUBSCRIPTION = os.getenv("AZURE_SUBSCRIPTION_ID")
+# Subscriptions operations fan out to when none are given, comma separated ("*": every subscription the credential sees)
+AZURE_SUBSCRIPTIONS = [
+    s.strip() for s in os.getenv("AUTOCLI_SUBSCRIPTIONS", DEV_AZURE_SUBSCRIPTION or "").split(",") if s.strip()
+]
+# Subscriptions queried at the same time by a fan-out
+FANOUT_PARALLELISM = int(os.getenv("AUTOCLI_FANOUT_PARALLELISM", "8"))
+ARM_SCOPE = "https://management.azure.com/.default"
+# ARM endpoint every request goes to, point it at a stand-in such as autocli.bench.mock_arm for offline runs
+ARM_BASE_URL = os.getenv("AUTOCLI_ARM_BASE_URL", "https://management.azure.com").rstrip("/")
+# Bearer token used as-is instead of DefaultAzureCredential (mock servers, pre-fetched tokens)
+ARM_STATIC_TOKEN = os.getenv("AUTOCLI_ARM_TOKEN")
+# Seconds before expires_on at which a cached ARM token is refreshed in the background
+TOKEN_REFRESH_MARGIN = int(os.getenv("AUTOCLI_TOKEN_REFRESH_MARGIN", "300"))
+# Encrypted on-disk ARM token cache shared by CLI runs and API workers (DPAPI, Keychain or libsecret)
+TOKEN_CACHE_ENABLED = os.getenv("AUTOCLI_TOKEN_CACHE", "1") == "1"
+TOKEN_CACHE_PATH = os.getenv(
+    "AUTOCLI_TOKEN_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".autocli", "token_cache.bin")
+)
+# Fall back to a user-only readable plaintext file where no encryption is available (headless Linux)
+TOKEN_CACHE_ALLOW_UNENCRYPTED = os.getenv("AUTOCLI_TOKEN_CACHE_ALLOW_UNENCRYPTED", "0") == "1"
+# Diagnostics (token cache hits and misses, ...) on stderr, also enabled by the CLI's --debug
+DEBUG_ENABLED = os.getenv("AUTOCLI_DEBUG", "0") == "1"
+# Shared HTTP transport used for every ARM call
+HTTP_POOL_SIZE = int(os.getenv("AUTOCLI_HTTP_POOL_SIZE", "20"))
+HTTP_KEEPALIVE = os.getenv("AUTOCLI_HTTP_KEEPALIVE", "1") == "1"
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("AUTOCLI_HTTP_KEEPALIVE_EXPIRY", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("AUTOCLI_HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("AUTOCLI_HTTP_READ_TIMEOUT", "60"))
+HTTP2_ENABLED = os.getenv("AUTOCLI_HTTP2", "0") == "1"
+# Long-running-operation polling, used when ARM does not send Retry-After
+LRO_TIMEOUT = float(os.getenv("AUTOCLI_LRO_TIMEOUT", "60"))
+LRO_INITIAL_DELAY = float(os.getenv("AUTOCLI_LRO_INITIAL_DELAY", "1"))
+LRO_MAX_DELAY = float(os.getenv("AUTOCLI_LRO_MAX_DELAY", "10"))
+LRO_DELETE_TIMEOUT = float(os.getenv("AUTOCLI_LRO_DELETE_TIMEOUT", "900"))
+# IPAM: comma separated pools VNet prefixes are carved from, and ranges that must never be handed out
+IPAM_POOLS = [p.strip() for p in os.getenv("AUTOCLI_IPAM_POOLS", "10.0.0.0/8").split(",") if p.strip()]
+IPAM_RESERVED = [p.strip() for p in os.getenv("AUTOCLI_IPAM_RESERVED", "").split(",") if p.strip()]
+IPAM_SYNC_INTERVAL = float(os.getenv("AUTOCLI_IPAM_SYNC_INTERVAL", "300"))
+# "global": one address space across AUTOCLI_SUBSCRIPTIONS, synced from all their VNets; "subscription": one each
+IPAM_SCOPE = os.getenv(
+    "AUTOCLI_IPAM_SCOPE", "global" if len(AZURE_SUBSCRIPTIONS) > 1 or "*" in AZURE_SUBSCRIPTIONS else "subscription"
+).lower()
+VNET_PREFIX_LENGTH = int(os.getenv("AUTOCLI_VNET_PREFIX_LENGTH", "16"))
+# Azure keeps 5 addresses of every subnet, /29 is the smallest it accepts
+SUBNET_MAX_PREFIX_LENGTH = 29
+# Prefix lease ledger shared by every process (and host, when on shared storage) creating VNets
+IPAM_LEDGER_ENABLED = os.getenv("AUTOCLI_IPAM_LEDGER", "1") == "1"
+IPAM_LEDGER_PATH = os.getenv("AUTOCLI_IPAM_LEDGER_PATH", os.path.join(os.path.expanduser("~"), ".autocli", "ipam.db"))
+# Seconds an uncommitted lease is held, long enough for the PUT and its LRO
+IPAM_LEASE_TTL = float(os.getenv("AUTOCLI_IPAM_LEASE_TTL", "600"))
+# Local SQLite inventory cache of Resource Groups and VNets, keyed by resource id
+CACHE_ENABLED = os.getenv("AUTOCLI_CACHE", "1") == "1"
+CACHE_PATH = os.getenv("AUTOCLI_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".autocli", "inventory.db"))
+CACHE_TTL = float(os.getenv("AUTOCLI_CACHE_TTL", "60"))
+# ARM throttling: per-category token buckets (requests/second and burst), paced down from x-ms-ratelimit-remaining-*
+THROTTLE_ENABLED = os.getenv("AUTOCLI_THROTTLE", "1") == "1"
+THROTTLE_READ_RATE = float(os.getenv("AUTOCLI_THROTTLE_READ_RATE", "25"))
+THROTTLE_WRITE_RATE = float(os.getenv("AUTOCLI_THROTTLE_WRITE_RATE", "10"))
+THROTTLE_DELETE_RATE = float(os.getenv("AUTOCLI_THROTTLE_DELETE_RATE", "10"))
+THROTTLE_BURST = int(os.getenv("AUTOCLI_THROTTLE_BURST", "50"))
+THROTTLE_LOW_WATERMARK = int(os.getenv("AUTOCLI_THROTTLE_LOW_WATERMARK", "25"))
+THROTTLE_MAX_RETRIES = int(os.getenv("AUTOCLI_THROTTLE_MAX_RETRIES", "5"))
+THROTTLE_MAX_BACKOFF = float(os.getenv("AUTOCLI_THROTTLE_MAX_BACKOFF", "30"))
+# Logging: records are queued and written in batches by one background thread
+LOG_QUEUE_SIZE = int(os.getenv("AUTOCLI_LOG_QUEUE_SIZE", "10000"))
+LOG_BATCH_SIZE = int(os.getenv("AUTOCLI_LOG_BATCH_SIZE", "256"))
+LOG_FLUSH_INTERVAL = float(os.getenv("AUTOCLI_LOG_FLUSH_INTERVAL", "0.5"))
+# Size based rotation unless AUTOCLI_LOG_ROTATE_WHEN is set to a TimedRotatingFileHandler "when" (e.g. midnight, H)
+LOG_MAX_BYTES = int(os.getenv("AUTOCLI_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_ROTATE_WHEN = os.getenv("AUTOCLI_LOG_ROTATE_WHEN", "")
+LOG_BACKUP_COUNT = int(os.getenv("AUTOCLI_LOG_BACKUP_COUNT", "5"))
+# Sidecar index of the JSON logs (trackingId, correlationId, resource -> byte offsets), kept up to date by the writer
+LOG_INDEX_PATH = os.getenv("AUTOCLI_LOG_INDEX_PATH", os.path.join(log_folder, "logindex.db"))
+# Seconds between incremental index updates from the log writer thread, 0 leaves indexing to lookups
+LOG_INDEX_INTERVAL = float(os.getenv("AUTOCLI_LOG_INDEX_INTERVAL", "30"))
+# Asynchronous jobs behind the API's 202 create routes
+JOBS_PATH = os.getenv("AUTOCLI_JOBS_PATH", os.path.join(os.path.expanduser("~"), ".autocli", "jobs.db"))
+# Create jobs in flight at once on the API's event loop, a job waiting on ARM holds no thread
+JOBS_WORKERS = int(os.getenv("AUTOCLI_JOBS_WORKERS", "256"))
+JOBS_QUEUE_SIZE = int(os.getenv("AUTOCLI_JOBS_QUEUE_SIZE", "100"))
+# A queued/running job whose owner has not heartbeated for this long is taken over on the next start
+JOBS_HEARTBEAT_INTERVAL = float(os.getenv("AUTOCLI_JOBS_HEARTBEAT_INTERVAL", "30"))
+JOBS_STALE_AFTER = float(os.getenv("AUTOCLI_JOBS_STALE_AFTER", "120"))
+# Progress streams: one shared ARM poller per watched resource, backing off while nothing changes
+WATCH_INTERVAL = float(os.getenv("AUTOCLI_WATCH_INTERVAL", "2"))
+WATCH_MAX_INTERVAL = float(os.getenv("AUTOCLI_WATCH_MAX_INTERVAL", "15"))
+WATCH_KEEPALIVE = float(os.getenv("AUTOCLI_WATCH_KEEPALIVE", "15"))
+WATCH_TIMEOUT = float(os.getenv("AUTOCLI_WATCH_TIMEOUT", "900"))
+# Warm CLI daemon: cli.py hands commands to it over this Unix socket while it runs (AUTOCLI_DAEMON=0 never does)
+DAEMON_ENABLED = os.getenv("AUTOCLI_DAEMON", "1") == "1"
+DAEMON_SOCKET = os.getenv("AUTOCLI_DAEMON_SOCKET", os.path.join(os.path.expanduser("~"), ".autocli", "daemon.sock"))
+# Seconds without a command after which the daemon exits, 0 keeps it running until stopped
+DAEMON_IDLE_TIMEOUT = float(os.getenv("AUTOCLI_DAEMON_IDLE_TIMEOUT", "3600"))
+# Instrumentation: Prometheus metrics (served at /metrics) and span records, both off unless enabled
+METRICS_ENABLED = os.getenv("AUTOCLI_METRICS", "0") == "1"
+TRACING_ENABLED = os.getenv("AUTOCLI_TRACING", "0") == "1"
+METRICS_BUCKETS = [
+    float(b) for b in os.getenv("AUTOCLI_METRICS_BUCKETS", "0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60").split(",")
+]
@@ -0,0 +1,79 @@
+import asyncio
+import contextvars
+import time
+
+from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION
+from autocli.core.lib.azure_clients import AzureClients
+from autocli.core.lib.http_util import get_async_transport
+from autocli.core.lib.inventory_cache import CachedResponse, resource_key
+from autocli.core.lib.metrics_util import observe_request
+from autocli.core.lib.singleflight_util import async_flights
+
+
+class AsyncAzureClients(AzureClients):
+    """
+    Asyncio Azure Management clients.
+    Exposes the same request methods as AzureClients, each returning an awaitable response
+    (iter_vnets / iter_resource_groups return async generators).
+    """
+
+    def __init__(self, subscription_id: str = None, transport=None):
+        subscription_id = subscription_id or DEV_AZURE_SUBSCRIPTION
+        super().__init__(subscription_id=subscription_id, transport=transport or get_async_transport(subscription_id))
+
+    async def _send(self, method: str, url: str, body: dict = None, headers: dict = None):
+        scheduler = self.scheduler
+        attempt = 0
+        while True:
+            if scheduler is not None:
+                await asyncio.sleep(scheduler.before(method))
+            started = time.perf_counter()
+            token = self.token_cache.cached_token()
+            if token is None:
+                # A credential refresh may spawn a subprocess, keep it off the event loop
+                loop = asyncio.get_running_loop()
+                token = await loop.run_in_executor(None, contextvars.copy_context().run, self.token_cache.get_token)
+            sent = time.perf_counter()
+            request_headers = self._headers(token)
+            if headers:
+                request_headers.update(headers)
+            resp = await self.transport.request(method, url, headers=request_headers, json=body)
+            observe_request(method, url, resp, started, sent)
+            delay = scheduler.after(method, resp, attempt) if scheduler is not None else None
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+            attempt += 1
+        if self.cache is not None and method != "GET":
+            await self._offload(self._invalidate, method, url)
+        return resp
+
+    @staticmethod
+    async def _offload(fn, *args):
+        # The inventory cache is SQLite, waiting on its lock must not stall the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, contextvars.copy_context().run, fn, *args)
+
+    async def _get_resource(self, url: str, revalidate: bool = False):
+        if self.cache is None:
+            return await async_flights.do(("GET", url), lambda: self._send("GET", url))
+        key = resource_key(url)
+        entry = await self._offload(self.cache.get, key)
+        if entry is not None and entry[2] and not revalidate:
+            return CachedResponse(entry[1], entry[0])
+        headers = {"If-None-Match": entry[0]} if entry is not None and entry[0] else None
+
+        async def fetch():
+            return await self._offload(self._remember, key, entry, await self._send("GET", url, headers=headers))
+
+        return await async_flights.do(("GET", url), fetch)
+
+    async def _paginate(self, url: str):
+        while url:
+            resp = await self._send("GET", url)
+            resp.raise_for_status()
+            page = resp.json()
+            if self.cache is not None:
+                await self._offload(self.cache.put_many, page.get("value", []))
+            for item in page.get("value", []):
+                yield item
+            url = page.get("nextLink")
@@ -1,79 +1,208 @@
-import requests
+import time
+from urllib.parse import quote
 
-from azure.identity import DefaultAzureCredential
 from azure.mgmt.network import NetworkManagementClient
 
-from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION
+from autocli.core.lib.CONSTANTS import ARM_BASE_URL, DEV_AZURE_SUBSCRIPTION
+from autocli.core.lib.http_util import get_transport
+from autocli.core.lib.inventory_cache import CachedResponse, get_inventory_cache, resource_key
+from autocli.core.lib.metrics_util import observe_request
+from autocli.core.lib.singleflight_util import flights
+from autocli.core.lib.throttle_util import get_scheduler
+from autocli.core.lib.token_util import get_credential, get_token_cache
 
 
 class AzureClients:
     """
-    Azure Management clients
+    Azure Management clients for one subscription (AZURE_SUBSCRIPTION_ID when not given),
+    with that subscription's connection pool and throttle scheduler.
     """
 
-    def __init__(self):
-        self.subscription = DEV_AZURE_SUBSCRIPTION
-        self.credentials = DefaultAzureCredential()
+    api_version = "2022-09-01"
+    subscriptions_api_version = "2022-12-01"
+
+    def __init__(self, subscription_id: str = None, transport=None):
+        self.subscription = subscription_id or DEV_AZURE_SUBSCRIPTION
+        self.credentials = get_credential()
+        self.token_cache = get_token_cache()
+        self.transport = transport or get_transport(self.subscription)
+        self.cache = get_inventory_cache()
+        self.scheduler = get_scheduler(self.subscription)
 
     def az_network_client(self):
-        credential = DefaultAzureCredential()
+        credential = self.credentials
         subscription = self.subscription
         return NetworkManagementClient(credential, subscription_id=subscription)
 
+    def _headers(self, token) -> dict:
+        return {"Authorization": f"Bearer {token.token}", "Content-Type": "application/json"}
+
+    def _send(self, method: str, url: str, body: dict = None, headers: dict = None):
+        scheduler = self.scheduler
+        attempt = 0
+        while True:
+            if scheduler is not None:
+                time.sleep(scheduler.before(method))
+            started = time.perf_counter()
+            token = self.token_cache.get_token()
+            sent = time.perf_counter()
+            request_headers = self._headers(token)
+            if headers:
+                request_headers.update(headers)
+            resp = self.transport.request(method, url, headers=request_headers, json=body)
+            observe_request(method, url, resp, started, sent)
+            delay = scheduler.after(method, resp, attempt) if scheduler is not None else None
+            if delay is None:
+                break
+            time.sleep(delay)
+            attempt += 1
+        self._invalidate(method, url)
+        return resp
+
+    def _invalidate(self, method: str, url: str):
+        # Any write through AzureClients drops the cached copy, a delete also drops everything beneath it
+        if self.cache is not None and method in ("PUT", "PATCH", "DELETE"):
+            self.cache.invalidate(resource_key(url), children=method == "DELETE")
+
+    def _get_resource(self, url: str, revalidate: bool = False):
+        """
+        GET a single resource through the inventory cache: fresh entries are served locally (unless revalidate),
+        stale ones are revalidated with If-None-Match. Concurrent GETs of the same URL share one request.
+        """
+        if self.cache is None:
+            return flights.do(("GET", url), lambda: self._send("GET", url))
+        key = resource_key(url)
+        entry = self.cache.get(key)
+        if entry is not None and entry[2] and not revalidate:
+            return CachedResponse(entry[1], entry[0])
+        headers = {"If-None-Match": entry[0]} if entry is not None and entry[0] else None
+        return flights.do(("GET", url), lambda: self._remember(key, entry, self._send("GET", url, headers=headers)))
+
+    def _remember(self, key: str, entry, resp):
+        cache = self.cache
+        if resp.status_code == 304 and entry is not None:
+            cache.touch(key)
+            return CachedResponse(entry[1], entry[0])
+        if resp.status_code == 200:
+            body = resp.json()
+            if cache.cacheable(body):
+                cache.put(key, resp.headers.get("ETag") or body.get("etag"), resp.text)
+            else:
+                cache.invalidate(key)
+        elif resp.status_code == 404:
+            cache.invalidate(key, children=True)
+        return resp
+
+    def _paginate(self, url: str):
+        """
+        Yield the items of an ARM list one at a time, fetching the next page only when the current one is used up.
+        """
+        while url:
+            resp = self._send("GET", url)
+            resp.raise_for_status()
+            page = resp.json()
+            if self.cache is not None:
+                self.cache.put_many(page.get("value", []))
+            for item in page.get("value", []):
+                yield item
+            url = page.get("nextLink")
+
+    @staticmethod
+    def _list_query(top: int = None, filter: str = None) -> str:
+        query = ""
+        if top:
+            query += f"&$top={int(top)}"
+        if filter:
+            query += f"&$filter={quote(filter)}"
+        return query
+
+    def iter_subscriptions(self):
+        """
+        Stream every subscription the credential can see, following nextLink lazily.
+        """
+        return self._paginate(f"{ARM_BASE_URL}/subscriptions?api-version={self.subscriptions_api_version}")
+
+    def iter_resource_groups(self, top: int = None, filter: str = None):
+        """
+        Stream every Resource Group in the subscription, following nextLink lazily.
+        top sets the page size and filter is passed to ARM as $filter (e.g. "tagName eq 'env' and tagValue eq 'dev'").
+        """
+        subscription_id = self.subscription
+        url = f"{ARM_BASE_URL}/subscriptions/{subscription_id}/resourcegroups?api-version={self.api_version}"
+        return self._paginate(url + self._list_query(top, filter))
+
+    def iter_vnets(self, group_name: str = None, top: int = None, filter: str = None):
+        """
+        Stream every Virtual Network in the subscription, or in one Resource Group, following nextLink lazily.
+        """
+        subscription_id = self.subscription
+        if group_name:
+            url = f"{ARM_BASE_URL}/subscriptions/{subscription_id}/resourceGroups/{group_name}/providers/Microsoft.Network/virtualNetworks?api-version={self.api_version}"
+        else:
+            url = f"{ARM_BASE_URL}/subscriptions/{subscription_id}/providers/Microsoft.Network/virtualNetworks?api-version={self.api_version}"
+        return self._paginate(url + self._list_query(top, filter))
+
+    def az_operation_api_client(self, url: str):
+        """
+        GET an absolute ARM URL, such as the Azure-AsyncOperation or Location header of a long-running operation.
+        """
+        return self._send("GET", url)
+
     def az_group_api_client(self, group_name: str, requestType: str, body: dict = None):
-        credential = self.credentials
         subscription_id = self.subscription
-        token = credential.get_token("https://management.azure.com/.default")
-        api_version = "2022-09-01"
-        url = f"https://management.azure.com/subscriptions/{subscription_id}/resourcegroups/{group_name}?api-version={api_version}"
-        headers = {"Authorization": f"Bearer {token.token}", "Content-Type": "application/json"}
+        api_version = self.api_version
+        url = f"{ARM_BASE_URL}/subscriptions/{subscription_id}/resourcegroups/{group_name}?api-version={api_version}"
         if requestType.lower() == "check":
-            return requests.get(url=url, headers=headers)
+            return self._get_resource(url)
+        elif requestType.lower() == "revalidate":
+            # Confirmed with ARM (If-None-Match) even when cached, for reads that decide whether to write
+            return self._get_resource(url, revalidate=True)
+        elif requestType.lower() == "poll":
+            # Straight to ARM, a watcher must not see the cached copy
+            return self._send("GET", url)
         elif requestType.lower() == "create":
             if not body:
                 raise ValueError("Body with at least a 'location' key is required to create a resource group.")
-            return requests.put(url=url, headers=headers, json=body)
+            return self._send("PUT", url, body)
         elif requestType.lower() == "delete":
-            return requests.delete(url=url, headers=headers)
+            return self._send("DELETE", url)
         else:
             return None
 
     def az_vnet_api_client(self, group_name: str, vnet_name: str, requestType: str, body: dict = None):
-        credential = self.credentials
         subscription_id = self.subscription
-        token = credential.get_token("https://management.azure.com/.default")
-        api_version = "2022-09-01"
-        url = f"https://management.azure.com/subscriptions/{subscription_id}/resourceGroups/{group_name}/providers/Microsoft.Network/virtualNetworks/{vnet_name}?api-version={api_version}"
-        list_rg_url = f"https://management.azure.com/subscriptions/{subscription_id}/resourceGroups/{group_name}/providers/Microsoft.Network/virtualNetworks?api-version={api_version}"
-        list_all_url = f"https://management.azure.com/subscriptions/{subscription_id}/providers/Microsoft.Network/virtualNetworks?api-version={api_version}"
-        headers = {"Authorization": f"Bearer {token.token}", "Content-Type": "application/json"}
+        api_version = self.api_version
+        url = f"{ARM_BASE_URL}/subscriptions/{subscription_id}/resourceGroups/{group_name}/providers/Microsoft.Network/virtualNetworks/{vnet_name}?api-version={api_version}"
+        list_rg_url = f"{ARM_BASE_URL}/subscriptions/{subscription_id}/resourceGroups/{group_name}/providers/Microsoft.Network/virtualNetworks?api-version={api_version}"
+        list_all_url = f"{ARM_BASE_URL}/subscriptions/{subscription_id}/providers/Microsoft.Network/virtualNetworks?api-version={api_version}"
         if requestType.lower() == "check":
-            return requests.get(url=url, headers=headers)
+            return self._get_resource(url)
+        elif requestType.lower() == "revalidate":
+            return self._get_resource(url, revalidate=True)
+        elif requestType.lower() == "poll":
+            return self._send("GET", url)
         elif requestType.lower() == "create":
-            return requests.put(url=url, headers=headers, json=body)
+            return self._send("PUT", url, body)
         elif requestType.lower() == "delete":
-            return requests.delete(url=url, headers=headers)
+            return self._send("DELETE", url)
         elif requestType.lower() == "list_rg":
-            return requests.get(url=list_rg_url, headers=headers)
+            return self._send("GET", list_rg_url)
         elif requestType.lower() == "list_all":
-            return requests.get(url=list_all_url, headers=headers)
+            return self._send("GET", list_all_url)
         else:
             return None
 
     def az_subnet_api_client(
         self, group_name: str, vnet_name: str, subnet_name: str, requestType: str, body: dict = None
     ):
-        credential = self.credentials
         subscription_id = self.subscription
-        token = credential.get_token("https://management.azure.com/.default")
-        api_version = "2022-09-01"
-        url = f"https://management.azure.com/subscriptions/{subscription_id}/resourceGroups/{group_name}/providers/Microsoft.Network/virtualNetworks/{vnet_name}/subnets/{subnet_name}?api-version={api_version}"
-        headers = {"Authorization": f"Bearer {token.token}", "Content-Type": "application/json"}
+        api_version = self.api_version
+        url = f"{ARM_BASE_URL}/subscriptions/{subscription_id}/resourceGroups/{group_name}/providers/Microsoft.Network/virtualNetworks/{vnet_name}/subnets/{subnet_name}?api-version={api_version}"
         if requestType.lower() == "check":
-            return requests.get(url=url, headers=headers)
+            return self._get_resource(url)
         elif requestType.lower() == "create":
-            return requests.put(url=url, headers=headers, json=body)
+            return self._send("PUT", url, body)
         elif requestType.lower() == "delete":
-            return requests.delete(url=url, headers=headers)
+            return self._send("DELETE", url)
         else:
             return None
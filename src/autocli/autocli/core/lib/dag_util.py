@@ -0,0 +1,72 @@
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+class DagExecutor:
+    """
+    Class that runs the nodes of a dependency graph concurrently under a parallelism limit.
+    A node starts once every node it depends on has succeeded, dependents of a failed node are skipped.
+    """
+
+    def __init__(self, parallelism: int = 8):
+        if parallelism < 1:
+            raise ValueError("parallelism must be at least 1")
+        self.parallelism = parallelism
+
+    def run(self, nodes, dependencies: dict, task, succeeded):
+        """
+        Yield (node, outcome, result) as nodes finish, outcome is "succeeded", "failed" or "skipped".
+        dependencies maps a node to the nodes it depends on, task(node) does the work and
+        succeeded(result) decides whether dependents may run.
+        """
+        nodes = list(nodes)
+        waiting_on = {node: set(dependencies.get(node, ())) & set(nodes) for node in nodes}
+        dependents = {node: [] for node in nodes}
+        for node, parents in waiting_on.items():
+            for parent in parents:
+                dependents[parent].append(node)
+        ready = [node for node in nodes if not waiting_on[node]]
+        done = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.parallelism) as pool:
+            while ready or running:
+                while ready and len(running) < self.parallelism:
+                    node = ready.pop(0)
+                    # In a copy of the caller's context, like fan_out
+                    running[pool.submit(contextvars.copy_context().run, task, node)] = node
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    node = running.pop(future)
+                    done.add(node)
+                    try:
+                        result = future.result()
+                        outcome = "succeeded" if succeeded(result) else "failed"
+                    except Exception as e:
+                        result = str(e)
+                        outcome = "failed"
+                    yield node, outcome, result
+                    if outcome == "succeeded":
+                        for child in dependents[node]:
+                            waiting_on[child].discard(node)
+                            if not waiting_on[child]:
+                                ready.append(child)
+                    else:
+                        for skipped in self._descendants(node, dependents, done):
+                            done.add(skipped)
+                            yield skipped, "skipped", f"Dependency {node} did not succeed"
+        # Anything left over sits on a dependency cycle
+        for node in nodes:
+            if node not in done:
+                yield node, "skipped", "Dependency cycle"
+
+    @staticmethod
+    def _descendants(node, dependents: dict, done: set) -> list:
+        found = []
+        stack = list(dependents[node])
+        while stack:
+            child = stack.pop()
+            if child in done or child in found:
+                continue
+            found.append(child)
+            stack.extend(dependents[child])
+        return found
@@ -0,0 +1,28 @@
+CREATE = "create"
+UPDATE = "update"
+NOOP = "noop"
+CONFLICT = "conflict"
+UNKNOWN = "unknown"
+
+
+def same_location(actual: str, desired: str) -> bool:
+    # ARM answers "eastus" for a resource created in "East US"
+    return (actual or "").replace(" ", "").lower() == (desired or "").replace(" ", "").lower()
+
+
+def resource_drift(check_resp, location: str):
+    """
+    Diff a resource GET against its desired location, returning (action, changes).
+    A resource that exists in the desired location and provisioned fine is a no-op, a failed one is re-PUT.
+    """
+    if check_resp.status_code == 404:
+        return CREATE, [f"create in {location}"]
+    if check_resp.status_code != 200:
+        return UNKNOWN, [f"lookup returned {check_resp.status_code}: {check_resp.text}"]
+    actual = check_resp.json()
+    if not same_location(actual.get("location"), location):
+        return CONFLICT, [f"exists in location '{actual.get('location')}', requested '{location}'"]
+    state = actual.get("properties", {}).get("provisioningState")
+    if state != "Succeeded":
+        return UPDATE, [f"provisioningState is {state}"]
+    return NOOP, []
@@ -0,0 +1,192 @@
+import asyncio
+import contextvars
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from autocli.core.lib.CONSTANTS import AZURE_SUBSCRIPTIONS, DEV_AZURE_SUBSCRIPTION, FANOUT_PARALLELISM
+from autocli.core.lib.azure_clients import AzureClients
+from autocli.core.lib.results import Result
+
+_DONE = object()
+
+
+class _Failed:
+    # Carries an exception raised by a stream over to the consuming thread
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def parse_subscriptions(value) -> list:
+    """
+    Normalise a subscription list: a comma separated string or a list of them; empty means AUTOCLI_SUBSCRIPTIONS.
+    "*" is kept and expanded by resolve_subscriptions.
+    """
+    if isinstance(value, str):
+        value = [value]
+    subscriptions = []
+    for item in value or []:
+        for subscription in item.split(","):
+            subscription = subscription.strip()
+            if subscription and subscription.lower() not in (s.lower() for s in subscriptions):
+                subscriptions.append(subscription)
+    return subscriptions or list(AZURE_SUBSCRIPTIONS) or [DEV_AZURE_SUBSCRIPTION]
+
+
+def resolve_subscriptions(value=None) -> list:
+    """
+    Return subscription ids for a fan-out, listing every subscription the credential sees when asked for "*".
+    """
+    subscriptions = parse_subscriptions(value)
+    if "*" not in subscriptions:
+        return subscriptions
+    visible = [item["subscriptionId"] for item in AzureClients().iter_subscriptions() if item.get("subscriptionId")]
+    return [subscription for subscription in subscriptions if subscription != "*"] + [
+        subscription for subscription in visible if subscription not in subscriptions
+    ]
+
+
+def fans_out(value) -> bool:
+    """
+    Whether a subscription argument explicitly asks for several subscriptions ("*" or more than one id),
+    the only case a check answers with a list instead of a single result.
+    """
+    if not value:
+        return False
+    subscriptions = parse_subscriptions(value)
+    return len(subscriptions) > 1 or "*" in subscriptions
+
+
+async def async_resolve_subscriptions(value=None) -> list:
+    subscriptions = parse_subscriptions(value)
+    if "*" not in subscriptions:
+        return subscriptions
+    return await asyncio.get_running_loop().run_in_executor(
+        None, contextvars.copy_context().run, resolve_subscriptions, subscriptions
+    )
+
+
+def tag_results(results, subscriptions: list) -> list:
+    """
+    Turn fan-out (subscription_id, result or exception) pairs into dicts tagged with their subscriptionId,
+    in the order of subscriptions.
+    """
+    tagged = {}
+    for subscription, result in results:
+        record = {"subscriptionId": subscription}
+        record.update(result.to_dict() if isinstance(result, Result) else {"error": str(result)})
+        tagged[subscription] = record
+    return [tagged[subscription] for subscription in subscriptions]
+
+
+def fan_out(subscriptions: list, task, parallelism: int = FANOUT_PARALLELISM):
+    """
+    Run task(subscription_id) for every subscription concurrently and yield (subscription_id, result)
+    as each finishes. An exception raised by task is yielded as the result.
+    Each task runs in a copy of the caller's context, so context variables (the current span, the daemon's
+    client streams) follow it into the worker thread.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(subscriptions)))) as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, task, subscription): subscription
+            for subscription in subscriptions
+        }
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+
+def merge_streams(subscriptions: list, stream, parallelism: int = FANOUT_PARALLELISM):
+    """
+    Yield the items of stream(subscription_id) for every subscription, read concurrently and
+    interleaved as they arrive, so a slow subscription does not hold back the others.
+    """
+    if len(subscriptions) == 1:
+        yield from stream(subscriptions[0])
+        return
+    items = queue.Queue(maxsize=1000)
+    stop = threading.Event()
+
+    def pump(subscription):
+        try:
+            if stop.is_set():
+                return
+            for item in stream(subscription):
+                items.put(item)
+                if stop.is_set():
+                    return
+        except Exception as e:
+            items.put(_Failed(e))
+        finally:
+            items.put(_DONE)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(parallelism, len(subscriptions)))) as pool:
+        for subscription in subscriptions:
+            pool.submit(contextvars.copy_context().run, pump, subscription)
+        remaining = len(subscriptions)
+        try:
+            while remaining:
+                item = items.get()
+                if item is _DONE:
+                    remaining -= 1
+                elif isinstance(item, _Failed):
+                    raise item.error
+                else:
+                    yield item
+        finally:
+            # The consumer stopped early: let the pumps finish their current put and exit
+            stop.set()
+            while remaining:
+                remaining -= items.get() is _DONE
+
+
+async def async_fan_out(subscriptions: list, task, parallelism: int = FANOUT_PARALLELISM):
+    """
+    Asyncio fan_out: await task(subscription_id) for every subscription, at most parallelism at a time,
+    and return [(subscription_id, result or exception)] in subscription order.
+    """
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def run(subscription):
+        async with semaphore:
+            return await task(subscription)
+
+    results = await asyncio.gather(*(run(subscription) for subscription in subscriptions), return_exceptions=True)
+    return list(zip(subscriptions, results))
+
+
+async def async_merge_streams(subscriptions: list, stream):
+    """
+    Asyncio merge_streams: interleave the async generators stream(subscription_id) as their items arrive.
+    """
+    if len(subscriptions) == 1:
+        async for item in stream(subscriptions[0]):
+            yield item
+        return
+    items = asyncio.Queue(maxsize=1000)
+
+    async def pump(subscription):
+        try:
+            async for item in stream(subscription):
+                await items.put(item)
+        except Exception as e:
+            await items.put(_Failed(e))
+        finally:
+            await items.put(_DONE)
+
+    tasks = [asyncio.ensure_future(pump(subscription)) for subscription in subscriptions]
+    remaining = len(tasks)
+    try:
+        while remaining:
+            item = await items.get()
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, _Failed):
+                raise item.error
+            else:
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
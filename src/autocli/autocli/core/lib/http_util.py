@@ -0,0 +1,152 @@
+import asyncio
+import threading
+import weakref
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from autocli.core.lib.CONSTANTS import (
+    HTTP2_ENABLED,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_POOL_SIZE,
+    HTTP_READ_TIMEOUT,
+)
+from autocli.core.lib.log_util import logClient
+
+_transports = {}
+_transport_lock = threading.Lock()
+_async_transports = weakref.WeakKeyDictionary()
+
+
+def get_transport(subscription_id: str = None) -> "HttpTransport":
+    """
+    Return the HttpTransport of a subscription, building it on first use.
+    Each subscription gets its own connection pool, so one busy subscription cannot hold every connection.
+    """
+    key = (subscription_id or "").lower()
+    transport = _transports.get(key)
+    if transport is None:
+        with _transport_lock:
+            transport = _transports.get(key)
+            if transport is None:
+                transport = _transports[key] = HttpTransport()
+    return transport
+
+
+def get_async_transport(subscription_id: str = None) -> "AsyncHttpTransport":
+    """
+    Return the AsyncHttpTransport of a subscription bound to the running event loop, building it on first use.
+    """
+    loop = asyncio.get_running_loop()
+    transports = _async_transports.get(loop)
+    if transports is None:
+        transports = _async_transports[loop] = {}
+    key = (subscription_id or "").lower()
+    transport = transports.get(key)
+    if transport is None:
+        transport = transports[key] = AsyncHttpTransport()
+    return transport
+
+
+class HttpTransport:
+    """
+    Pooled keep-alive HTTP transport shared by every ARM call.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = HTTP_POOL_SIZE,
+        keepalive: bool = HTTP_KEEPALIVE,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        http2: bool = HTTP2_ENABLED,
+    ):
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.timeout = (connect_timeout, read_timeout)
+        self.http2 = False
+        self.logger = logClient("azureHTTPtransport")
+        if http2:
+            try:
+                import httpx
+                import h2  # noqa: F401  httpx needs h2 installed to negotiate HTTP/2
+
+                self.session = httpx.Client(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=pool_size,
+                        max_keepalive_connections=pool_size if keepalive else 0,
+                        keepalive_expiry=keepalive_expiry,
+                    ),
+                    timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                )
+                self.http2 = True
+                return
+            except ImportError:
+                self.logger.warning("HTTP/2 requested but httpx[http2] is not installed, falling back to HTTP/1.1")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if not keepalive:
+            self.session.headers["Connection"] = "close"
+
+    def request(self, method: str, url: str, headers: dict = None, json: dict = None):
+        """
+        Send a request over the pooled session with connect and read timeouts applied.
+        """
+        if self.http2:
+            return self.session.request(method, url, headers=headers, json=json)
+        return self.session.request(method, url, headers=headers, json=json, timeout=self.timeout)
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncHttpTransport:
+    """
+    Pooled keep-alive asyncio HTTP transport built on httpx.AsyncClient.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = HTTP_POOL_SIZE,
+        keepalive: bool = HTTP_KEEPALIVE,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        connect_timeout: float = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float = HTTP_READ_TIMEOUT,
+        http2: bool = HTTP2_ENABLED,
+    ):
+        import httpx
+
+        if http2:
+            try:
+                import h2  # noqa: F401  httpx needs h2 installed to negotiate HTTP/2
+            except ImportError:
+                logClient("azureHTTPtransport").warning(
+                    "HTTP/2 requested but httpx[http2] is not installed, falling back to HTTP/1.1"
+                )
+                http2 = False
+        self.pool_size = pool_size
+        self.http2 = http2
+        self.session = httpx.AsyncClient(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size if keepalive else 0,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+
+    async def request(self, method: str, url: str, headers: dict = None, json: dict = None):
+        """
+        Send a request over the pooled async client.
+        """
+        return await self.session.request(method, url, headers=headers, json=json)
+
+    async def close(self):
+        await self.session.aclose()
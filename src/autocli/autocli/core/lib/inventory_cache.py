@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+from autocli.core.lib.CONSTANTS import CACHE_ENABLED, CACHE_PATH, CACHE_TTL
+
+_cache = None
+_cache_lock = threading.Lock()
+
+# Only settled resources are cached, anything mid-operation must be read from ARM
+CACHEABLE_STATES = ("Succeeded",)
+
+
+def get_inventory_cache():
+    """
+    Return the process-wide InventoryCache, or None when AUTOCLI_CACHE=0.
+    """
+    global _cache
+    if not CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = InventoryCache()
+    return _cache
+
+
+def resource_key(url_or_id: str) -> str:
+    """
+    Normalise an ARM URL or resource id to the cache key (lowercased path, no query string).
+    """
+    return urlsplit(url_or_id).path.rstrip("/").lower()
+
+
+class CachedResponse:
+    """
+    Response-like object served from the inventory cache, exposes what the core classes read from requests.Response.
+    """
+
+    def __init__(self, body: str, etag: str = None):
+        self.status_code = 200
+        self.text = body
+        self.headers = {"x-ms-correlation-request-id": "", "ETag": etag or "", "x-autocli-cache": "hit"}
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        return None
+
+
+class InventoryCache:
+    """
+    Persistent SQLite cache of Resource Group and VNet bodies keyed by resource id.
+    Entries younger than ttl are served as-is, older ones are revalidated with If-None-Match.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resources ("
+                "id TEXT PRIMARY KEY, etag TEXT, body TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            # WAL lets CLI processes and API workers read while another one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def cacheable(body: dict) -> bool:
+        return (body or {}).get("properties", {}).get("provisioningState") in CACHEABLE_STATES
+
+    def get(self, key: str):
+        """
+        Return (etag, body text, is_fresh) for a key, or None on a miss.
+        """
+        row = self._connect().execute("SELECT etag, body, fetched_at FROM resources WHERE id = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        etag, body, fetched_at = row
+        return etag, body, time.time() - fetched_at < self.ttl
+
+    def put(self, key: str, etag: str, body: str):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO resources (id, etag, body, fetched_at) VALUES (?, ?, ?, ?)",
+                (key, etag, body, time.time()),
+            )
+
+    def put_many(self, items):
+        """
+        Store a batch of ARM resource bodies (e.g. one list page) in one transaction, skipping unsettled ones.
+        """
+        now = time.time()
+        rows = [
+            (resource_key(item["id"]), item.get("etag"), json.dumps(item), now)
+            for item in items
+            if item.get("id") and self.cacheable(item)
+        ]
+        if rows:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO resources (id, etag, body, fetched_at) VALUES (?, ?, ?, ?)", rows
+                )
+
+    def touch(self, key: str):
+        with self._connect() as conn:
+            conn.execute("UPDATE resources SET fetched_at = ? WHERE id = ?", (time.time(), key))
+
+    def invalidate(self, key: str, children: bool = False):
+        """
+        Drop a resource, and with children=True everything beneath it (e.g. the VNets of a deleted Resource Group).
+        """
+        with self._connect() as conn:
+            conn.execute("DELETE FROM resources WHERE id = ?", (key,))
+            if children:
+                conn.execute("DELETE FROM resources WHERE id LIKE ? ESCAPE '\\'", (self._escape_like(key) + "/%",))
+
+    @staticmethod
+    def _escape_like(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
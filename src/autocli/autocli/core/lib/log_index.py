@@ -0,0 +1,249 @@
+import json
+import mmap
+import os
+import sqlite3
+import threading
+
+from autocli.core.lib.CONSTANTS import LOG_INDEX_PATH, log_folder
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+_index = None
+_index_lock = threading.Lock()
+
+# Leading bytes kept per file to tell a file that was truncated or replaced under the same inode
+_HEAD_BYTES = 64
+_CHUNK_BYTES = 4 * 1024 * 1024
+# Only lines carrying one of these fields are indexed
+_MARKERS = (b'"trackingId"', b'"correlationId"', b'"resource"')
+
+
+def get_log_index() -> "LogIndex":
+    """
+    Return the process-wide LogIndex over the log folder.
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = LogIndex()
+    return _index
+
+
+def is_log_file(name: str) -> bool:
+    # azureRGcreate.log and its rotated backups (azureRGcreate.log.1, azureRGcreate.log.2026-01-31)
+    return name.endswith(".log") or ".log." in name
+
+
+def _keys(line: bytes) -> list:
+    if not any(marker in line for marker in _MARKERS):
+        return []
+    try:
+        record = _loads(line)
+    except ValueError:
+        return []
+    keys = []
+    if record.get("trackingId"):
+        keys.append(f"t:{record['trackingId']}")
+    if record.get("correlationId"):
+        keys.append(f"c:{record['correlationId']}")
+    if record.get("resource"):
+        keys.append(f"r:{str(record['resource']).lower()}")
+    return keys
+
+
+class LogIndex:
+    """
+    Sidecar SQLite index of the JSON log lines in the log folder: trackingId, correlationId and resource name
+    to (file, byte offset, length). Each file is indexed from where the previous catch-up stopped and followed
+    across rotation by inode; lookups read only the matching lines, through mmap.
+    """
+
+    def __init__(self, folder: str = log_folder, path: str = LOG_INDEX_PATH):
+        self.folder = folder
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._connect().executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "id INTEGER PRIMARY KEY, path TEXT NOT NULL, device INTEGER NOT NULL, inode INTEGER NOT NULL, "
+            "head BLOB NOT NULL, indexed INTEGER NOT NULL);"
+            "CREATE UNIQUE INDEX IF NOT EXISTS files_inode ON files (device, inode);"
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT NOT NULL, file_id INTEGER NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL, "
+            "PRIMARY KEY (key, file_id, offset)) WITHOUT ROWID;"
+            "CREATE INDEX IF NOT EXISTS entries_file ON entries (file_id);"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Transactions are explicit: a catch-up holds the write lock from reading offsets to committing
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def catch_up(self, budget: int = None) -> int:
+        """
+        Index whatever was appended to the logs since the last call and return the number of lines added.
+        budget caps the bytes read per file, the rest is picked up by the next call.
+        """
+        if not os.path.isdir(self.folder):
+            return 0
+        conn = self._connect()
+        added = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            known = {
+                (device, inode): (file_id, head, indexed)
+                for file_id, device, inode, head, indexed in conn.execute(
+                    "SELECT id, device, inode, head, indexed FROM files"
+                )
+            }
+            present = set()
+            for name in sorted(os.listdir(self.folder)):
+                if is_log_file(name):
+                    path = os.path.join(self.folder, name)
+                    try:
+                        added += self._catch_up_file(conn, path, known, present, budget)
+                    except OSError:
+                        # Rotated away between listdir and open
+                        continue
+            for key, (file_id, _, _) in known.items():
+                if key not in present:
+                    conn.execute("DELETE FROM entries WHERE file_id = ?", (file_id,))
+                    conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return added
+
+    def _catch_up_file(self, conn: sqlite3.Connection, path: str, known: dict, present: set, budget: int) -> int:
+        with open(path, "rb") as log_file:
+            stat = os.fstat(log_file.fileno())
+            key = (stat.st_dev, stat.st_ino)
+            present.add(key)
+            head = log_file.read(_HEAD_BYTES)
+            if key in known:
+                file_id, known_head, indexed = known[key]
+                if stat.st_size < indexed or not head.startswith(known_head):
+                    # Truncated or a new file on a reused inode, start over
+                    conn.execute("DELETE FROM entries WHERE file_id = ?", (file_id,))
+                    indexed = 0
+            else:
+                file_id = conn.execute(
+                    "INSERT INTO files (path, device, inode, head, indexed) VALUES (?, ?, ?, ?, 0)",
+                    (path, stat.st_dev, stat.st_ino, head),
+                ).lastrowid
+                indexed = 0
+            end = stat.st_size if budget is None else min(stat.st_size, indexed + budget)
+            added = 0
+            if end > indexed:
+                log_file.seek(indexed)
+                indexed, added = self._index_lines(conn, file_id, log_file, indexed, end)
+            # A rename by rotation keeps the inode, only the path changes
+            conn.execute(
+                "UPDATE files SET path = ?, head = ?, indexed = ? WHERE id = ?", (path, head, indexed, file_id)
+            )
+        return added
+
+    @staticmethod
+    def _index_lines(conn: sqlite3.Connection, file_id: int, log_file, offset: int, end: int):
+        """
+        Index the complete lines between offset and end, return (offset after the last complete line, lines added).
+        """
+        added = 0
+        position = offset
+        pending = b""
+        while offset < end:
+            chunk = log_file.read(min(_CHUNK_BYTES, end - offset))
+            if not chunk:
+                break
+            offset += len(chunk)
+            data = pending + chunk
+            # A line still being written stays pending until its newline shows up
+            cut = data.rfind(b"\n") + 1
+            rows = []
+            start = 0
+            while start < cut:
+                stop = data.find(b"\n", start, cut)
+                keys = _keys(data[start:stop])
+                for key in keys:
+                    rows.append((key, file_id, position + start, stop - start))
+                added += bool(keys)
+                start = stop + 1
+            conn.executemany("INSERT OR IGNORE INTO entries (key, file_id, offset, length) VALUES (?, ?, ?, ?)", rows)
+            position += cut
+            pending = data[cut:]
+        return position, added
+
+    def reindex(self) -> int:
+        """
+        Drop the index and build it again from every log file.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM files")
+        conn.execute("COMMIT")
+        return self.catch_up()
+
+    def lookup(
+        self, trackingId: str = None, correlationId: str = None, resource: str = None, expand: bool = False
+    ) -> list:
+        """
+        Return the log records matching every key given, oldest first, each with the logFile it came from.
+        With expand, a match also brings in every record of its trackingId (the operation's full history).
+        """
+        keys = []
+        if trackingId:
+            keys.append(f"t:{trackingId}")
+        if correlationId:
+            keys.append(f"c:{correlationId}")
+        if resource:
+            keys.append(f"r:{resource.lower()}")
+        if not keys:
+            raise ValueError("Give a trackingId, correlationId or resource to look up")
+        self.catch_up()
+        conn = self._connect()
+        locations = set.intersection(*(self._locations(conn, key) for key in keys))
+        records = self._read(conn, locations)
+        if expand:
+            for related in {record["trackingId"] for record in records if record.get("trackingId")}:
+                locations |= self._locations(conn, f"t:{related}")
+            records = self._read(conn, locations)
+        return records
+
+    @staticmethod
+    def _locations(conn: sqlite3.Connection, key: str) -> set:
+        return set(conn.execute("SELECT file_id, offset, length FROM entries WHERE key = ?", (key,)))
+
+    @staticmethod
+    def _read(conn: sqlite3.Connection, locations: set) -> list:
+        by_file = {}
+        for file_id, offset, length in locations:
+            by_file.setdefault(file_id, []).append((offset, length))
+        records = []
+        for file_id, spans in by_file.items():
+            row = conn.execute("SELECT path FROM files WHERE id = ?", (file_id,)).fetchone()
+            if row is None:
+                continue
+            try:
+                with open(row[0], "rb") as log_file, mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                    for offset, length in sorted(spans):
+                        record = _loads(view[offset : offset + length])
+                        record["logFile"] = os.path.basename(row[0])
+                        records.append(record)
+            except (OSError, ValueError):
+                # Rotated away or rewritten since the last catch-up
+                continue
+        records.sort(key=lambda record: str(record.get("timestamp", "")))
+        return records
@@ -1,33 +1,312 @@
+import atexit
 import logging
+import logging.handlers
 import os
 import json
+import queue
+import threading
+import time
+import traceback
 
-from autocli.core.lib.CONSTANTS import log_folder
+from autocli.core.lib.CONSTANTS import (
+    DEBUG_ENABLED,
+    LOG_BACKUP_COUNT,
+    LOG_BATCH_SIZE,
+    LOG_FLUSH_INTERVAL,
+    LOG_INDEX_INTERVAL,
+    LOG_MAX_BYTES,
+    LOG_QUEUE_SIZE,
+    LOG_ROTATE_WHEN,
+    log_folder,
+)
+from autocli.core.lib.log_index import get_log_index
+from autocli.core.lib.results import Result
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: no cross-process rotation lock, keep one process per log folder there
+    fcntl = None
+
+try:
+    import orjson
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, default=str).decode()
+
+except ImportError:
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj, default=str, separators=(",", ":"))
+
+
+_writer = None
+_writer_lock = threading.Lock()
+_logger_lock = threading.Lock()
+
+# Structured fields copied from the record into the JSON line when set
+EXTRA_FIELDS = ("trackingId", "correlationId", "resource", "span")
+# Bytes per file the writer thread indexes at a time, so a large backlog never stalls logging
+_INDEX_BUDGET = 8 * 1024 * 1024
 
 
 class JsonFormatter(logging.Formatter):
     def format(self, record):
+        message = record.getMessage()
+        if record.exc_info:
+            # Records reach the writer thread unformatted, the traceback is rendered here
+            message = f"{message}\n{self.formatException(record.exc_info)}"
         log_record = {
             "timestamp": self.formatTime(record, self.datefmt),
             "level": record.levelname,
-            "message": record.getMessage(),
+            "message": message,
             "logger": record.name,
         }
-        # Optionally add more fields from record if needed
-        return json.dumps(log_record)
+        for field in EXTRA_FIELDS:
+            value = getattr(record, field, None)
+            if value:
+                log_record[field] = value
+        return _dumps(log_record)
+
+
+class _BatchFileMixin:
+    """
+    File handler written one batch at a time by the writer thread, its per-record flush is a no-op.
+    API workers, CLI runs and the daemon append to the same files, so each batch (rollover included) is written
+    under an exclusive lock on a sidecar .lock file, and a file another process rotated away is reopened first.
+    """
+
+    _lock_file = None
+
+    def begin_batch(self):
+        if fcntl is not None:
+            self._lock_file = open(self.baseFilename + ".lock", "a")
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        if self.stream is not None and self._rotated_away():
+            self.stream.close()
+            # Reopened by the next emit (delay=True)
+            self.stream = None
+            self._rotated_elsewhere()
+
+    def _rotated_away(self) -> bool:
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        opened = os.fstat(self.stream.fileno())
+        return (current.st_dev, current.st_ino) != (opened.st_dev, opened.st_ino)
+
+    def _rotated_elsewhere(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def flush_batch(self):
+        try:
+            if self.stream is not None:
+                logging.StreamHandler.flush(self)
+        finally:
+            if self._lock_file is not None:
+                # Closing the file drops the lock
+                self._lock_file.close()
+                self._lock_file = None
+
+
+class _RotatingFileHandler(_BatchFileMixin, logging.handlers.RotatingFileHandler):
+    pass
+
+
+class _TimedRotatingFileHandler(_BatchFileMixin, logging.handlers.TimedRotatingFileHandler):
+    def _rotated_elsewhere(self):
+        # Another process already rolled this period over, rolling again would overwrite its backup
+        self.rolloverAt = self.computeRollover(time.time())
+
+
+class LogWriter:
+    """
+    Single background thread that drains the shared log queue, writes records in batches
+    to one rotating file per logger and flushes each file once per batch.
+    """
+
+    def __init__(self, batch_size: int = LOG_BATCH_SIZE, flush_interval: float = LOG_FLUSH_INTERVAL):
+        self.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._paths = {}
+        self._handlers = {}
+        self._stop = object()
+        self._indexed_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="autocli-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def register(self, logger_name: str, path: str):
+        self._paths[logger_name] = path
+
+    def _handler_for(self, logger_name: str):
+        handler = self._handlers.get(logger_name)
+        if handler is None:
+            path = self._paths[logger_name]
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if LOG_ROTATE_WHEN:
+                handler = _TimedRotatingFileHandler(
+                    path, when=LOG_ROTATE_WHEN, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True
+                )
+            else:
+                handler = _RotatingFileHandler(
+                    path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True
+                )
+            handler.setFormatter(JsonFormatter())
+            self._handlers[logger_name] = handler
+        return handler
+
+    def _run(self):
+        while True:
+            try:
+                batch = [self.queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stopping = self._write(batch)
+            if stopping:
+                return
+            self._update_index()
+
+    def _write(self, batch) -> bool:
+        touched = set()
+        stopping = False
+        try:
+            for record in batch:
+                if record is self._stop:
+                    stopping = True
+                    continue
+                try:
+                    handler = self._handler_for(record.name)
+                    if handler not in touched:
+                        handler.begin_batch()
+                        touched.add(handler)
+                    # Formatted here, on the writer thread, rather than by the caller
+                    handler.handle(record)
+                except Exception:
+                    # Never let one bad record or path kill the writer thread
+                    traceback.print_exc()
+        finally:
+            for handler in touched:
+                try:
+                    handler.flush_batch()
+                except Exception:
+                    traceback.print_exc()
+        return stopping
+
+    def _update_index(self):
+        # Short-lived CLI runs never get here, their lookups catch the index up instead
+        if not LOG_INDEX_INTERVAL or time.monotonic() - self._indexed_at < LOG_INDEX_INTERVAL:
+            return
+        self._indexed_at = time.monotonic()
+        try:
+            get_log_index().catch_up(budget=_INDEX_BUDGET)
+        except Exception:
+            traceback.print_exc()
+
+    def close(self):
+        """
+        Drain what is queued and stop the writer, called at interpreter exit.
+        """
+        if self._thread.is_alive():
+            self.queue.put(self._stop)
+            self._thread.join(timeout=5)
+        for handler in self._handlers.values():
+            handler.close()
+
+
+def get_log_writer() -> LogWriter:
+    """
+    Return the process-wide LogWriter, starting its thread on first use.
+    """
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = LogWriter()
+    return _writer
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on the writer queue without blocking, a full queue drops the record instead of stalling the request.
+    Records are queued unformatted: the message (a Result's JSON included) is rendered by the writer thread.
+    """
+
+    def __init__(self, writer: LogWriter):
+        super().__init__(writer.queue)
+        self.writer = writer
+
+    def prepare(self, record):
+        msg = record.msg
+        # Results carry their own correlation id, lift it into the structured field
+        if isinstance(msg, Result) and getattr(record, "correlationId", None) is None:
+            record.correlationId = getattr(msg, "correlationid", None)
+            if getattr(record, "trackingId", None) is None:
+                record.trackingId = getattr(msg, "trackingId", None)
+        if isinstance(msg, Result) and getattr(record, "resource", None) is None:
+            record.resource = getattr(msg, "name", None)
+        # The queue stays in this process, so unlike QueueHandler.prepare there is nothing to pickle or pre-format
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.writer.dropped += 1
+
+
+class _TrackingAdapter(logging.LoggerAdapter):
+    """
+    Stamps trackingId on every record, merged with any extra= given at the call site.
+    """
+
+    def process(self, msg, kwargs):
+        kwargs["extra"] = {**self.extra, **kwargs.get("extra", {})}
+        return msg, kwargs
+
+
+def debugClient(name: str) -> logging.Logger:
+    """
+    Logger for diagnostics printed on stderr with --debug / AUTOCLI_DEBUG=1, never written to the JSON logs.
+    """
+    return logging.getLogger(f"autocli.debug.{name}")
+
+
+def enable_debug_output():
+    logger = logging.getLogger("autocli.debug")
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("[%(name)s] %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+
+
+if DEBUG_ENABLED:
+    enable_debug_output()
 
 
-def logClient(logName: str) -> logging.Logger:
-    log_directory = log_folder
-    log_dir = os.path.join(os.path.dirname(__file__), str(log_directory))
-    os.makedirs(log_dir, exist_ok=True)
-    log_path = os.path.join(log_dir, f"{logName}.log")
+def logClient(logName: str, trackingId: str = None):
     logger = logging.getLogger(f"{logName}.log")
-    logger.setLevel(logging.INFO)
     # Prevent adding multiple handlers if logger is called multiple times
     if not logger.handlers:
-        file_handler = logging.FileHandler(log_path)
-        formatter = JsonFormatter()
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        with _logger_lock:
+            if not logger.handlers:
+                writer = get_log_writer()
+                writer.register(logger.name, os.path.join(log_folder, f"{logName}.log"))
+                logger.setLevel(logging.INFO)
+                logger.addHandler(_QueueHandler(writer))
+    if trackingId is not None:
+        return _TrackingAdapter(logger, {"trackingId": str(trackingId)})
     return logger
@@ -0,0 +1,258 @@
+import asyncio
+import email.utils
+import random
+import time
+
+from autocli.core.lib.CONSTANTS import LRO_INITIAL_DELAY, LRO_MAX_DELAY, LRO_TIMEOUT
+from autocli.core.lib.metrics_util import LRO_POLLS, traced
+
+TERMINAL_STATES = ("Succeeded", "Failed", "Canceled")
+
+
+def provisioning_state(body: dict):
+    return (body or {}).get("properties", {}).get("provisioningState")
+
+
+def retry_after(resp):
+    """
+    Seconds to wait from the Retry-After header of resp (delta-seconds or HTTP-date), None when absent.
+    """
+    value = resp.headers.get("Retry-After") if resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        try:
+            return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return None
+
+
+class LroPoller:
+    """
+    Class that waits for ARM long-running operations.
+    Follows the Azure-AsyncOperation / Location headers returned on 201/202, honours Retry-After,
+    and falls back to polling the resource itself with capped exponential backoff and jitter.
+    """
+
+    def __init__(
+        self,
+        api_client,
+        timeout: float = LRO_TIMEOUT,
+        initial_delay: float = LRO_INITIAL_DELAY,
+        max_delay: float = LRO_MAX_DELAY,
+        logger=None,
+    ):
+        self.api_client = api_client
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.logger = logger
+        self.polls = 0
+        self._deadline = 0.0
+
+    def _start(self):
+        self.polls = 0
+        self._deadline = time.monotonic() + self.timeout
+
+    def _polled(self):
+        self.polls += 1
+        LRO_POLLS.inc()
+
+    def _expired(self) -> bool:
+        return time.monotonic() >= self._deadline
+
+    @staticmethod
+    def _body(resp) -> dict:
+        try:
+            return resp.json() or {}
+        except Exception:
+            return {}
+
+    @staticmethod
+    def _operation_url(resp):
+        """
+        Return (url, kind) for the operation-status URL of resp, kind is "async" or "location".
+        """
+        url = resp.headers.get("Azure-AsyncOperation")
+        if url:
+            return url, "async"
+        if resp.status_code == 202 and resp.headers.get("Location"):
+            return resp.headers.get("Location"), "location"
+        return None, None
+
+    def _delay(self, resp, attempt: int) -> float:
+        delay = retry_after(resp)
+        if delay is None:
+            ceiling = min(self.max_delay, self.initial_delay * (2**attempt))
+            delay = random.uniform(ceiling / 2, ceiling)
+        return min(delay, max(self._deadline - time.monotonic(), 0.0))
+
+    def _operation_status(self, status_resp, kind: str):
+        """
+        Interpret one operation-status poll, returns the terminal status or None while in progress.
+        """
+        if kind == "async":
+            if status_resp.status_code != 200:
+                return None
+            status = self._body(status_resp).get("status")
+            return status if status in TERMINAL_STATES else None
+        if status_resp.status_code == 202:
+            return None
+        return "Succeeded" if status_resp.status_code in (200, 201, 204) else "Failed"
+
+    def _log_failure(self, state):
+        if state in ("Failed", "Canceled") and self.logger is not None:
+            self.logger.error(f"Provisioning failed: {state}")
+
+    @traced("lro.wait")
+    def wait(self, resp, fetch):
+        """
+        Wait for the PUT that produced resp to finish.
+        fetch() must GET the resource, returns (resource body or None, provisioningState).
+        """
+        self._start()
+        body = self._body(resp) or None
+        state = provisioning_state(body)
+        if state in TERMINAL_STATES:
+            self._log_failure(state)
+            return body, state
+        url, kind = self._operation_url(resp)
+        if url is None:
+            return self._poll_resource(fetch, body)
+        status = self._follow(url, kind, resp)
+        status_resp = fetch()
+        if status_resp.status_code == 200:
+            body = status_resp.json()
+        if status is None:
+            # The operation did not finish in time, report the resource's current state
+            status = provisioning_state(body) or "Unknown"
+        self._log_failure(status)
+        return body, status
+
+    def _follow(self, url: str, kind: str, resp):
+        last = resp
+        attempt = 0
+        while not self._expired():
+            time.sleep(self._delay(last, attempt))
+            attempt += 1
+            last = self.api_client.az_operation_api_client(url)
+            self._polled()
+            status = self._operation_status(last, kind)
+            if status is not None:
+                return status
+        return None
+
+    def poll_resource(self, fetch, body: dict = None, stop_on_missing: bool = False):
+        """
+        Poll the resource until its provisioningState is terminal or the timeout passes.
+        Returns (resource body or None, provisioningState).
+        """
+        self._start()
+        return self._poll_resource(fetch, body, stop_on_missing)
+
+    def _poll_resource(self, fetch, body: dict = None, stop_on_missing: bool = False):
+        state = provisioning_state(body)
+        last = None
+        attempt = 0
+        while state not in TERMINAL_STATES and not self._expired():
+            if body is not None or attempt:
+                time.sleep(self._delay(last, attempt))
+            attempt += 1
+            last = fetch()
+            self._polled()
+            if last.status_code == 200:
+                body = last.json()
+                state = provisioning_state(body)
+            elif stop_on_missing:
+                break
+        self._log_failure(state)
+        return body, state if body else "Unknown"
+
+    @traced("lro.wait_for_delete")
+    def wait_for_delete(self, resp, fetch) -> str:
+        """
+        Wait for the DELETE that produced resp to finish, returns the final operation status.
+        fetch() must GET the resource, a 404 means the delete has completed.
+        """
+        self._start()
+        if resp.status_code in (200, 204) and not resp.headers.get("Azure-AsyncOperation"):
+            return "Succeeded"
+        url, kind = self._operation_url(resp)
+        if url is not None:
+            status = self._follow(url, kind, resp)
+            if status is not None:
+                return status
+        last = resp
+        attempt = 0
+        while not self._expired():
+            time.sleep(self._delay(last, attempt))
+            attempt += 1
+            last = fetch()
+            self._polled()
+            if last.status_code == 404:
+                return "Succeeded"
+        return "Unknown"
+
+
+class AsyncLroPoller(LroPoller):
+    """
+    Asyncio counterpart of LroPoller, fetch must be a coroutine function and api_client an AsyncAzureClients.
+    """
+
+    @traced("lro.wait")
+    async def wait(self, resp, fetch):
+        self._start()
+        body = self._body(resp) or None
+        state = provisioning_state(body)
+        if state in TERMINAL_STATES:
+            self._log_failure(state)
+            return body, state
+        url, kind = self._operation_url(resp)
+        if url is None:
+            return await self._poll_resource(fetch, body)
+        status = await self._follow(url, kind, resp)
+        status_resp = await fetch()
+        if status_resp.status_code == 200:
+            body = status_resp.json()
+        if status is None:
+            # The operation did not finish in time, report the resource's current state
+            status = provisioning_state(body) or "Unknown"
+        self._log_failure(status)
+        return body, status
+
+    async def _follow(self, url: str, kind: str, resp):
+        last = resp
+        attempt = 0
+        while not self._expired():
+            await asyncio.sleep(self._delay(last, attempt))
+            attempt += 1
+            last = await self.api_client.az_operation_api_client(url)
+            self._polled()
+            status = self._operation_status(last, kind)
+            if status is not None:
+                return status
+        return None
+
+    async def poll_resource(self, fetch, body: dict = None, stop_on_missing: bool = False):
+        self._start()
+        return await self._poll_resource(fetch, body, stop_on_missing)
+
+    async def _poll_resource(self, fetch, body: dict = None, stop_on_missing: bool = False):
+        state = provisioning_state(body)
+        last = None
+        attempt = 0
+        while state not in TERMINAL_STATES and not self._expired():
+            if body is not None or attempt:
+                await asyncio.sleep(self._delay(last, attempt))
+            attempt += 1
+            last = await fetch()
+            self._polled()
+            if last.status_code == 200:
+                body = last.json()
+                state = provisioning_state(body)
+            elif stop_on_missing:
+                break
+        self._log_failure(state)
+        return body, state if body else "Unknown"
@@ -0,0 +1,270 @@
+import asyncio
+import bisect
+import contextvars
+import functools
+import re
+import threading
+import time
+import uuid
+
+from autocli.core.lib.CONSTANTS import METRICS_BUCKETS, METRICS_ENABLED, TRACING_ENABLED
+from autocli.core.lib.log_util import logClient
+
+try:
+    from opentelemetry import trace as _otel_trace
+except ImportError:
+    _otel_trace = None
+
+# Spans and ARM calls are only measured when one of the two is on, otherwise every hook returns at once
+INSTRUMENTED = METRICS_ENABLED or TRACING_ENABLED
+
+_current_span = contextvars.ContextVar("autocli_span", default=None)
+_RESOURCE_TYPE = re.compile(r"/(resourcegroups|providers/[^/]+/[^/?]+|operations|operationresults)(?:/|\?|$)", re.I)
+
+
+class _Metric:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _label_text(self, values: tuple, extra: str = "") -> str:
+        pairs = [f'{label}="{value}"' for label, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter(_Metric):
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        super().__init__(name, help, labels)
+        self._values = {}
+
+    def inc(self, *values, amount: float = 1.0):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[values] = self._values.get(values, 0.0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, total in sorted(self._values.items()):
+                lines.append(f"{self.name}{self._label_text(values)} {total:g}")
+        return lines
+
+
+class Histogram(_Metric):
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: list = METRICS_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = sorted(buckets)
+        self._series = {}
+
+    def observe(self, value: float, *values):
+        if not METRICS_ENABLED:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                # Per-bucket counts, made cumulative when rendered; then sum and count
+                series = self._series[values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + ["+Inf"], counts):
+                    cumulative += bucket_count
+                    le = 'le="+Inf"' if bound == "+Inf" else f'le="{bound:g}"'
+                    lines.append(f"{self.name}_bucket{self._label_text(values, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{self._label_text(values)} {total:g}")
+                lines.append(f"{self.name}_count{self._label_text(values)} {count}")
+        return lines
+
+
+REGISTRY = []
+
+ARM_REQUEST_SECONDS = Histogram(
+    "autocli_arm_request_seconds", "ARM HTTP request latency", ("method", "resource_type", "status")
+)
+TOKEN_SECONDS = Histogram("autocli_token_acquire_seconds", "Time spent getting an ARM access token")
+ARM_RETRIES = Counter("autocli_arm_retries_total", "ARM requests retried after a 429/5xx", ("method", "status"))
+THROTTLE_WAIT_SECONDS = Counter(
+    "autocli_throttle_wait_seconds_total", "Time requests waited on the client-side rate limiter", ("category",)
+)
+THROTTLE_RATE_CUTS = Counter(
+    "autocli_throttle_rate_cuts_total", "Rate limiter cuts after a low x-ms-ratelimit-remaining", ("category",)
+)
+LRO_POLLS = Counter("autocli_lro_polls_total", "Long-running-operation poll requests")
+SPAN_SECONDS = Histogram("autocli_operation_seconds", "Duration of core operations", ("operation", "outcome"))
+API_REQUEST_SECONDS = Histogram(
+    "autocli_api_request_seconds", "API request latency, serialization included", ("method", "route", "status")
+)
+
+
+def render() -> str:
+    """
+    Every metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def resource_type(url: str) -> str:
+    # ".../resourceGroups/rg/providers/Microsoft.Network/virtualNetworks/v" -> "Microsoft.Network/virtualNetworks"
+    matches = _RESOURCE_TYPE.findall(url.split("?", 1)[0] + "?")
+    if not matches:
+        return "other"
+    kind = matches[-1]
+    return kind.split("/", 1)[1] if kind.lower().startswith("providers/") else kind
+
+
+class Span:
+    """
+    One timed operation. Recorded in the operation histogram and, with tracing on, written as a span record
+    (and an OpenTelemetry span when the API is installed) carrying trackingId and correlationId.
+    """
+
+    __slots__ = ("name", "span_id", "parent", "trackingId", "correlationId", "tags", "outcome", "_started", "_token")
+
+    def __init__(self, name: str, trackingId: str = None, **tags):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = _current_span.get()
+        self.trackingId = trackingId or (self.parent.trackingId if self.parent is not None else None)
+        self.correlationId = None
+        self.tags = tags
+        self.outcome = "ok"
+        self._started = 0.0
+        self._token = None
+
+    def set(self, key: str, value):
+        if key == "correlationId":
+            self.correlationId = value
+        else:
+            self.tags[key] = value
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            # A cancelled task (e.g. an API request whose client went away) did not fail
+            self.outcome = "cancelled" if issubclass(exc_type, asyncio.CancelledError) else "error"
+        self.finish(time.perf_counter() - self._started)
+        return False
+
+    def finish(self, seconds: float):
+        SPAN_SECONDS.observe(seconds, self.name, self.outcome)
+        if TRACING_ENABLED:
+            _emit(self, seconds)
+
+
+class _NullSpan:
+    def set(self, key: str, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, trackingId: str = None, **tags):
+    """
+    Context manager timing the block as a span, a shared no-op when instrumentation is off.
+    """
+    if not INSTRUMENTED:
+        return _NULL_SPAN
+    return Span(name, trackingId=trackingId, **tags)
+
+
+def traced(name: str):
+    """
+    Decorator running a core method (sync or async) inside a span tagged with self.trackingId
+    and the correlationid of the Result it returns.
+    """
+
+    def decorate(fn):
+        if asyncio.iscoroutinefunction(fn):
+
+            @functools.wraps(fn)
+            async def async_wrapper(self, *args, **kwargs):
+                if not INSTRUMENTED:
+                    return await fn(self, *args, **kwargs)
+                with Span(name, trackingId=getattr(self, "trackingId", None)) as current:
+                    result = await fn(self, *args, **kwargs)
+                    current.set("correlationId", getattr(result, "correlationid", None))
+                    return result
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            if not INSTRUMENTED:
+                return fn(self, *args, **kwargs)
+            with Span(name, trackingId=getattr(self, "trackingId", None)) as current:
+                result = fn(self, *args, **kwargs)
+                current.set("correlationId", getattr(result, "correlationid", None))
+                return result
+
+        return wrapper
+
+    return decorate
+
+
+def observe_request(method: str, url: str, resp, started: float, sent: float):
+    """
+    Record one ARM request: token time is sent - started, HTTP latency is now - sent (perf_counter seconds).
+    """
+    if not INSTRUMENTED:
+        return
+    now = time.perf_counter()
+    kind = resource_type(url)
+    TOKEN_SECONDS.observe(sent - started)
+    ARM_REQUEST_SECONDS.observe(now - sent, method, kind, str(resp.status_code))
+    if TRACING_ENABLED:
+        child = Span(f"arm.{method} {kind}", status=resp.status_code, tokenMs=round((sent - started) * 1000, 3))
+        child.correlationId = resp.headers.get("x-ms-correlation-request-id")
+        _emit(child, now - sent)
+
+
+def _emit(current: Span, seconds: float):
+    record = {
+        "name": current.name,
+        "spanId": current.span_id,
+        "parentId": current.parent.span_id if current.parent is not None else None,
+        "durationMs": round(seconds * 1000, 3),
+        "outcome": current.outcome,
+        **current.tags,
+    }
+    logClient("autocliTrace").info(
+        current.name, extra={"trackingId": current.trackingId, "correlationId": current.correlationId, "span": record}
+    )
+    if _otel_trace is not None:
+        end = time.time_ns()
+        otel_span = _otel_trace.get_tracer("autocli").start_span(current.name, start_time=end - int(seconds * 1e9))
+        otel_span.set_attributes(
+            {
+                key: str(value)
+                for key, value in (("trackingId", current.trackingId), ("correlationId", current.correlationId))
+                if value
+            }
+        )
+        otel_span.end(end_time=end)
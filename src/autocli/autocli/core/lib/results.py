@@ -0,0 +1,149 @@
+import json
+from dataclasses import dataclass, replace
+from typing import Union
+
+
+class Result:
+    """
+    Base of the result objects returned by the core classes.
+    Attributes keep the original response keys, serialisation happens once at the edge (CLI, API).
+    """
+
+    __slots__ = ()
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_json(self, indent: int = None) -> str:
+        return json.dumps(self.to_dict(), indent=indent)
+
+    def with_trackingId(self, trackingId: str) -> "Result":
+        """
+        Return this result stamped with trackingId, used when a coalesced call hands one result to several callers.
+        """
+        if getattr(self, "trackingId", trackingId) == trackingId:
+            return self
+        return replace(self, trackingId=trackingId)
+
+    def __str__(self) -> str:
+        # Compact, and only built when a log record is actually emitted
+        return self.to_json()
+
+
+def json_default(obj):
+    """
+    json.dumps default= hook for documents that embed Result objects.
+    """
+    if isinstance(obj, Result):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+@dataclass
+class ResourceGroupResult(Result):
+    """
+    Outcome of a Resource Group check or create.
+    """
+
+    __slots__ = ("name", "isProvisioned", "location", "id", "ReturnCode", "message", "trackingId", "correlationid")
+    name: str
+    isProvisioned: Union[bool, str]
+    location: str
+    id: str
+    ReturnCode: int
+    message: str
+    trackingId: str
+    correlationid: str
+
+
+@dataclass
+class VnetResult(Result):
+    """
+    Outcome of a Virtual Network check or create.
+    """
+
+    __slots__ = (
+        "name",
+        "addressPrefix",
+        "subnets",
+        "resourceGroup",
+        "isProvisioned",
+        "provisioningState",
+        "location",
+        "id",
+        "ReturnCode",
+        "message",
+        "trackingId",
+        "correlationid",
+    )
+    name: str
+    addressPrefix: str
+    subnets: list
+    resourceGroup: str
+    isProvisioned: str
+    provisioningState: str
+    location: str
+    id: str
+    ReturnCode: int
+    message: str
+    trackingId: str
+    correlationid: str
+
+
+@dataclass
+class ResourceGroupDeleteResult(Result):
+    """
+    Outcome of a Resource Group delete.
+    """
+
+    __slots__ = ("name", "isDeleted", "deletionState", "ReturnCode", "message", "trackingId", "correlationid")
+    name: str
+    isDeleted: str
+    deletionState: str
+    ReturnCode: int
+    message: str
+    trackingId: str
+    correlationid: str
+
+
+@dataclass
+class VnetDeleteResult(Result):
+    """
+    Outcome of a Virtual Network delete.
+    """
+
+    __slots__ = (
+        "name",
+        "resourceGroup",
+        "isDeleted",
+        "deletionState",
+        "ReturnCode",
+        "message",
+        "trackingId",
+        "correlationid",
+    )
+    name: str
+    resourceGroup: str
+    isDeleted: str
+    deletionState: str
+    ReturnCode: int
+    message: str
+    trackingId: str
+    correlationid: str
+
+
+@dataclass
+class PlanResult(Result):
+    """
+    Planned action for one resource: "create", "update", "noop", "conflict" or "unknown", with the changes behind it.
+    """
+
+    __slots__ = ("kind", "name", "resourceGroup", "action", "changes", "ReturnCode", "trackingId", "correlationid")
+    kind: str
+    name: str
+    resourceGroup: str
+    action: str
+    changes: list
+    ReturnCode: int
+    trackingId: str
+    correlationid: str
@@ -0,0 +1,80 @@
+import asyncio
+import threading
+import weakref
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls from threads: the first caller for a key runs fn,
+    everyone arriving while it is in flight waits and gets the same result (or exception).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class AsyncSingleFlight:
+    """
+    Asyncio counterpart of SingleFlight. The shared call runs as its own task, so a caller being
+    cancelled (e.g. a client disconnecting) does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls = weakref.WeakKeyDictionary()
+
+    async def do(self, key, fn):
+        """
+        fn is a zero-argument callable returning the awaitable to share.
+        """
+        loop = asyncio.get_running_loop()
+        calls = self._calls.setdefault(loop, {})
+        task = calls.get(key)
+        if task is None:
+            task = calls[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._done(calls, key, t))
+        return await asyncio.shield(task)
+
+    @staticmethod
+    def _done(calls: dict, key, task):
+        if calls.get(key) is task:
+            del calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved, the callers awaiting the shield re-raise it
+            task.exception()
+
+
+# Process-wide instances shared by the core classes
+flights = SingleFlight()
+async_flights = AsyncSingleFlight()
@@ -0,0 +1,193 @@
+import random
+import threading
+import time
+
+from autocli.core.lib.CONSTANTS import (
+    THROTTLE_BURST,
+    THROTTLE_DELETE_RATE,
+    THROTTLE_ENABLED,
+    THROTTLE_LOW_WATERMARK,
+    THROTTLE_MAX_BACKOFF,
+    THROTTLE_MAX_RETRIES,
+    THROTTLE_READ_RATE,
+    THROTTLE_WRITE_RATE,
+)
+from autocli.core.lib.log_util import logClient
+from autocli.core.lib.lro_util import retry_after
+from autocli.core.lib.metrics_util import ARM_RETRIES, THROTTLE_RATE_CUTS, THROTTLE_WAIT_SECONDS
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+RATELIMIT_HEADERS = {
+    "reads": "x-ms-ratelimit-remaining-subscription-reads",
+    "writes": "x-ms-ratelimit-remaining-subscription-writes",
+    "deletes": "x-ms-ratelimit-remaining-subscription-deletes",
+}
+
+
+def get_scheduler(subscription_id: str):
+    """
+    Return the ThrottleScheduler shared by every client of subscription_id, or None when AUTOCLI_THROTTLE=0.
+    ARM limits are per subscription, so all threads and event loops of the process pace against one budget.
+    """
+    if not THROTTLE_ENABLED:
+        return None
+    key = (subscription_id or "").lower()
+    scheduler = _schedulers.get(key)
+    if scheduler is None:
+        with _schedulers_lock:
+            scheduler = _schedulers.get(key)
+            if scheduler is None:
+                scheduler = _schedulers[key] = ThrottleScheduler()
+    return scheduler
+
+
+class TokenBucket:
+    """
+    Adaptive token bucket. Callers reserve a token and are told how long to wait for it, so the same bucket
+    paces threads (time.sleep) and coroutines (asyncio.sleep). The refill rate is cut in half when ARM reports
+    the remaining quota is low or answers 429, and recovers additively while quota is healthy.
+    """
+
+    def __init__(self, rate: float, burst: int, low_watermark: int = THROTTLE_LOW_WATERMARK):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = max(rate / 16, 0.1)
+        self.capacity = burst
+        self.low_watermark = low_watermark
+        self.tokens = float(burst)
+        self._updated = time.monotonic()
+        self._last_cut = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        # _updated sits in the future while the bucket is paused, nothing refills until then
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self._updated = now
+
+    def reserve(self) -> float:
+        """
+        Take one token and return the seconds to wait before using it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = max(self._updated - now, 0.0)
+            if self.tokens < 0:
+                wait += -self.tokens / self.rate
+            return wait
+
+    def _cut(self, now: float):
+        # At most one cut per second, a burst of low responses describes the same condition
+        if now - self._last_cut >= 1.0:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._last_cut = now
+
+    def observe(self, remaining: int):
+        """
+        Adapt to the remaining quota ARM reported on a response.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if remaining <= self.low_watermark:
+                self._cut(now)
+                self.tokens = min(self.tokens, float(remaining))
+            elif self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+    def pause(self, seconds: float):
+        """
+        Hold every caller for seconds after a 429 and slow the refill rate down.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._cut(now)
+            self.tokens = min(self.tokens, 0.0)
+            self._updated = max(self._updated, now + seconds)
+
+
+class ThrottleScheduler:
+    """
+    Paces ARM requests per category (reads, writes, deletes) from the x-ms-ratelimit-remaining-* headers
+    and decides when a 429 or 5xx response is retried.
+    """
+
+    def __init__(
+        self,
+        read_rate: float = THROTTLE_READ_RATE,
+        write_rate: float = THROTTLE_WRITE_RATE,
+        delete_rate: float = THROTTLE_DELETE_RATE,
+        burst: int = THROTTLE_BURST,
+        max_retries: int = THROTTLE_MAX_RETRIES,
+        max_backoff: float = THROTTLE_MAX_BACKOFF,
+    ):
+        self.buckets = {
+            "reads": TokenBucket(read_rate, burst),
+            "writes": TokenBucket(write_rate, burst),
+            "deletes": TokenBucket(delete_rate, burst),
+        }
+        self.max_retries = max_retries
+        self.max_backoff = max_backoff
+        self.logger = logClient("azureThrottle")
+
+    @staticmethod
+    def category(method: str) -> str:
+        method = method.upper()
+        if method in ("GET", "HEAD"):
+            return "reads"
+        if method == "DELETE":
+            return "deletes"
+        return "writes"
+
+    def before(self, method: str) -> float:
+        """
+        Reserve a slot for method and return the seconds to wait before sending it.
+        """
+        category = self.category(method)
+        wait = self.buckets[category].reserve()
+        if wait > 0:
+            THROTTLE_WAIT_SECONDS.inc(category, amount=wait)
+        return wait
+
+    def after(self, method: str, resp, attempt: int):
+        """
+        Feed the response back into the buckets, return the seconds to wait before a retry or None when
+        resp is final.
+        """
+        category = self.category(method)
+        bucket = self.buckets[category]
+        rate = bucket.rate
+        remaining = resp.headers.get(RATELIMIT_HEADERS[category])
+        if remaining is not None:
+            try:
+                bucket.observe(int(remaining))
+            except ValueError:
+                pass
+        if bucket.rate < rate:
+            THROTTLE_RATE_CUTS.inc(category)
+            rate = bucket.rate
+        if resp.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+            return None
+        ARM_RETRIES.inc(method, str(resp.status_code))
+        delay = retry_after(resp)
+        if delay is None:
+            ceiling = min(self.max_backoff, 2**attempt)
+            delay = random.uniform(0, ceiling)
+        delay = min(delay, self.max_backoff)
+        self.logger.warning(
+            f"ARM returned {resp.status_code} for {method} ({category}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+        )
+        if resp.status_code == 429:
+            # The paused bucket holds this retry, and every other caller, until Retry-After has passed
+            bucket.pause(delay)
+            if bucket.rate < rate:
+                THROTTLE_RATE_CUTS.inc(category)
+            return 0.0
+        return delay
@@ -0,0 +1,279 @@
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+
+from azure.core.credentials import AccessToken
+from azure.identity import DefaultAzureCredential
+
+from autocli.core.lib.CONSTANTS import (
+    ARM_SCOPE,
+    ARM_STATIC_TOKEN,
+    TOKEN_CACHE_ALLOW_UNENCRYPTED,
+    TOKEN_CACHE_ENABLED,
+    TOKEN_CACHE_PATH,
+    TOKEN_REFRESH_MARGIN,
+)
+from autocli.core.lib.log_util import debugClient
+
+try:
+    from msal_extensions import CrossPlatLock, FilePersistence, LockError, build_encrypted_persistence
+    from msal_extensions.persistence import PersistenceNotFound
+except ImportError:
+    build_encrypted_persistence = None
+
+# Tokens closer than this to expiry are never handed out, callers block on a refresh instead
+MIN_TOKEN_VALIDITY = 30
+
+_credential = None
+_credential_lock = threading.Lock()
+_token_caches = {}
+_token_caches_lock = threading.Lock()
+_token_store = None
+_token_store_lock = threading.Lock()
+_debug = debugClient("token")
+
+
+class StaticTokenCredential:
+    """
+    Credential handing out one fixed bearer token (AUTOCLI_ARM_TOKEN), e.g. for a mock ARM server.
+    """
+
+    def __init__(self, token: str, lifetime: int = 24 * 3600):
+        self.token = token
+        self.lifetime = lifetime
+
+    def get_token(self, *scopes, **kwargs) -> AccessToken:
+        return AccessToken(self.token, int(time.time()) + self.lifetime)
+
+
+def get_credential():
+    """
+    Return the process-wide DefaultAzureCredential (or StaticTokenCredential), building it on first use.
+    """
+    global _credential
+    if _credential is None:
+        with _credential_lock:
+            if _credential is None:
+                _credential = StaticTokenCredential(ARM_STATIC_TOKEN) if ARM_STATIC_TOKEN else DefaultAzureCredential()
+    return _credential
+
+
+def get_token_cache(scope: str = ARM_SCOPE) -> "TokenCache":
+    """
+    Return the process-wide TokenCache for a scope.
+    """
+    cache = _token_caches.get(scope)
+    if cache is None:
+        with _token_caches_lock:
+            cache = _token_caches.get(scope)
+            if cache is None:
+                cache = TokenCache(credential=get_credential(), scope=scope, store=get_token_store())
+                _token_caches[scope] = cache
+    return cache
+
+
+def get_token_store() -> "PersistentTokenStore":
+    """
+    Return the process-wide PersistentTokenStore, or None when it is turned off, not needed or unavailable.
+    """
+    global _token_store
+    if not TOKEN_CACHE_ENABLED or ARM_STATIC_TOKEN:
+        return None
+    if _token_store is None:
+        with _token_store_lock:
+            if _token_store is None:
+                try:
+                    _token_store = PersistentTokenStore()
+                except Exception as e:
+                    _debug.debug(f"Persistent token cache unavailable, tokens are fetched per process: {e}")
+                    _token_store = False
+    return _token_store or None
+
+
+def _identity_context() -> str:
+    # Whatever decides which identity DefaultAzureCredential signs in as: a new az login or az account set
+    # rewrites azureProfile.json, so its mtime retires every token cached for the previous account
+    profile = os.path.join(
+        os.getenv("AZURE_CONFIG_DIR", os.path.join(os.path.expanduser("~"), ".azure")), "azureProfile.json"
+    )
+    try:
+        profile_mtime = os.path.getmtime(profile)
+    except OSError:
+        profile_mtime = None
+    names = ("AZURE_TENANT_ID", "AZURE_CLIENT_ID", "AZURE_USERNAME", "AZURE_FEDERATED_TOKEN_FILE")
+    return json.dumps([os.getenv(name) for name in names] + [profile_mtime])
+
+
+class PersistentTokenStore:
+    """
+    Encrypted on-disk access tokens shared by every autocli process, so a short-lived CLI run reuses the ARM token
+    an earlier run or an API worker already fetched instead of spawning az again.
+    Entries are keyed by scope and identity context; a lock file lets one process fetch while the others wait.
+    """
+
+    def __init__(self, path: str = TOKEN_CACHE_PATH, allow_unencrypted: bool = TOKEN_CACHE_ALLOW_UNENCRYPTED):
+        if build_encrypted_persistence is None:
+            raise RuntimeError("msal-extensions is not installed")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock_path = path + ".lock"
+        try:
+            self.persistence = build_encrypted_persistence(path)
+        except Exception as e:
+            if not allow_unencrypted:
+                reason = str(e).splitlines()[0] if str(e) else type(e).__name__
+                raise RuntimeError(
+                    f"no encrypted storage ({reason}); set AUTOCLI_TOKEN_CACHE_ALLOW_UNENCRYPTED=1 for a plaintext file"
+                )
+            # Created user-only readable before the first token is written
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+            self.persistence = FilePersistence(path)
+        _debug.debug(
+            f"Persistent token cache at {path} ({'encrypted' if self.persistence.is_encrypted else 'plaintext'})"
+        )
+
+    @staticmethod
+    def key(scope: str) -> str:
+        return hashlib.sha256(f"{scope}|{_identity_context()}".encode()).hexdigest()
+
+    def _entries(self) -> dict:
+        try:
+            return json.loads(self.persistence.load() or "{}")
+        except PersistenceNotFound:
+            return {}
+
+    def load(self, key: str, min_validity: float):
+        """
+        Return the stored AccessToken if it stays valid for at least min_validity seconds, else None.
+        """
+        entry = self._entries().get(key)
+        if entry is None or entry["expires_on"] - time.time() <= min_validity:
+            return None
+        return AccessToken(entry["token"], entry["expires_on"])
+
+    def save(self, key: str, token):
+        now = time.time()
+        entries = {name: entry for name, entry in self._entries().items() if entry["expires_on"] > now}
+        entries[key] = {"token": token.token, "expires_on": token.expires_on}
+        self.persistence.save(json.dumps(entries))
+
+    @contextlib.contextmanager
+    def lock(self):
+        """
+        Hold the cross-process fetch lock; a lock left by a killed process only costs its timeout, then is ignored.
+        """
+        lock = CrossPlatLock(self.lock_path)
+        try:
+            lock.__enter__()
+        except LockError as e:
+            _debug.debug(f"Token cache lock busy ({e}), fetching without it")
+            yield
+            return
+        try:
+            yield
+        finally:
+            lock.__exit__(None, None, None)
+
+
+class TokenCache:
+    """
+    Class that caches an access token and refreshes it before it expires.
+    With a PersistentTokenStore, tokens are also shared with the other autocli processes.
+    """
+
+    def __init__(self, credential, scope: str = ARM_SCOPE, refresh_margin: int = TOKEN_REFRESH_MARGIN, store=None):
+        self.credential = credential
+        self.scope = scope
+        self.refresh_margin = refresh_margin
+        self.store = store
+        self._token = None
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def get_token(self):
+        """
+        Return a cached AccessToken, only calling the credential when none is usable.
+        """
+        token = self.cached_token()
+        if token is not None:
+            return token
+        return self._refresh(force=False)
+
+    def cached_token(self):
+        """
+        Return the cached AccessToken if it is still usable, without ever calling the credential.
+        """
+        token = self._token
+        if token is not None and token.expires_on - time.time() > MIN_TOKEN_VALIDITY:
+            return token
+        return None
+
+    def _refresh(self, force: bool):
+        # Concurrent callers queue on the lock and reuse the token fetched by the first one
+        with self._lock:
+            token = self._token
+            remaining = token.expires_on - time.time() if token is not None else 0
+            if force and remaining > self.refresh_margin:
+                return token
+            if not force and remaining > MIN_TOKEN_VALIDITY:
+                return token
+            token = self._fetch(self.refresh_margin if force else MIN_TOKEN_VALIDITY)
+            self._token = token
+            self._schedule_refresh(token)
+            return token
+
+    def _fetch(self, min_validity: float):
+        if self.store is None:
+            return self.credential.get_token(self.scope)
+        key = self.store.key(self.scope)
+        token = self._stored(key, min_validity)
+        if token is not None:
+            return token
+        with self.store.lock():
+            # Another process may have fetched one while this one waited for the lock
+            token = self._stored(key, min_validity)
+            if token is not None:
+                return token
+            return self._fetch_and_store(key)
+
+    def _stored(self, key: str, min_validity: float):
+        try:
+            token = self.store.load(key, min_validity)
+        except Exception as e:
+            _debug.debug(f"Token cache read failed: {e}")
+            return None
+        if token is not None:
+            _debug.debug(f"Token cache hit for {self.scope}, valid {int(token.expires_on - time.time())}s")
+        return token
+
+    def _fetch_and_store(self, key: str):
+        _debug.debug(f"Token cache miss for {self.scope}, asking {type(self.credential).__name__}")
+        started = time.perf_counter()
+        token = self.credential.get_token(self.scope)
+        _debug.debug(f"Token fetched in {time.perf_counter() - started:.2f}s")
+        try:
+            self.store.save(key, token)
+        except Exception as e:
+            _debug.debug(f"Token cache write failed: {e}")
+        return token
+
+    def _schedule_refresh(self, token):
+        if self._timer is not None:
+            self._timer.cancel()
+        remaining = token.expires_on - time.time()
+        delay = remaining - self.refresh_margin
+        if delay <= 0:
+            # Short-lived token, refresh halfway through its lifetime instead
+            delay = max(remaining / 2, 1)
+        self._timer = threading.Timer(delay, self._background_refresh)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _background_refresh(self):
+        try:
+            self._refresh(force=True)
+        except Exception:
+            # Leave the current token in place, the next get_token call refreshes synchronously
+            pass
@@ -0,0 +1,193 @@
+import bisect
+import ipaddress
+import threading
+import time
+
+from autocli.core.lib.CONSTANTS import IPAM_LEASE_TTL, IPAM_POOLS, IPAM_RESERVED, IPAM_SYNC_INTERVAL
+
+_allocators = {}
+_allocators_lock = threading.Lock()
+
+
+def get_allocator(scope: str) -> "IpamAllocator":
+    """
+    Return the process-wide IpamAllocator for an address space (see ledger_scope), built from the configured pools on first use.
+    """
+    allocator = _allocators.get(scope)
+    if allocator is None:
+        with _allocators_lock:
+            allocator = _allocators.get(scope)
+            if allocator is None:
+                allocator = IpamAllocator(pools=IPAM_POOLS, reserved=IPAM_RESERVED)
+                _allocators[scope] = allocator
+    return allocator
+
+
+class IpamAllocator:
+    """
+    IPv4 address allocator over a set of pools.
+    Free space is kept as aligned CIDR blocks in one sorted list per prefix length (a buddy allocator),
+    so a best-fit allocation of any prefix length is a bisect per length instead of a scan of every VNet.
+    Prefixes handed out (or held) here stay taken across syncs until the inventory shows them or hold_ttl passes.
+    """
+
+    def __init__(
+        self,
+        pools: list,
+        reserved: list = None,
+        sync_interval: float = IPAM_SYNC_INTERVAL,
+        hold_ttl: float = IPAM_LEASE_TTL,
+    ):
+        self._pools = set()
+        for pool in pools:
+            network = ipaddress.IPv4Network(pool)
+            self._pools.add((int(network.network_address), network.prefixlen))
+        self._reserved = list(reserved or [])
+        # prefix -> time it was handed out, for creates whose VNet the inventory does not show yet
+        self._held = {}
+        self._lock = threading.Lock()
+        self.sync_interval = sync_interval
+        self.hold_ttl = hold_ttl
+        self.synced_at = None
+        self._reset(self._reserved)
+
+    def _reset(self, used):
+        """
+        Rebuild the free lists from the pools minus every used prefix. The caller holds the lock (or owns self).
+        """
+        self._free = {length: [] for length in range(33)}
+        self._free_set = {length: set() for length in range(33)}
+        for address, length in self._pools:
+            self._add_free(address, length)
+        for prefix in used:
+            try:
+                self._carve(ipaddress.IPv4Network(prefix, strict=False))
+            except ValueError:
+                continue
+
+    def _add_free(self, address: int, length: int):
+        bisect.insort(self._free[length], address)
+        self._free_set[length].add(address)
+
+    def _remove_free(self, address: int, length: int):
+        blocks = self._free[length]
+        del blocks[bisect.bisect_left(blocks, address)]
+        self._free_set[length].discard(address)
+
+    @staticmethod
+    def _size(length: int) -> int:
+        return 1 << (32 - length)
+
+    def _split(self, address: int, length: int, target: int, target_length: int):
+        """
+        Split the free block (address, length) down to (target, target_length), returning the other halves to the free lists.
+        """
+        while length < target_length:
+            length += 1
+            half = self._size(length)
+            if target >= address + half:
+                self._add_free(address, length)
+                address += half
+            else:
+                self._add_free(address + half, length)
+
+    def allocate(self, prefix_length: int) -> str:
+        """
+        Allocate the lowest free /prefix_length from the smallest free block that can hold it.
+        """
+        with self._lock:
+            for length in range(prefix_length, -1, -1):
+                if self._free[length]:
+                    address = self._free[length][0]
+                    self._remove_free(address, length)
+                    self._split(address, length, address, prefix_length)
+                    prefix = str(ipaddress.IPv4Network((address, prefix_length)))
+                    self._held[prefix] = time.monotonic()
+                    return prefix
+        raise ValueError(f"No free /{prefix_length} left in IPAM pools")
+
+    def _carve(self, network: ipaddress.IPv4Network):
+        """
+        Take network out of the free space, whatever part of it is free. The caller holds the lock.
+        """
+        start = int(network.network_address)
+        length = network.prefixlen
+        # Either one free block contains the prefix...
+        for candidate_length in range(length, -1, -1):
+            candidate = start & ~(self._size(candidate_length) - 1)
+            if candidate in self._free_set[candidate_length]:
+                self._remove_free(candidate, candidate_length)
+                self._split(candidate, candidate_length, start, length)
+                return
+        # ...or the prefix covers any number of smaller free blocks
+        end = start + self._size(length)
+        for candidate_length in range(length + 1, 33):
+            blocks = self._free[candidate_length]
+            low = bisect.bisect_left(blocks, start)
+            high = bisect.bisect_left(blocks, end)
+            for address in blocks[low:high]:
+                self._free_set[candidate_length].discard(address)
+            del blocks[low:high]
+
+    def mark_used(self, prefix: str, hold: bool = False):
+        """
+        Remove a prefix that is in use (or reserved) from the free space, overlapping prefixes are fine.
+        hold keeps it taken across syncs like an allocation, for a VNet about to be created with it.
+        """
+        network = ipaddress.ip_network(prefix, strict=False)
+        if network.version != 4:
+            # An IPv6 prefix of a dual-stack VNet or subnet, outside the space allocated here
+            return
+        with self._lock:
+            self._carve(network)
+            if hold:
+                self._held[str(network)] = time.monotonic()
+
+    def release(self, prefix: str):
+        """
+        Return a prefix to the free space, merging it with its free buddies. Whatever part of it is already free
+        is taken out first, so releasing a prefix this allocator never handed out cannot create overlapping blocks.
+        """
+        network = ipaddress.ip_network(prefix, strict=False)
+        if network.version != 4:
+            return
+        address = int(network.network_address)
+        length = network.prefixlen
+        with self._lock:
+            self._held.pop(str(network), None)
+            # Outside the pools or on a reserved range, e.g. a VNet created by hand: never ours to hand out
+            if not self._allocatable(network):
+                return
+            self._carve(network)
+            while (address, length) not in self._pools and length > 0:
+                buddy = address ^ self._size(length)
+                if buddy not in self._free_set[length]:
+                    break
+                self._remove_free(buddy, length)
+                address = min(address, buddy)
+                length -= 1
+            self._add_free(address, length)
+
+    def _allocatable(self, network: ipaddress.IPv4Network) -> bool:
+        inside = any(network.subnet_of(ipaddress.IPv4Network((address, length))) for address, length in self._pools)
+        return inside and not any(network.overlaps(ipaddress.IPv4Network(r, strict=False)) for r in self._reserved)
+
+    def needs_sync(self) -> bool:
+        return self.synced_at is None or time.monotonic() - self.synced_at > self.sync_interval
+
+    def sync(self, prefixes):
+        """
+        Rebuild the used space from the inventory: every prefix it lists, the reserved ranges and the prefixes
+        handed out here that it does not show yet. Prefixes of VNets deleted elsewhere become free again.
+        """
+        prefixes = list(prefixes)
+        now = time.monotonic()
+        with self._lock:
+            for prefix in prefixes:
+                try:
+                    self._held.pop(str(ipaddress.IPv4Network(prefix, strict=False)), None)
+                except ValueError:
+                    continue
+            self._held = {prefix: at for prefix, at in self._held.items() if now - at < self.hold_ttl}
+            self._reset(self._reserved + prefixes + list(self._held))
+        self.synced_at = now
@@ -0,0 +1,185 @@
+import ipaddress
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from autocli.core.lib.CONSTANTS import IPAM_LEASE_TTL, IPAM_LEDGER_ENABLED, IPAM_LEDGER_PATH, IPAM_SCOPE
+
+_ledger = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger():
+    """
+    Return the process-wide PrefixLedger, or None when AUTOCLI_IPAM_LEDGER=0.
+    """
+    global _ledger
+    if not IPAM_LEDGER_ENABLED:
+        return None
+    if _ledger is None:
+        with _ledger_lock:
+            if _ledger is None:
+                _ledger = PrefixLedger()
+    return _ledger
+
+
+def ledger_scope(subscription_id: str) -> str:
+    """
+    Address space a subscription allocates from: shared by all subscriptions under AUTOCLI_IPAM_SCOPE=global.
+    Also keys the in-process IpamAllocator.
+    """
+    return "global" if IPAM_SCOPE == "global" else (subscription_id or "").lower()
+
+
+def lease_owner(subscription_id: str, rg_name: str, vnet_name: str) -> str:
+    """
+    Ledger owner of a VNet's prefixes, the same for every process creating or deleting it.
+    """
+    return f"{subscription_id}/{rg_name}/{vnet_name}".lower()
+
+
+def _bounds(prefix: str):
+    network = ipaddress.IPv4Network(prefix, strict=False)
+    start = int(network.network_address)
+    return start, start + network.num_addresses
+
+
+class PrefixLedger:
+    """
+    SQLite ledger of VNet address prefixes, leased before the PUT and then committed or released.
+    Every lease is taken inside a BEGIN IMMEDIATE transaction, so processes sharing the ledger file
+    can never hand out overlapping prefixes. Leases that are never committed expire after lease_ttl.
+    """
+
+    def __init__(self, path: str = IPAM_LEDGER_PATH, lease_ttl: float = IPAM_LEASE_TTL):
+        self.path = path
+        self.lease_ttl = lease_ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "scope TEXT NOT NULL, prefix TEXT NOT NULL, start INTEGER NOT NULL, end INTEGER NOT NULL, "
+                "owner TEXT NOT NULL, state TEXT NOT NULL, expires_at REAL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (scope, prefix))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS leases_owner ON leases (scope, owner)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode, transactions are opened explicitly with BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Hold the ledger's write lock for the duration of the block.
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    @staticmethod
+    def _expire(conn: sqlite3.Connection, scope: str):
+        conn.execute("DELETE FROM leases WHERE scope = ? AND state = 'leased' AND expires_at < ?", (scope, time.time()))
+
+    def lease(self, scope: str, owner: str, choose) -> str:
+        """
+        Lease a prefix for owner. choose(taken) is called with every prefix leased or committed in scope
+        and returns a free one; an owner that already holds a live lease gets it back instead.
+        """
+        with self._transaction() as conn:
+            self._expire(conn, scope)
+            rows = conn.execute("SELECT prefix, owner FROM leases WHERE scope = ?", (scope,)).fetchall()
+            for prefix, holder in rows:
+                if holder == owner:
+                    self._upsert(conn, scope, owner, prefix)
+                    return prefix
+            prefix = choose([prefix for prefix, _ in rows])
+            conflict = self._conflict(conn, scope, owner, prefix)
+            if conflict is not None:
+                raise ValueError(f"Allocated prefix {prefix} overlaps {conflict[0]} leased by {conflict[1]}")
+            self._upsert(conn, scope, owner, prefix)
+            return prefix
+
+    def reserve(self, scope: str, owner: str, prefix: str, force: bool = False):
+        """
+        Lease a specific prefix (explicit or already on the VNet). Raises ValueError when it overlaps
+        a prefix held by another owner, unless force is set.
+        """
+        with self._transaction() as conn:
+            self._expire(conn, scope)
+            conflict = self._conflict(conn, scope, owner, prefix)
+            if conflict is not None and not force:
+                raise ValueError(f"Address prefix {prefix} overlaps {conflict[0]} leased by {conflict[1]}")
+            self._upsert(conn, scope, owner, prefix)
+
+    @staticmethod
+    def _conflict(conn: sqlite3.Connection, scope: str, owner: str, prefix: str):
+        start, end = _bounds(prefix)
+        return conn.execute(
+            "SELECT prefix, owner FROM leases WHERE scope = ? AND owner != ? AND start < ? AND end > ? LIMIT 1",
+            (scope, owner, end, start),
+        ).fetchone()
+
+    def _upsert(self, conn: sqlite3.Connection, scope: str, owner: str, prefix: str):
+        start, end = _bounds(prefix)
+        now = time.time()
+        conn.execute(
+            "INSERT INTO leases (scope, prefix, start, end, owner, state, expires_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, 'leased', ?, ?) "
+            "ON CONFLICT (scope, prefix) DO UPDATE SET owner = excluded.owner, "
+            "expires_at = CASE WHEN state = 'committed' THEN NULL ELSE excluded.expires_at END, "
+            "updated_at = excluded.updated_at",
+            (scope, prefix, start, end, owner, now + self.lease_ttl, now),
+        )
+
+    def commit(self, scope: str, owner: str, prefix: str):
+        """
+        Keep the prefix for good once the VNet holds it.
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE leases SET state = 'committed', expires_at = NULL, updated_at = ? "
+                "WHERE scope = ? AND prefix = ? AND owner = ?",
+                (time.time(), scope, prefix, owner),
+            )
+
+    def release(self, scope: str, owner: str, prefix: str = None) -> list:
+        """
+        Drop owner's uncommitted lease on prefix, or every prefix owner holds (e.g. after its VNet was deleted).
+        Returns the prefixes dropped.
+        """
+        if prefix is None:
+            where, params = "scope = ? AND owner = ?", (scope, owner)
+        else:
+            where, params = "scope = ? AND prefix = ? AND owner = ? AND state = 'leased'", (scope, prefix, owner)
+        with self._transaction() as conn:
+            rows = conn.execute(f"SELECT prefix FROM leases WHERE {where}", params).fetchall()
+            conn.execute(f"DELETE FROM leases WHERE {where}", params)
+        return [prefix for (prefix,) in rows]
+
+    def prune(self, scope: str, live_prefixes, before: float):
+        """
+        Drop committed prefixes that were last touched before a full inventory listing started
+        and that the listing no longer shows (their VNet was deleted outside this tool).
+        """
+        live = set(live_prefixes)
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT prefix FROM leases WHERE scope = ? AND state = 'committed' AND updated_at < ?", (scope, before)
+            ).fetchall()
+            stale = [(scope, prefix) for (prefix,) in rows if prefix not in live]
+            if stale:
+                conn.executemany("DELETE FROM leases WHERE scope = ? AND prefix = ?", stale)
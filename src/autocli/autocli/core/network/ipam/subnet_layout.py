@@ -0,0 +1,75 @@
+import ipaddress
+
+from autocli.core.lib.CONSTANTS import SUBNET_MAX_PREFIX_LENGTH
+from .ipam_allocator import IpamAllocator
+
+
+def parse_subnets(specs) -> list:
+    """
+    Normalise subnet requests to [(name, prefix_length)].
+    Each spec is "name:length", a bare length ("26", 26), a [name, length] pair or {"name", "prefixLength"};
+    unnamed subnets are called subnet<position> so repeating a request names them the same way.
+    """
+    subnets = []
+    for position, spec in enumerate(specs or []):
+        if isinstance(spec, dict):
+            name, length = spec.get("name"), spec.get("prefixLength")
+        elif isinstance(spec, (list, tuple)):
+            name, length = spec
+        elif isinstance(spec, str) and ":" in spec:
+            name, length = spec.rsplit(":", 1)
+        else:
+            name, length = None, spec
+        try:
+            length = int(str(length).lstrip("/"))
+        except ValueError:
+            raise ValueError(f"Subnet size must be a prefix length like 24 or /24, got {spec!r}")
+        if not 0 < length <= SUBNET_MAX_PREFIX_LENGTH:
+            raise ValueError(f"Subnet prefix length must be between /1 and /{SUBNET_MAX_PREFIX_LENGTH}, got /{length}")
+        subnets.append((name or f"subnet{position}", length))
+    names = [name.lower() for name, _ in subnets]
+    if len(set(names)) != len(names):
+        raise ValueError("Subnet names must be unique")
+    return subnets
+
+
+def subnet_prefixes(subnet: dict) -> list:
+    properties = subnet.get("properties", {})
+    if properties.get("addressPrefix"):
+        return [properties["addressPrefix"]]
+    return properties.get("addressPrefixes", [])
+
+
+def summarize_subnets(vnet: dict) -> list:
+    """
+    Return [{"name", "addressPrefix"}] for the subnets embedded in a VNet body.
+    """
+    return [
+        {"name": subnet.get("name"), "addressPrefix": ", ".join(subnet_prefixes(subnet))}
+        for subnet in (vnet or {}).get("properties", {}).get("subnets", [])
+    ]
+
+
+def layout_subnets(address_prefixes: list, subnets: list, existing: list = None) -> list:
+    """
+    Pack the requested (name, prefix_length) subnets into the VNet address space around the existing
+    subnet bodies and return the subnet bodies to add. Subnets that already exist by name are left alone.
+    Largest first, so the buddy allocator places them back to back with no alignment holes.
+    """
+    existing = existing or []
+    # Subnets are carved from the IPv4 address space only, a dual-stack VNet's IPv6 prefixes are left alone
+    pools = [ipaddress.ip_network(prefix, strict=False) for prefix in address_prefixes]
+    allocator = IpamAllocator(pools=[str(pool) for pool in pools if pool.version == 4])
+    for subnet in existing:
+        for prefix in subnet_prefixes(subnet):
+            allocator.mark_used(prefix)
+    existing_names = {subnet.get("name", "").lower() for subnet in existing}
+    missing = [(name, length) for name, length in subnets if name.lower() not in existing_names]
+    carved = {}
+    for name, length in sorted(missing, key=lambda subnet: subnet[1]):
+        try:
+            carved[name] = allocator.allocate(length)
+        except ValueError:
+            raise ValueError(f"Subnet {name} (/{length}) does not fit in {', '.join(address_prefixes)}")
+    # Keep the requested order in the body
+    return [{"name": name, "properties": {"addressPrefix": carved[name]}} for name, _ in missing]
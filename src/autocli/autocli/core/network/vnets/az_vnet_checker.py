@@ -1,9 +1,13 @@
-import json
-import time
-
-from ...rg.az_rg_checker import ResourceGroupChecker
+from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION
+from ...rg.az_rg_checker import AsyncResourceGroupChecker, ResourceGroupChecker
 from ...lib.azure_clients import AzureClients
+from ...lib.async_azure_clients import AsyncAzureClients
 from ...lib.log_util import logClient
+from ...lib.metrics_util import traced
+from ...lib.results import ResourceGroupResult, VnetResult
+from ...lib.singleflight_util import async_flights, flights
+from ..ipam.subnet_layout import summarize_subnets
+from ...lib.lro_util import AsyncLroPoller, LroPoller
 
 
 class VnetChecker:
@@ -11,151 +15,245 @@ class VnetChecker:
     Class to Check if virtual network resources are available using Azure REST API.
     """
 
-    def __init__(self, location: str, rg_name: str, vnet_name: str, trackingId: str) -> None:
+    poll_timeout = 30  # seconds
+
+    def __init__(
+        self, location: str, rg_name: str, vnet_name: str, trackingId: str, subscription_id: str = None
+    ) -> None:
         self.trackingId = str(trackingId)
         self.location = location
         self.rg_name = rg_name
         self.vnet_name = vnet_name
-        self.logger = logClient("azureVNETchecker")
-        self.rg_check = ResourceGroupChecker(
-            location=self.location, rg_name=self.rg_name, trackingId=self.trackingId
-        ).rg_check()
+        self.logger = logClient("azureVNETchecker", trackingId=trackingId)
+        self.subscription_id = subscription_id or DEV_AZURE_SUBSCRIPTION
+        self.api_client = AzureClients(self.subscription_id)
+        self._rg_result = None
+
+    @property
+    def rg_check(self) -> ResourceGroupResult:
+        """
+        Resource Group check, only run when first needed.
+        """
+        if self._rg_result is None:
+            self._rg_result = ResourceGroupChecker(
+                location=self.location,
+                rg_name=self.rg_name,
+                trackingId=self.trackingId,
+                subscription_id=self.subscription_id,
+            ).rg_check()
+        return self._rg_result
+
+    @traced("vnet_check")
+    def vnet_check(self) -> VnetResult:
+        # Concurrent checks of the same VNet share one lookup and one polling loop
+        return flights.do(self._flight_key(), self._vnet_check).with_trackingId(self.trackingId)
 
-    def vnet_check(self) -> dict:
+    def _flight_key(self) -> tuple:
+        return ("vnet_check", self.api_client.subscription, self.rg_name.lower(), self.vnet_name.lower(), self.location)
+
+    def _vnet_check(self) -> VnetResult:
         rg_name = self.rg_name
-        location = self.location
-        logger = self.logger
         vnet_name = self.vnet_name
-        trackingId = self.trackingId
-        rg_exist = self.rg_check
-        rg_exist = json.loads(rg_exist)
-        correlation_id = rg_exist["correlationid"]
-
-        logger.info(f"""starting Virtual Network Check Operation for VNET: {vnet_name} |  trackingId: {trackingId}""")
+        self._log_start()
+        try:
+            # Use REST API to check VNET
+            resp = self.api_client.az_vnet_api_client(group_name=rg_name, vnet_name=vnet_name, requestType="check")
+            if resp.status_code == 200:
+                # The VNet exists so its RG does too, no RG lookup is sent
+                # Wait for provisioningState Succeeded
+                poller = LroPoller(self.api_client, timeout=self.poll_timeout, logger=self.logger)
+                vnet_status, _ = poller.poll_resource(
+                    lambda: self.api_client.az_vnet_api_client(
+                        group_name=rg_name, vnet_name=vnet_name, requestType="check"
+                    ),
+                    body=resp.json(),
+                    stop_on_missing=True,
+                )
+                vnet_status, state, vnet_prefix = self._vnet_state(vnet_status)
+                return self._found_response(resp, vnet_status, state, vnet_prefix)
+            # Only a VNet that was not found needs its RG looked up
+            rg_exist = self._rg_located(self.rg_check)
+        except Exception as e:
+            return self._exception_response(e)
         # Check if RG exists
-        if rg_exist["isProvisioned"]:
-            logger.info(
-                f"Resource Group: {rg_name} has been located | correlationId: {correlation_id} | trackingId {trackingId}"
+        if rg_exist.isProvisioned:
+            return self._lookup_response(resp)
+        return self._rg_missing_response()
+
+    def _log_start(self):
+        self.logger.info(
+            f"""starting Virtual Network Check Operation for VNET: {self.vnet_name} |  trackingId: {self.trackingId}"""
+        )
+
+    def _rg_located(self, rg_exist: ResourceGroupResult) -> ResourceGroupResult:
+        if rg_exist.isProvisioned:
+            self.logger.info(
+                f"Resource Group: {self.rg_name} has been located | correlationId: {rg_exist.correlationid} | trackingId {self.trackingId}"
+            )
+        return rg_exist
+
+    def _vnet_state(self, vnet_status: dict):
+        """
+        Extract (vnet_status, provisioningState, first address prefix) from a VNet GET body.
+        """
+        state = vnet_status.get("properties", {}).get("provisioningState")
+        address_prefixes = vnet_status.get("properties", {}).get("addressSpace", {}).get("addressPrefixes", [])
+        vnet_prefix = address_prefixes[0] if address_prefixes else ""
+        return vnet_status, state, vnet_prefix
+
+    def _found_response(self, resp, vnet_status, state, vnet_prefix) -> VnetResult:
+        vnet_name = self.vnet_name
+        response = VnetResult(
+            name=vnet_status.get("name") if vnet_status else vnet_name,
+            addressPrefix=vnet_prefix,
+            subnets=summarize_subnets(vnet_status),
+            resourceGroup=self.rg_name,
+            isProvisioned="Yes" if state == "Succeeded" else "No",
+            provisioningState=state,
+            location=vnet_status.get("location") if vnet_status else self.location,
+            id=vnet_status.get("id") if vnet_status else "",
+            ReturnCode=resp.status_code,
+            message=f"Virtual Network: {vnet_name} was created with provisioningState: {state}",
+            trackingId=self.trackingId,
+            correlationid=resp.headers.get("x-ms-correlation-request-id", ""),
+        )
+        self.logger.info(response)
+        return response
+
+    def _lookup_response(self, resp) -> VnetResult:
+        """
+        Build the response for a VNet GET that did not return 200.
+        """
+        vnet_name = self.vnet_name
+        correlation_id = resp.headers.get("x-ms-correlation-request-id", "")
+        if resp.status_code == 404:
+            response = VnetResult(
+                name=vnet_name,
+                addressPrefix="",
+                subnets=[],
+                resourceGroup=self.rg_name,
+                isProvisioned="No",
+                provisioningState="NotFound",
+                location=self.location,
+                id="",
+                ReturnCode=404,
+                message=f"Virtual Network: {vnet_name} Not found.",
+                trackingId=self.trackingId,
+                correlationid=correlation_id,
             )
-            logger.info(f"Will now check if VNET: {vnet_name} exists or not   | trackingId {trackingId}")
-            try:
-                # Use REST API to check VNET
-                resp = AzureClients().az_vnet_api_client(group_name=rg_name, vnet_name=vnet_name, requestType="check")
-                correlation_id = resp.headers.get("x-ms-correlation-request-id", "")
-                if resp.status_code == 200:
-                    results = resp.json()
-                    # Poll for provisioningState Succeeded
-                    poll_attempts = 15
-                    poll_interval = 2  # seconds
-                    vnet_status = results
-                    state = vnet_status.get("properties", {}).get("provisioningState")
-                    address_prefixes = (
-                        vnet_status.get("properties", {}).get("addressSpace", {}).get("addressPrefixes", [])
-                    )
-                    vnet_prefix = address_prefixes[0] if address_prefixes else ""
-                    for _ in range(poll_attempts):
-                        if state == "Succeeded":
-                            break
-                        elif state in ("Failed", "Canceled"):
-                            logger.error(f"Provisioning failed: {state}")
-                            break
-                        time.sleep(poll_interval)
-                        status_resp = AzureClients().az_vnet_api_client(
-                            group_name=rg_name, vnet_name=vnet_name, requestType="check"
-                        )
-                        if status_resp.status_code == 200:
-                            vnet_status = status_resp.json()
-                            state = vnet_status.get("properties", {}).get("provisioningState")
-                            address_prefixes = (
-                                vnet_status.get("properties", {}).get("addressSpace", {}).get("addressPrefixes", [])
-                            )
-                            vnet_prefix = address_prefixes[0] if address_prefixes else ""
-                        else:
-                            break
-
-                    response = {
-                        "name": vnet_status.get("name") if vnet_status else vnet_name,
-                        "addressPrefix": vnet_prefix,
-                        "resourceGroup": rg_name,
-                        "isProvisioned": "Yes" if state == "Succeeded" else "No",
-                        "provisioningState": state,
-                        "location": vnet_status.get("location") if vnet_status else location,
-                        "id": vnet_status.get("id") if vnet_status else "",
-                        "ReturnCode": resp.status_code,
-                        "message": f"Virtual Network: {vnet_name} was created with provisioningState: {state}",
-                        "trackingId": trackingId,
-                        "correlationid": correlation_id,
-                    }
-                    response = json.dumps(response, indent=4)
-                    logger.info(response)
-                    return response
-                elif resp.status_code == 404:
-                    response = {
-                        "name": vnet_name,
-                        "addressPrefix": "",
-                        "resourceGroup": rg_name,
-                        "isProvisioned": "No",
-                        "provisioningState": "NotFound",
-                        "location": location,
-                        "id": "",
-                        "ReturnCode": 404,
-                        "message": f"Virtual Network: {vnet_name} Not found.",
-                        "trackingId": trackingId,
-                        "correlationid": correlation_id,
-                    }
-                    response = json.dumps(response, indent=4)
-                    logger.info(response)
-                    return response
-                else:
-                    response = {
-                        "name": vnet_name,
-                        "addressPrefix": "",
-                        "resourceGroup": rg_name,
-                        "isProvisioned": "Unknown",
-                        "provisioningState": "Unknown",
-                        "location": location,
-                        "id": "",
-                        "ReturnCode": resp.status_code,
-                        "message": f"Issue checking for Virtual Network: {vnet_name}: {resp.text}",
-                        "trackingId": trackingId,
-                        "correlationid": correlation_id,
-                    }
-                    response = json.dumps(response, indent=4)
-                    logger.info(response)
-                    return response
-            except Exception as e:
-                logger.error(f"Issue checking for Virtual Network: {vnet_name}:\n{e}")
-                response = {
-                    "name": vnet_name,
-                    "addressPrefix": "",
-                    "resourceGroup": rg_name,
-                    "isProvisioned": "Unknown",
-                    "provisioningState": "Unknown",
-                    "location": location,
-                    "id": "",
-                    "ReturnCode": 500,
-                    "message": f"Issue checking for Virtual Network: {vnet_name}:\n{e}",
-                    "trackingId": trackingId,
-                    "correlationid": "",
-                }
-                response = json.dumps(response, indent=4)
-                logger.info(response)
-                return response
         else:
-            logger.error(f"Resource Group: {rg_name} not found.")
-            response = {
-                "name": vnet_name,
-                "addressPrefix": "",
-                "resourceGroup": rg_name,
-                "isProvisioned": "Unknown",
-                "provisioningState": "Unknown",
-                "location": location,
-                "id": "",
-                "ReturnCode": 404,
-                "message": f"Resource Group: {rg_name} not found.",
-                "trackingId": trackingId,
-                "correlationid": "",
-            }
-            response = json.dumps(response, indent=4)
-            logger.info(response)
-            return response
+            response = VnetResult(
+                name=vnet_name,
+                addressPrefix="",
+                subnets=[],
+                resourceGroup=self.rg_name,
+                isProvisioned="Unknown",
+                provisioningState="Unknown",
+                location=self.location,
+                id="",
+                ReturnCode=resp.status_code,
+                message=f"Issue checking for Virtual Network: {vnet_name}: {resp.text}",
+                trackingId=self.trackingId,
+                correlationid=correlation_id,
+            )
+        self.logger.info(response)
+        return response
+
+    def _exception_response(self, e: Exception) -> VnetResult:
+        vnet_name = self.vnet_name
+        self.logger.error(f"Issue checking for Virtual Network: {vnet_name}:\n{e}")
+        response = VnetResult(
+            name=vnet_name,
+            addressPrefix="",
+            subnets=[],
+            resourceGroup=self.rg_name,
+            isProvisioned="Unknown",
+            provisioningState="Unknown",
+            location=self.location,
+            id="",
+            ReturnCode=500,
+            message=f"Issue checking for Virtual Network: {vnet_name}:\n{e}",
+            trackingId=self.trackingId,
+            correlationid="",
+        )
+        self.logger.info(response)
+        return response
+
+    def _rg_missing_response(self) -> VnetResult:
+        rg_name = self.rg_name
+        self.logger.error(f"Resource Group: {rg_name} not found.")
+        response = VnetResult(
+            name=self.vnet_name,
+            addressPrefix="",
+            subnets=[],
+            resourceGroup=rg_name,
+            isProvisioned="Unknown",
+            provisioningState="Unknown",
+            location=self.location,
+            id="",
+            ReturnCode=404,
+            message=f"Resource Group: {rg_name} not found.",
+            trackingId=self.trackingId,
+            correlationid="",
+        )
+        self.logger.info(response)
+        return response
+
+
+class AsyncVnetChecker(VnetChecker):
+    """
+    Asyncio counterpart of VnetChecker. Like the sync checker, the Resource Group is only looked up after the VNet GET
+    misses, one request after the other, so a VNet that exists costs a single GET.
+    """
+
+    def __init__(
+        self, location: str, rg_name: str, vnet_name: str, trackingId: str, subscription_id: str = None
+    ) -> None:
+        super().__init__(
+            location=location,
+            rg_name=rg_name,
+            vnet_name=vnet_name,
+            trackingId=trackingId,
+            subscription_id=subscription_id,
+        )
+        self.api_client = AsyncAzureClients(self.subscription_id)
+
+    async def _async_rg_check(self) -> ResourceGroupResult:
+        if self._rg_result is None:
+            self._rg_result = await AsyncResourceGroupChecker(
+                location=self.location,
+                rg_name=self.rg_name,
+                trackingId=self.trackingId,
+                subscription_id=self.subscription_id,
+            ).rg_check()
+        return self._rg_result
+
+    @traced("vnet_check")
+    async def vnet_check(self) -> VnetResult:
+        return (await async_flights.do(self._flight_key(), self._vnet_check)).with_trackingId(self.trackingId)
+
+    async def _vnet_check(self) -> VnetResult:
+        rg_name = self.rg_name
+        vnet_name = self.vnet_name
+        self._log_start()
+        try:
+            resp = await self.api_client.az_vnet_api_client(
+                group_name=rg_name, vnet_name=vnet_name, requestType="check"
+            )
+            if resp.status_code == 200:
+                poller = AsyncLroPoller(self.api_client, timeout=self.poll_timeout, logger=self.logger)
+                vnet_status, _ = await poller.poll_resource(
+                    lambda: self.api_client.az_vnet_api_client(
+                        group_name=rg_name, vnet_name=vnet_name, requestType="check"
+                    ),
+                    body=resp.json(),
+                    stop_on_missing=True,
+                )
+                vnet_status, state, vnet_prefix = self._vnet_state(vnet_status)
+                return self._found_response(resp, vnet_status, state, vnet_prefix)
+            rg_exist = self._rg_located(await self._async_rg_check())
+        except Exception as e:
+            return self._exception_response(e)
+        if rg_exist.isProvisioned:
+            return self._lookup_response(resp)
+        return self._rg_missing_response()
@@ -1,11 +1,23 @@
-import json
+import asyncio
+import contextvars
 import ipaddress
 import time
+from typing import Union
 
-from autocli.core.rg.az_rg_create import ResourceGroupCreator
-from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION
+from autocli.core.rg.az_rg_create import AsyncResourceGroupCreator, ResourceGroupCreator
+from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION, IPAM_SCOPE, VNET_PREFIX_LENGTH
+from ...lib.fanout_util import async_merge_streams, async_resolve_subscriptions, merge_streams, resolve_subscriptions
+from ...lib.drift_util import CONFLICT, CREATE, NOOP, UPDATE, resource_drift
 from ...lib.log_util import logClient
+from ...lib.metrics_util import traced
+from ...lib.results import PlanResult, ResourceGroupResult, VnetResult
+from ...lib.singleflight_util import async_flights, flights
 from ...lib.azure_clients import AzureClients
+from ...lib.async_azure_clients import AsyncAzureClients
+from ...lib.lro_util import AsyncLroPoller, LroPoller
+from ..ipam.ipam_allocator import get_allocator
+from ..ipam.prefix_ledger import get_ledger, lease_owner, ledger_scope
+from ..ipam.subnet_layout import layout_subnets, parse_subnets, summarize_subnets
 
 
 class VirtualNetworkCreator:
@@ -13,240 +25,584 @@ class VirtualNetworkCreator:
     Class to handle Virtual Network creation using Azure REST API.
     """
 
-    def __init__(self, rg_name: str, location: str, vnet_name: str, trackingId: str):
+    def __init__(
+        self,
+        rg_name: str,
+        location: str,
+        vnet_name: str,
+        trackingId: str,
+        address_prefix: str = None,
+        prefix_length: int = VNET_PREFIX_LENGTH,
+        subnets: list = None,
+        subscription_id: str = None,
+    ):
         self.rg_name = rg_name
         self.location = location
         self.vnet_name = vnet_name
+        # Prefix to use when the VNet does not exist yet, allocated by prefix_builder when not given
+        self.address_prefix = address_prefix
+        self.prefix_length = prefix_length
+        # Subnet sizes carved out of the address space inside the same PUT, see parse_subnets
+        self.subnets = parse_subnets(subnets)
+        # Block taken from this process's allocator, the ledger lease and whether the VNet already holds the prefix
+        self._allocated_prefix = None
+        self._leased_prefix = None
+        self._prefix_in_use = False
         self.trackingId = str(trackingId)
-        self.logger = logClient("azureVNETcreate")
-        self.subscription_id = DEV_AZURE_SUBSCRIPTION
-        self.api_client = AzureClients()
+        self.logger = logClient("azureVNETcreate", trackingId=trackingId)
+        self.subscription_id = subscription_id or DEV_AZURE_SUBSCRIPTION
+        self.api_client = AzureClients(self.subscription_id)
+        self.ledger = get_ledger()
+        self._ledger_scope = ledger_scope(self.subscription_id)
+        self._lease_owner = lease_owner(self.subscription_id, rg_name, vnet_name)
 
     def prefix_builder(self) -> str:
-        logger = self.logger
-        # List all VNets in the subscription
-        resp = self.api_client.az_vnet_api_client(
-            group_name="", vnet_name="", requestType="list_all"  # Not needed for list_all
+        allocator = get_allocator(self._ledger_scope)
+        if allocator.needs_sync():
+            self._log_sync()
+            started = time.time()
+            try:
+                # Stream all VNets of every subscription sharing the address space, every page
+                subscriptions = self._inventory_subscriptions(resolve_subscriptions() if IPAM_SCOPE == "global" else [])
+                prefixes = [
+                    prefix
+                    for vnet in merge_streams(
+                        subscriptions, lambda subscription: AzureClients(subscription).iter_vnets()
+                    )
+                    for prefix in self._address_prefixes(vnet)
+                ]
+                self._synced(allocator, prefixes, started)
+            except Exception as e:
+                self._sync_failed(allocator, e)
+        return self._allocate(allocator)
+
+    def _inventory_subscriptions(self, subscriptions: list) -> list:
+        """
+        Subscriptions whose VNets the allocator syncs from: the fleet under global IPAM, always this one.
+        """
+        if (self.subscription_id or "").lower() not in (subscription.lower() for subscription in subscriptions):
+            subscriptions = subscriptions + [self.subscription_id]
+        return subscriptions
+
+    def _log_sync(self):
+        scope = "across subscriptions" if IPAM_SCOPE == "global" else "subscription-wide"
+        self.logger.info(f"Syncing IPAM allocator with existing VNET prefixes via Azure REST API ({scope})")
+
+    def _synced(self, allocator, prefixes: list, started: float):
+        allocator.sync(prefixes)
+        if self.ledger is not None:
+            self.ledger.prune(self._ledger_scope, prefixes, before=started)
+
+    def _sync_failed(self, allocator, e: Exception):
+        self.logger.error(f"Error fetching existing VNET prefixes via REST API: {e}")
+        if allocator.synced_at is None:
+            # Never seen the inventory, any prefix handed out now could overlap an existing VNet
+            raise e
+
+    @staticmethod
+    def _address_prefixes(vnet: dict) -> list:
+        return vnet.get("properties", {}).get("addressSpace", {}).get("addressPrefixes", [])
+
+    @staticmethod
+    def _is_ipv4(prefix: str) -> bool:
+        # Dual-stack VNets list IPv6 prefixes too, the allocator only manages IPv4 space
+        try:
+            return ipaddress.ip_network(prefix, strict=False).version == 4
+        except ValueError:
+            return False
+
+    def _allocate(self, allocator) -> str:
+        if self.ledger is None:
+            prefix = self._allocated_prefix = allocator.allocate(self.prefix_length)
+        else:
+            # Chosen under the ledger lock, after taking out what other processes have leased.
+            # An owner that still holds a lease gets it back without choose running, nothing is allocated then
+            prefix = self.ledger.lease(
+                self._ledger_scope, self._lease_owner, lambda taken: self._choose(allocator, taken)
+            )
+            self._leased_prefix = prefix
+        self.logger.info(f"Next available VNET prefix: {prefix}")
+        return prefix
+
+    def _choose(self, allocator, taken: list) -> str:
+        for prefix in taken:
+            allocator.mark_used(prefix)
+        self._allocated_prefix = allocator.allocate(self.prefix_length)
+        return self._allocated_prefix
+
+    def _reserve(self, vnet_prefix: str, existing: bool):
+        # Explicit and existing prefixes are taken as well, so later allocations steer clear of them
+        get_allocator(self._ledger_scope).mark_used(vnet_prefix, hold=True)
+        if self.ledger is not None and vnet_prefix != self._leased_prefix:
+            # An explicit prefix must not overlap a lease held elsewhere, an existing VNet's prefix is a given
+            self.ledger.reserve(self._ledger_scope, self._lease_owner, vnet_prefix, force=existing)
+            self._leased_prefix = vnet_prefix
+        self._prefix_in_use = existing
+
+    def _commit_prefix(self):
+        """
+        Keep the leased prefix in the ledger once the VNet holds it.
+        """
+        if self.ledger is not None and self._leased_prefix:
+            self.ledger.commit(self._ledger_scope, self._lease_owner, self._leased_prefix)
+        self._allocated_prefix = None
+        self._leased_prefix = None
+
+    def _release_prefix(self):
+        """
+        Hand the prefix back when the VNet was not created with it: the block to the IPAM allocator
+        if this creator allocated it, the lease to the ledger.
+        """
+        if self._allocated_prefix:
+            get_allocator(self._ledger_scope).release(self._allocated_prefix)
+            self._allocated_prefix = None
+        if self.ledger is not None and self._leased_prefix:
+            self.ledger.release(self._ledger_scope, self._lease_owner, self._leased_prefix)
+            self._leased_prefix = None
+
+    def _settle_prefix(self, state: str = None):
+        """
+        Commit the prefix once the VNet holds it (Succeeded, or a VNet that already had it) and release it when
+        the VNet was not created with it: state None (PUT rejected or never sent), Failed or Canceled.
+        Any other state means the operation outlived the wait, its lease stays uncommitted and expires
+        unless the VNet shows up.
+        """
+        if state == "Succeeded" or self._prefix_in_use:
+            self._commit_prefix()
+        elif state in (None, "Failed", "Canceled"):
+            self._release_prefix()
+
+    @staticmethod
+    def _interrupted_state(resp):
+        # After an accepted PUT the VNet may still be created, its prefix is neither committed nor released
+        return "Unknown" if resp is not None and resp.status_code in (200, 201) else None
+
+    @staticmethod
+    def _correlation_id(resp) -> str:
+        return resp.headers.get("x-ms-correlation-request-id", "") if resp is not None else ""
+
+    @traced("vnet_create")
+    def vnet_create(self) -> Union[VnetResult, ResourceGroupResult]:
+        # Concurrent creates of the same VNet share one prefix allocation, PUT and wait
+        return flights.do(self._flight_key(), self._vnet_create).with_trackingId(self.trackingId)
+
+    def _flight_key(self) -> tuple:
+        return (
+            "vnet_create",
+            self.api_client.subscription,
+            self.rg_name.lower(),
+            self.vnet_name.lower(),
+            self.location,
+            self.address_prefix,
+            self.prefix_length,
+            tuple(self.subnets),
+        )
+
+    @traced("vnet_plan")
+    def vnet_plan(self) -> PlanResult:
+        """
+        Read the VNet and report what vnet_create would do, without writing anything.
+        """
+        return self._plan_response(
+            self.api_client.az_vnet_api_client(group_name=self.rg_name, vnet_name=self.vnet_name, requestType="check")
+        )
+
+    def _plan_response(self, check_resp) -> PlanResult:
+        action, changes = self._drift(check_resp)
+        return PlanResult(
+            kind="virtualNetwork",
+            name=self.vnet_name,
+            resourceGroup=self.rg_name,
+            action=action,
+            changes=changes,
+            ReturnCode=check_resp.status_code,
+            trackingId=self.trackingId,
+            correlationid=check_resp.headers.get("x-ms-correlation-request-id", ""),
+        )
+
+    def _drift(self, check_resp):
+        """
+        Diff the VNet GET against the desired VNet, returning (action, changes).
+        An existing VNet keeps its address space, so only its state and missing subnets count as drift.
+        """
+        action, changes = resource_drift(check_resp, self.location)
+        if action == CREATE:
+            address_space = self.address_prefix or f"an allocated /{self.prefix_length}"
+            changes = [f"create in {self.location} with {address_space}"]
+        elif action not in (NOOP, UPDATE):
+            return action, changes
+        existing = set()
+        if check_resp.status_code == 200:
+            existing = {
+                subnet.get("name", "").lower() for subnet in check_resp.json().get("properties", {}).get("subnets", [])
+            }
+        missing = [f"add subnet {name} (/{length})" for name, length in self.subnets if name.lower() not in existing]
+        if missing and action == NOOP:
+            action = UPDATE
+        return action, changes + missing
+
+    def _unchanged(self, check_resp):
+        """
+        Return the result for a VNet that needs no PUT, or None when it has to be written.
+        """
+        action, _ = self._drift(check_resp)
+        if action == NOOP:
+            for prefix in filter(self._is_ipv4, self._address_prefixes(check_resp.json())):
+                get_allocator(self._ledger_scope).mark_used(prefix)
+            return self._unchanged_response(check_resp)
+        if action == CONFLICT:
+            return self._existing_response(check_resp, check_resp)
+        return None
+
+    def _vnet_create(self) -> Union[VnetResult, ResourceGroupResult]:
+        rg_name = self.rg_name
+        vnet_name = self.vnet_name
+
+        # Read first, a VNet already in the desired state costs no PUT and no polling.
+        # Revalidated with ARM: a cached copy of a VNet deleted elsewhere would skip the PUT for good
+        check_resp = self.api_client.az_vnet_api_client(
+            group_name=rg_name, vnet_name=vnet_name, requestType="revalidate"
         )
-        logger.info("Fetching next usable VNET prefix via Azure REST API (subscription-wide)")
         try:
-            resp.raise_for_status()
-            vnets = resp.json().get("value", [])
-            vnet_prefixes = []
-            for vnet in vnets:
-                address_prefixes = vnet.get("properties", {}).get("addressSpace", {}).get("addressPrefixes", [])
-                for addr_space in address_prefixes:
-                    if addr_space.endswith("/16"):
-                        vnet_prefixes.append(addr_space)
-            if not vnet_prefixes:
-                logger.info("No existing /16 VNET prefixes found, using default 10.0.0.0/16.")
-                return "10.0.0.0/16"
-            vnet_prefixes.sort(key=lambda x: int(ipaddress.IPv4Network(x).network_address))
-            last_prefix = vnet_prefixes[-1]
-            last_network = ipaddress.IPv4Network(last_prefix)
-            next_network = ipaddress.IPv4Network((int(last_network.network_address) + 65536, 16))
-            logger.info(f"Next available VNET prefix: {next_network.with_prefixlen}")
-            return next_network.with_prefixlen
+            unchanged = self._unchanged(check_resp)
         except Exception as e:
-            logger.error(f"Error fetching next VNET prefix via REST API: {e}")
-            return "10.0.0.0/16"
+            return self._exception_response(e, self._correlation_id(check_resp))
+        if unchanged is not None:
+            return unchanged
+
+        # --- Ensure Resource Group exists (an existing VNet implies it) ---
+        if check_resp.status_code != 200:
+            rg_check_resp = self.api_client.az_group_api_client(group_name=rg_name, requestType="revalidate")
+            if rg_check_resp.status_code != 200:
+                self._log_rg_missing()
+                rg_creator = ResourceGroupCreator(
+                    rg_name=rg_name,
+                    location=self.location,
+                    trackingId=self.trackingId,
+                    subscription_id=self.subscription_id,
+                )
+                rg_failure = self._rg_create_failure(rg_creator.rg_create())
+                if rg_failure is not None:
+                    return rg_failure
+
+        resp = None
+        try:
+            existing_prefix = self._existing_prefix(check_resp)
+            vnet_prefix = existing_prefix or self.address_prefix or self.prefix_builder()
+            self._reserve(vnet_prefix, existing=bool(existing_prefix))
+            body = self._vnet_body(vnet_prefix, check_resp)
+            # Inside the try: a timeout or reset on the PUT hands the prefix back like any other failure
+            resp = self.api_client.az_vnet_api_client(
+                group_name=rg_name, vnet_name=vnet_name, requestType="CREATE", body=body
+            )
+            if resp.status_code in (200, 201):
+                # Wait for provisioningState Succeeded
+                vnet_status, state = LroPoller(self.api_client, logger=self.logger).wait(
+                    resp,
+                    lambda: self.api_client.az_vnet_api_client(
+                        group_name=rg_name, vnet_name=vnet_name, requestType="check"
+                    ),
+                )
+                self._settle_prefix(state)
+                return self._created_response(resp, vnet_status, state, vnet_prefix)
+            elif resp.status_code == 409 and self._is_existing_elsewhere(resp):
+                # Fetch the existing VNet details, it keeps its own address space
+                check_resp = self.api_client.az_vnet_api_client(
+                    group_name=rg_name, vnet_name=vnet_name, requestType="check"
+                )
+                if check_resp.status_code == 200:
+                    self._settle_prefix()
+                    return self._existing_response(resp, check_resp)
+            self._settle_prefix()
+            return self._error_response(resp)
+        except Exception as e:
+            self._settle_prefix(self._interrupted_state(resp))
+            return self._exception_response(e, self._correlation_id(resp))
+
+    def _log_rg_missing(self):
+        self.logger.info(
+            f"Resource group {self.rg_name} not found. Creating it... | correlationId:  | trackingId {self.trackingId}"
+        )
+
+    def _rg_create_failure(self, rg_result: ResourceGroupResult):
+        """
+        Return the Resource Group result to hand back when its creation failed, or None to carry on.
+        """
+        if rg_result.isProvisioned != "Yes":
+            self.logger.error(
+                f"Failed to create resource group {self.rg_name}. Aborting VNet creation.  | correlationId: {rg_result.correlationid} | trackingId {self.trackingId}"
+            )
+            return rg_result
+        return None
+
+    def _existing_prefix(self, check_resp) -> str:
+        """
+        Return the current prefix of an existing VNet, or "" when a new prefix is needed.
+        """
+        if check_resp.status_code != 200:
+            return ""
+        # VNet exists, use its current prefix
+        vnet_status = check_resp.json()
+        # The first IPv4 prefix: a dual-stack VNet may list its IPv6 prefix first
+        address_prefixes = list(filter(self._is_ipv4, self._address_prefixes(vnet_status)))
+        return address_prefixes[0] if address_prefixes else ""
 
-    def vnet_create(self) -> dict:
+    def _vnet_body(self, vnet_prefix: str, check_resp) -> dict:
+        """
+        Build the VNet PUT body. An existing VNet keeps its address space and subnets (a PUT without them
+        would drop them) and only the requested subnets it lacks are added, all in this one PUT.
+        """
+        properties = check_resp.json().get("properties", {}) if check_resp.status_code == 200 else {}
+        address_prefixes = properties.get("addressSpace", {}).get("addressPrefixes") or [vnet_prefix]
+        existing_subnets = properties.get("subnets", [])
+        body = {"location": self.location, "properties": {"addressSpace": {"addressPrefixes": address_prefixes}}}
+        subnets = existing_subnets + layout_subnets(address_prefixes, self.subnets, existing_subnets)
+        if subnets:
+            body["properties"]["subnets"] = subnets
+        return body
+
+    def _is_existing_elsewhere(self, resp) -> bool:
+        # Handle resource already exists in another location
+        error_json = resp.json()
+        error_code = error_json.get("error", {}).get("code")
+        error_message = error_json.get("error", {}).get("message", "")
+        return error_code == "InvalidResourceLocation" and "already exists" in error_message
+
+    def _created_response(self, resp, vnet_status, state, vnet_prefix) -> VnetResult:
         logger = self.logger
-        trackingId = self.trackingId
-        rg_name = self.rg_name
-        location = self.location
         vnet_name = self.vnet_name
+        correlation_id = resp.headers.get("x-ms-correlation-request-id", "")
+        address_prefixes = (vnet_status or {}).get("properties", {}).get("addressSpace", {}).get("addressPrefixes", [])
+        vnet_prefix = address_prefixes[0] if address_prefixes else vnet_prefix
+        logger.info(
+            f"Virtual Network: {vnet_name} was created with provisioningState: {state}  | correlationId: {correlation_id} | trackingId {self.trackingId}"
+        )
+        response = VnetResult(
+            name=vnet_status.get("name") if vnet_status else vnet_name,
+            addressPrefix=vnet_prefix,
+            subnets=summarize_subnets(vnet_status),
+            resourceGroup=self.rg_name,
+            isProvisioned="Yes" if state == "Succeeded" else "No",
+            provisioningState=state,
+            location=vnet_status.get("location") if vnet_status else self.location,
+            id=vnet_status.get("id") if vnet_status else "",
+            ReturnCode=resp.status_code,
+            message=f"Virtual Network: {vnet_name} was created with provisioningState: {state}",
+            trackingId=self.trackingId,
+            correlationid=correlation_id,
+        )
+        logger.info(response)
+        return response
 
-        # --- Ensure Resource Group exists ---
-        rg_check_resp = self.api_client.az_group_api_client(group_name=rg_name, requestType="check")
-        correlation_id = ""
-        if rg_check_resp.status_code != 200:
-            logger.info(
-                f"Resource group {rg_name} not found. Creating it... | correlationId: {correlation_id} | trackingId {trackingId}"
-            )
-            rg_creator = ResourceGroupCreator(rg_name=rg_name, location=location, trackingId=trackingId)
-            rg_create_result = rg_creator.rg_create()
-            # Optionally, check if creation succeeded before proceeding
+    def _unchanged_response(self, check_resp) -> VnetResult:
+        vnet_name = self.vnet_name
+        vnet_status = check_resp.json()
+        address_prefixes = self._address_prefixes(vnet_status)
+        response = VnetResult(
+            name=vnet_status.get("name", vnet_name),
+            addressPrefix=address_prefixes[0] if address_prefixes else "Unknown",
+            subnets=summarize_subnets(vnet_status),
+            resourceGroup=self.rg_name,
+            isProvisioned="Yes",
+            provisioningState=vnet_status.get("properties", {}).get("provisioningState", "Unknown"),
+            location=vnet_status.get("location", self.location),
+            id=vnet_status.get("id", ""),
+            ReturnCode=200,
+            message=f"Virtual Network: {vnet_name} already exists as requested, nothing to change",
+            trackingId=self.trackingId,
+            correlationid=check_resp.headers.get("x-ms-correlation-request-id", ""),
+        )
+        self.logger.info(response)
+        return response
+
+    def _existing_response(self, resp, check_resp) -> VnetResult:
+        vnet_name = self.vnet_name
+        vnet_status = check_resp.json()
+        address_prefixes = vnet_status.get("properties", {}).get("addressSpace", {}).get("addressPrefixes", [])
+        vnet_prefix = address_prefixes[0] if address_prefixes else "Unknown"
+        state = vnet_status.get("properties", {}).get("provisioningState", "Unknown")
+        existing_location = vnet_status.get("location", "Unknown")
+        response = VnetResult(
+            name=vnet_name,
+            addressPrefix=vnet_prefix,
+            subnets=summarize_subnets(vnet_status),
+            resourceGroup=self.rg_name,
+            isProvisioned="Yes",
+            provisioningState=state,
+            location=existing_location,  # Always use actual location
+            id=vnet_status.get("id", ""),
+            ReturnCode=200,
+            message=f"Virtual Network: {vnet_name} already exists in location '{existing_location}'. You requested '{self.location}'.",
+            trackingId=self.trackingId,
+            correlationid=resp.headers.get("x-ms-correlation-request-id", ""),
+        )
+        self.logger.info(response)
+        return response
+
+    def _error_response(self, resp) -> VnetResult:
+        vnet_name = self.vnet_name
+        correlation_id = resp.headers.get("x-ms-correlation-request-id", "")
+        self.logger.error(
+            f"Issue creating Virtual Network: {vnet_name}: {resp.text} | correlationId: {correlation_id} | trackingId {self.trackingId}"
+        )
+        response = VnetResult(
+            name=vnet_name,
+            addressPrefix="Unknown",
+            subnets=[],
+            resourceGroup=self.rg_name,
+            isProvisioned="Unknown",
+            provisioningState="Unknown",
+            location=self.location,
+            id="",
+            ReturnCode=resp.status_code,
+            message=f"Issue creating Virtual Network: {vnet_name}: {resp.text}",
+            trackingId=self.trackingId,
+            correlationid=correlation_id,
+        )
+        self.logger.info(response)
+        return response
+
+    def _exception_response(self, e: Exception, correlation_id: str = "") -> VnetResult:
+        vnet_name = self.vnet_name
+        self.logger.error(
+            f"Exception creating Virtual Network: {vnet_name}:\n{e}\n| correlationId: {correlation_id} | trackingId {self.trackingId}"
+        )
+        response = VnetResult(
+            name=vnet_name,
+            addressPrefix="Unknown",
+            subnets=[],
+            resourceGroup=self.rg_name,
+            isProvisioned="Unknown",
+            provisioningState="Unknown",
+            location=self.location,
+            id="",
+            ReturnCode=500,
+            message=f"Exception creating Virtual Network: {vnet_name}: {e}",
+            trackingId=self.trackingId,
+            correlationid="",
+        )
+        self.logger.info(response)
+        return response
+
+
+class AsyncVirtualNetworkCreator(VirtualNetworkCreator):
+    """
+    Asyncio counterpart of VirtualNetworkCreator, waits on the operation with asyncio.sleep instead of blocking.
+    """
+
+    def __init__(
+        self,
+        rg_name: str,
+        location: str,
+        vnet_name: str,
+        trackingId: str,
+        address_prefix: str = None,
+        prefix_length: int = VNET_PREFIX_LENGTH,
+        subnets: list = None,
+        subscription_id: str = None,
+    ):
+        super().__init__(
+            rg_name=rg_name,
+            location=location,
+            vnet_name=vnet_name,
+            trackingId=trackingId,
+            address_prefix=address_prefix,
+            prefix_length=prefix_length,
+            subnets=subnets,
+            subscription_id=subscription_id,
+        )
+        self.api_client = AsyncAzureClients(self.subscription_id)
+
+    @staticmethod
+    async def _offload(fn, *args):
+        # Ledger calls wait up to 30s on its SQLite write lock under contention, never on the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, contextvars.copy_context().run, fn, *args)
+
+    async def prefix_builder(self) -> str:
+        allocator = get_allocator(self._ledger_scope)
+        if allocator.needs_sync():
+            self._log_sync()
+            started = time.time()
             try:
-                rg_create_result_dict = json.loads(rg_create_result)
-                if rg_create_result_dict.get("isProvisioned") != "Yes":
-                    logger.error(
-                        f"Failed to create resource group {rg_name}. Aborting VNet creation.  | correlationId: {correlation_id} | trackingId {trackingId}"
-                    )
-                    return rg_create_result_dict
-            except Exception as e:
-                logger.error(
-                    f"Error parsing RG creation result: {e} | correlationId: {correlation_id} | trackingId {trackingId}"
+                subscriptions = self._inventory_subscriptions(
+                    await async_resolve_subscriptions() if IPAM_SCOPE == "global" else []
                 )
-                return {
-                    "name": vnet_name,
-                    "addressPrefix": "Unknown",
-                    "resourceGroup": rg_name,
-                    "isProvisioned": "Unknown",
-                    "provisioningState": "Unknown",
-                    "location": location,
-                    "id": "",
-                    "ReturnCode": 500,
-                    "message": f"Exception creating Resource Group: {rg_name}: {e}",
-                    "trackingId": trackingId,
-                    "correlationid": "",
-                }
-
-        # Check if VNet exists first
-        check_resp = self.api_client.az_vnet_api_client(group_name=rg_name, vnet_name=vnet_name, requestType="check")
-        if check_resp.status_code == 200:
-            # VNet exists, use its current prefix
-            vnet_status = check_resp.json()
-            address_prefixes = vnet_status.get("properties", {}).get("addressSpace", {}).get("addressPrefixes", [])
-            vnet_prefix = address_prefixes[0] if address_prefixes else self.prefix_builder()
-        else:
-            # VNet does not exist, use next available prefix
-            vnet_prefix = self.prefix_builder()
+                vnets = async_merge_streams(
+                    subscriptions, lambda subscription: AsyncAzureClients(subscription).iter_vnets()
+                )
+                prefixes = [prefix async for vnet in vnets for prefix in self._address_prefixes(vnet)]
+                await self._offload(self._synced, allocator, prefixes, started)
+            except Exception as e:
+                self._sync_failed(allocator, e)
+        return await self._offload(self._allocate, allocator)
 
-        vnet_body = {"location": location, "properties": {"addressSpace": {"addressPrefixes": [vnet_prefix]}}}
+    @traced("vnet_create")
+    async def vnet_create(self) -> Union[VnetResult, ResourceGroupResult]:
+        return (await async_flights.do(self._flight_key(), self._vnet_create)).with_trackingId(self.trackingId)
+
+    @traced("vnet_plan")
+    async def vnet_plan(self) -> PlanResult:
+        return self._plan_response(
+            await self.api_client.az_vnet_api_client(
+                group_name=self.rg_name, vnet_name=self.vnet_name, requestType="check"
+            )
+        )
+
+    async def _vnet_create(self) -> Union[VnetResult, ResourceGroupResult]:
+        rg_name = self.rg_name
+        vnet_name = self.vnet_name
 
-        api_client = self.api_client.az_vnet_api_client(
-            group_name=rg_name, vnet_name=vnet_name, requestType="CREATE", body=vnet_body
+        check_resp = await self.api_client.az_vnet_api_client(
+            group_name=rg_name, vnet_name=vnet_name, requestType="revalidate"
         )
         try:
-            resp = api_client
-            correlation_id = resp.headers.get("x-ms-correlation-request-id", "")
-            if resp.status_code in (200, 201):
-                # Poll for provisioningState Succeeded
-                poll_attempts = 30
-                poll_interval = 2  # seconds
-                vnet_status = None
-                for _ in range(poll_attempts):
-                    status_resp = self.api_client.az_vnet_api_client(
-                        group_name=rg_name, vnet_name=vnet_name, requestType="check"
-                    )
-                    if status_resp.status_code == 200:
-                        vnet_status = status_resp.json()
-                        state = vnet_status.get("properties", {}).get("provisioningState")
-                        address_prefixes = (
-                            vnet_status.get("properties", {}).get("addressSpace", {}).get("addressPrefixes", [])
-                        )
-                        vnet_prefix = address_prefixes[0] if address_prefixes else vnet_prefix
-                        if state == "Succeeded":
-                            break
-                        elif state in ("Failed", "Canceled"):
-                            logger.error(f"Provisioning failed: {state}")
-                            break
-                    time.sleep(poll_interval)
-                else:
-                    state = vnet_status.get("properties", {}).get("provisioningState") if vnet_status else "Unknown"
-
-                logger.info(
-                    f"Virtual Network: {vnet_name} was created with provisioningState: {state}  | correlationId: {correlation_id} | trackingId {trackingId}"
+            unchanged = self._unchanged(check_resp)
+        except Exception as e:
+            return self._exception_response(e, self._correlation_id(check_resp))
+        if unchanged is not None:
+            return unchanged
+
+        if check_resp.status_code != 200:
+            rg_check_resp = await self.api_client.az_group_api_client(group_name=rg_name, requestType="revalidate")
+            if rg_check_resp.status_code != 200:
+                self._log_rg_missing()
+                rg_creator = AsyncResourceGroupCreator(
+                    rg_name=rg_name,
+                    location=self.location,
+                    trackingId=self.trackingId,
+                    subscription_id=self.subscription_id,
                 )
-                response = {
-                    "name": vnet_status.get("name") if vnet_status else vnet_name,
-                    "addressPrefix": vnet_prefix,
-                    "resourceGroup": rg_name,
-                    "isProvisioned": "Yes" if state == "Succeeded" else "No",
-                    "provisioningState": state,
-                    "location": vnet_status.get("location") if vnet_status else location,
-                    "id": vnet_status.get("id") if vnet_status else "",
-                    "ReturnCode": resp.status_code,
-                    "message": f"Virtual Network: {vnet_name} was created with provisioningState: {state}",
-                    "trackingId": trackingId,
-                    "correlationid": correlation_id,
-                }
-                response = json.dumps(response, indent=4)
-                logger.info(response)
-                return response
-            elif resp.status_code == 409:
-                # Handle resource already exists in another location
-                error_json = resp.json()
-                error_code = error_json.get("error", {}).get("code")
-                error_message = error_json.get("error", {}).get("message", "")
-                if error_code == "InvalidResourceLocation" and "already exists" in error_message:
-                    # Fetch the existing VNet details
-                    check_resp = self.api_client.az_vnet_api_client(
+                rg_failure = self._rg_create_failure(await rg_creator.rg_create())
+                if rg_failure is not None:
+                    return rg_failure
+
+        resp = None
+        try:
+            existing_prefix = self._existing_prefix(check_resp)
+            vnet_prefix = existing_prefix or self.address_prefix or await self.prefix_builder()
+            await self._offload(self._reserve, vnet_prefix, bool(existing_prefix))
+            body = self._vnet_body(vnet_prefix, check_resp)
+            resp = await self.api_client.az_vnet_api_client(
+                group_name=rg_name, vnet_name=vnet_name, requestType="CREATE", body=body
+            )
+            if resp.status_code in (200, 201):
+                vnet_status, state = await AsyncLroPoller(self.api_client, logger=self.logger).wait(
+                    resp,
+                    lambda: self.api_client.az_vnet_api_client(
                         group_name=rg_name, vnet_name=vnet_name, requestType="check"
-                    )
-                    if check_resp.status_code == 200:
-                        vnet_status = check_resp.json()
-                        address_prefixes = (
-                            vnet_status.get("properties", {}).get("addressSpace", {}).get("addressPrefixes", [])
-                        )
-                        vnet_prefix = address_prefixes[0] if address_prefixes else "Unknown"
-                        state = vnet_status.get("properties", {}).get("provisioningState", "Unknown")
-                        existing_location = vnet_status.get("location", "Unknown")
-                        response = {
-                            "name": vnet_name,
-                            "addressPrefix": vnet_prefix,
-                            "resourceGroup": rg_name,
-                            "isProvisioned": "Yes",
-                            "provisioningState": state,
-                            "location": existing_location,  # Always use actual location
-                            "id": vnet_status.get("id", ""),
-                            "ReturnCode": 200,
-                            "message": f"Virtual Network: {vnet_name} already exists in location '{existing_location}'. You requested '{location}'.",
-                            "trackingId": trackingId,
-                            "correlationid": correlation_id,
-                        }
-                        response = json.dumps(response, indent=4)
-                        logger.info(response)
-                        return response
-                # ...existing error logic...
-                logger.error(
-                    f"Issue creating Virtual Network: {vnet_name}: {resp.text} | correlationId: {correlation_id} | trackingId {trackingId}"
+                    ),
                 )
-                response = {
-                    "name": vnet_name,
-                    "addressPrefix": "Unknown",
-                    "resourceGroup": rg_name,
-                    "isProvisioned": "Unknown",
-                    "provisioningState": "Unknown",
-                    "location": location,
-                    "id": "",
-                    "ReturnCode": resp.status_code,
-                    "message": f"Issue creating Virtual Network: {vnet_name}: {resp.text}",
-                    "trackingId": trackingId,
-                    "correlationid": correlation_id,
-                }
-                response = json.dumps(response, indent=4)
-                logger.info(response)
-                return response
-            else:
-                logger.error(
-                    f"Issue creating Virtual Network: {vnet_name}: {resp.text} | correlationId: {correlation_id} | trackingId {trackingId}"
+                await self._offload(self._settle_prefix, state)
+                return self._created_response(resp, vnet_status, state, vnet_prefix)
+            elif resp.status_code == 409 and self._is_existing_elsewhere(resp):
+                check_resp = await self.api_client.az_vnet_api_client(
+                    group_name=rg_name, vnet_name=vnet_name, requestType="check"
                 )
-                response = {
-                    "name": vnet_name,
-                    "addressPrefix": "Unknown",
-                    "resourceGroup": rg_name,
-                    "isProvisioned": "Unknown",
-                    "provisioningState": "Unknown",
-                    "location": location,
-                    "id": "",
-                    "ReturnCode": resp.status_code,
-                    "message": f"Issue creating Virtual Network: {vnet_name}: {resp.text}",
-                    "trackingId": trackingId,
-                    "correlationid": correlation_id,
-                }
-                response = json.dumps(response, indent=4)
-                logger.info(response)
-                return response
+                if check_resp.status_code == 200:
+                    await self._offload(self._settle_prefix)
+                    return self._existing_response(resp, check_resp)
+            await self._offload(self._settle_prefix)
+            return self._error_response(resp)
         except Exception as e:
-            logger.error(
-                f"Exception creating Virtual Network: {vnet_name}:\n{e}\n| correlationId: {correlation_id} | trackingId {trackingId}"
-            )
-            response = {
-                "name": vnet_name,
-                "addressPrefix": "Unknown",
-                "resourceGroup": rg_name,
-                "isProvisioned": "Unknown",
-                "provisioningState": "Unknown",
-                "location": location,
-                "id": "",
-                "ReturnCode": 500,
-                "message": f"Exception creating Virtual Network: {vnet_name}: {e}",
-                "trackingId": trackingId,
-                "correlationid": "",
-            }
-            response = json.dumps(response, indent=4)
-            logger.info(response)
-            return response
+            await self._offload(self._settle_prefix, self._interrupted_state(resp))
+            return self._exception_response(e, self._correlation_id(resp))
@@ -0,0 +1,118 @@
+from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION, LRO_DELETE_TIMEOUT
+from ...lib.log_util import logClient
+from ...lib.metrics_util import traced
+from ...lib.results import VnetDeleteResult
+from ...lib.azure_clients import AzureClients
+from ...lib.lro_util import LroPoller
+from ..ipam.ipam_allocator import get_allocator
+from ..ipam.prefix_ledger import get_ledger, lease_owner, ledger_scope
+
+
+class VirtualNetworkDeleter:
+    """
+    Class to handle Virtual Network deletion using Azure REST API, waiting for the delete to complete.
+    """
+
+    poll_timeout = LRO_DELETE_TIMEOUT
+
+    def __init__(self, rg_name: str, vnet_name: str, trackingId: str, subscription_id: str = None):
+        self.rg_name = rg_name
+        self.vnet_name = vnet_name
+        self.trackingId = str(trackingId)
+        self.logger = logClient("azureVNETdelete", trackingId=trackingId)
+        self.subscription_id = subscription_id or DEV_AZURE_SUBSCRIPTION
+        self.api_client = AzureClients(self.subscription_id)
+        self.ledger = get_ledger()
+
+    @traced("vnet_delete")
+    def vnet_delete(self) -> VnetDeleteResult:
+        rg_name = self.rg_name
+        vnet_name = self.vnet_name
+        resp = self.api_client.az_vnet_api_client(group_name=rg_name, vnet_name=vnet_name, requestType="delete")
+        try:
+            if resp.status_code in (200, 202, 204):
+                poller = LroPoller(self.api_client, timeout=self.poll_timeout, logger=self.logger)
+                state = poller.wait_for_delete(
+                    resp,
+                    lambda: self.api_client.az_vnet_api_client(
+                        group_name=rg_name, vnet_name=vnet_name, requestType="check"
+                    ),
+                )
+                if state == "Succeeded":
+                    self._release_prefixes()
+                return self._deleted_response(resp, state)
+            if resp.status_code == 404:
+                self._release_prefixes()
+            return self._error_response(resp)
+        except Exception as e:
+            return self._exception_response(e)
+
+    def _release_prefixes(self):
+        """
+        Free the deleted VNet's prefixes in the ledger and in this process's allocator so other creates can use them.
+        Without a ledger the allocator finds out at its next sync.
+        """
+        if self.ledger is None:
+            return
+        scope = ledger_scope(self.subscription_id)
+        allocator = get_allocator(scope)
+        for prefix in self.ledger.release(scope, lease_owner(self.subscription_id, self.rg_name, self.vnet_name)):
+            try:
+                allocator.release(prefix)
+            except ValueError:
+                continue
+
+    def _deleted_response(self, resp, state: str) -> VnetDeleteResult:
+        vnet_name = self.vnet_name
+        correlation_id = resp.headers.get("x-ms-correlation-request-id", "")
+        self.logger.info(
+            f"Virtual Network: {vnet_name} delete finished with status: {state} | correlationId: {correlation_id} | trackingId {self.trackingId}"
+        )
+        response = VnetDeleteResult(
+            name=vnet_name,
+            resourceGroup=self.rg_name,
+            isDeleted="Yes" if state == "Succeeded" else "No" if state in ("Failed", "Canceled") else "Unknown",
+            deletionState=state,
+            ReturnCode=resp.status_code,
+            message=f"Virtual Network: {vnet_name} delete finished with status: {state}",
+            trackingId=self.trackingId,
+            correlationid=correlation_id,
+        )
+        self.logger.info(response)
+        return response
+
+    def _error_response(self, resp) -> VnetDeleteResult:
+        vnet_name = self.vnet_name
+        if resp.status_code == 404:
+            message = f"Virtual Network: {vnet_name} Not found."
+        else:
+            message = f"Issue deleting Virtual Network: {vnet_name}: {resp.text}"
+            self.logger.error(message)
+        response = VnetDeleteResult(
+            name=vnet_name,
+            resourceGroup=self.rg_name,
+            isDeleted="Yes" if resp.status_code == 404 else "Unknown",
+            deletionState="NotFound" if resp.status_code == 404 else "Unknown",
+            ReturnCode=resp.status_code,
+            message=message,
+            trackingId=self.trackingId,
+            correlationid=resp.headers.get("x-ms-correlation-request-id", ""),
+        )
+        self.logger.info(response)
+        return response
+
+    def _exception_response(self, e: Exception) -> VnetDeleteResult:
+        vnet_name = self.vnet_name
+        self.logger.error(f"Exception deleting Virtual Network: {vnet_name}:\n{e}")
+        response = VnetDeleteResult(
+            name=vnet_name,
+            resourceGroup=self.rg_name,
+            isDeleted="Unknown",
+            deletionState="Unknown",
+            ReturnCode=500,
+            message=f"Exception deleting Virtual Network: {vnet_name}: {e}",
+            trackingId=self.trackingId,
+            correlationid="",
+        )
+        self.logger.info(response)
+        return response
@@ -0,0 +1,101 @@
+from ...lib.azure_clients import AzureClients
+from ...lib.async_azure_clients import AsyncAzureClients
+from ...lib.log_util import logClient
+
+
+class VnetLister:
+    """
+    Class to stream Virtual Networks one at a time using Azure REST API, following every nextLink page.
+    """
+
+    def __init__(
+        self, trackingId: str, rg_name: str = None, top: int = None, filter: str = None, subscription_id: str = None
+    ):
+        self.trackingId = str(trackingId)
+        self.rg_name = rg_name
+        self.top = top
+        self.filter = filter
+        self.logger = logClient("azureVNETlister", trackingId=trackingId)
+        self.api_client = AzureClients(subscription_id)
+        self.subscription_id = self.api_client.subscription
+
+    def vnet_list(self):
+        """
+        Yield a summary per VNet. A failure part way through yields one final record with an "error" key.
+        """
+        self._log_start()
+        count = 0
+        try:
+            for vnet in self.api_client.iter_vnets(group_name=self.rg_name, top=self.top, filter=self.filter):
+                count += 1
+                yield self._summary(vnet)
+        except Exception as e:
+            yield self._error(e, count)
+            return
+        self._log_done(count)
+
+    def _log_start(self):
+        scope = f"Resource Group: {self.rg_name}" if self.rg_name else "subscription"
+        scope += f" {self.subscription_id}" if not self.rg_name else f" of subscription {self.subscription_id}"
+        self.logger.info(f"Listing Virtual Networks in {scope} | trackingId: {self.trackingId}")
+
+    def _log_done(self, count: int):
+        self.logger.info(f"Listed {count} Virtual Networks | trackingId: {self.trackingId}")
+
+    def _summary(self, vnet: dict) -> dict:
+        properties = vnet.get("properties", {})
+        return {
+            "name": vnet.get("name"),
+            "resourceGroup": resource_group_of(vnet.get("id", "")),
+            "location": vnet.get("location"),
+            "addressPrefixes": properties.get("addressSpace", {}).get("addressPrefixes", []),
+            "provisioningState": properties.get("provisioningState"),
+            "id": vnet.get("id"),
+            "subscriptionId": self.subscription_id,
+            "trackingId": self.trackingId,
+        }
+
+    def _error(self, e: Exception, count: int) -> dict:
+        self.logger.error(f"Issue listing Virtual Networks after {count} results: {e} | trackingId: {self.trackingId}")
+        return {
+            "error": f"Issue listing Virtual Networks after {count} results: {e}",
+            "subscriptionId": self.subscription_id,
+            "trackingId": self.trackingId,
+        }
+
+
+class AsyncVnetLister(VnetLister):
+    """
+    Asyncio counterpart of VnetLister, vnet_list is an async generator.
+    """
+
+    def __init__(
+        self, trackingId: str, rg_name: str = None, top: int = None, filter: str = None, subscription_id: str = None
+    ):
+        super().__init__(
+            trackingId=trackingId, rg_name=rg_name, top=top, filter=filter, subscription_id=subscription_id
+        )
+        self.api_client = AsyncAzureClients(self.subscription_id)
+
+    async def vnet_list(self):
+        self._log_start()
+        count = 0
+        try:
+            async for vnet in self.api_client.iter_vnets(group_name=self.rg_name, top=self.top, filter=self.filter):
+                count += 1
+                yield self._summary(vnet)
+        except Exception as e:
+            yield self._error(e, count)
+            return
+        self._log_done(count)
+
+
+def resource_group_of(resource_id: str) -> str:
+    """
+    Return the Resource Group segment of an ARM resource id.
+    """
+    parts = resource_id.split("/")
+    for index, part in enumerate(parts[:-1]):
+        if part.lower() == "resourcegroups":
+            return parts[index + 1]
+    return ""
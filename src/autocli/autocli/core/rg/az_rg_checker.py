@@ -1,8 +1,10 @@
-import json
-
 from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION
 from ..lib.log_util import logClient
+from ..lib.metrics_util import traced
+from ..lib.results import ResourceGroupResult
+from ..lib.singleflight_util import async_flights, flights
 from ..lib.azure_clients import AzureClients
+from ..lib.async_azure_clients import AsyncAzureClients
 
 
 class ResourceGroupChecker:
@@ -15,81 +17,114 @@ class ResourceGroupChecker:
         location: str,
         rg_name: str,
         trackingId: str,
+        subscription_id: str = None,
     ):
         self.location = location
         self.rg_name = rg_name
-        self.logger = logClient("azureRGchecker")
+        self.logger = logClient("azureRGchecker", trackingId=trackingId)
         self.trackingId = str(trackingId)
-        # You may want to pass subscription_id explicitly, or fetch from env
-        self.subscription_id = DEV_AZURE_SUBSCRIPTION
+        self.subscription_id = subscription_id or DEV_AZURE_SUBSCRIPTION
+        self.api_client = AzureClients(self.subscription_id)
+
+    @traced("rg_check")
+    def rg_check(self) -> ResourceGroupResult:
+        # Concurrent checks of the same Resource Group share one lookup
+        return flights.do(self._flight_key(), self._rg_check).with_trackingId(self.trackingId)
+
+    def _flight_key(self) -> tuple:
+        return ("rg_check", self.api_client.subscription, self.rg_name.lower(), self.location)
+
+    def _rg_check(self) -> ResourceGroupResult:
+        resp = self.api_client.az_group_api_client(group_name=self.rg_name, requestType="CHECK")
+        try:
+            return self._check_response(resp)
+        except Exception as e:
+            return self._exception_response(e)
 
-    def rg_check(self) -> dict:
+    def _check_response(self, resp) -> ResourceGroupResult:
         logger = self.logger
         trackingId = self.trackingId
         rg_name = self.rg_name
         location = self.location
-        api_client = AzureClients().az_group_api_client(group_name=rg_name, requestType="CHECK")
-        try:
-            resp = api_client
-            correlation_id = resp.headers.get("x-ms-correlation-request-id", "")
-            if resp.status_code == 200:
-                results = resp.json()
-                logger.info(
-                    f"ResourceGroup: {rg_name} was found | Correlationid: {correlation_id} | trackingId: {trackingId}"
-                )
-                response = {
-                    "name": results.get("name"),
-                    "isProvisioned": True,
-                    "location": results.get("location"),
-                    "id": results.get("id"),
-                    "ReturnCode": 200,
-                    "message": f"ResourceGroup: {rg_name} was found",
-                    "trackingId": trackingId,
-                    "correlationid": correlation_id,
-                }
-                response = json.dumps(response, indent=4)
-                return response
-            elif resp.status_code == 404:
-                response = {
-                    "name": rg_name,
-                    "isProvisioned": False,
-                    "location": location,
-                    "id": "",
-                    "ReturnCode": 404,
-                    "message": f"Resource Group: {rg_name} does not exist.",
-                    "trackingId": trackingId,
-                    "correlationid": correlation_id,
-                }
-                response = json.dumps(response, indent=4)
-                logger.info(response)
-                return response
-            else:
-                logger.error(f"Issue checking for Resource Group: {rg_name}: {resp.text}")
-                response = {
-                    "name": rg_name,
-                    "isProvisioned": "Unknown",
-                    "location": location,
-                    "id": "",
-                    "ReturnCode": resp.status_code,
-                    "message": f"Issue checking for Resource Group: {rg_name}: {resp.text}",
-                    "trackingId": trackingId,
-                    "correlationid": correlation_id,
-                }
-                response = json.dumps(response, indent=4)
-                logger.info(response)
-                return response
-        except Exception as e:
-            logger.error(f"Exception checking for Resource Group: {rg_name}:\n{e}")
-            response = {
-                "name": rg_name,
-                "isProvisioned": "Unknown",
-                "location": location,
-                "id": "",
-                "ReturnCode": 500,
-                "message": f"Exception checking for Resource Group: {rg_name}: {e}",
-                "trackingId": trackingId,
-                "correlationid": "",
-            }
-            response = json.dumps(response, indent=4)
+        correlation_id = resp.headers.get("x-ms-correlation-request-id", "")
+        if resp.status_code == 200:
+            results = resp.json()
+            logger.info(
+                f"ResourceGroup: {rg_name} was found | Correlationid: {correlation_id} | trackingId: {trackingId}"
+            )
+            response = ResourceGroupResult(
+                name=results.get("name"),
+                isProvisioned=True,
+                location=results.get("location"),
+                id=results.get("id"),
+                ReturnCode=200,
+                message=f"ResourceGroup: {rg_name} was found",
+                trackingId=trackingId,
+                correlationid=correlation_id,
+            )
+            return response
+        elif resp.status_code == 404:
+            response = ResourceGroupResult(
+                name=rg_name,
+                isProvisioned=False,
+                location=location,
+                id="",
+                ReturnCode=404,
+                message=f"Resource Group: {rg_name} does not exist.",
+                trackingId=trackingId,
+                correlationid=correlation_id,
+            )
             logger.info(response)
             return response
+        else:
+            logger.error(f"Issue checking for Resource Group: {rg_name}: {resp.text}")
+            response = ResourceGroupResult(
+                name=rg_name,
+                isProvisioned="Unknown",
+                location=location,
+                id="",
+                ReturnCode=resp.status_code,
+                message=f"Issue checking for Resource Group: {rg_name}: {resp.text}",
+                trackingId=trackingId,
+                correlationid=correlation_id,
+            )
+            logger.info(response)
+            return response
+
+    def _exception_response(self, e: Exception) -> ResourceGroupResult:
+        logger = self.logger
+        rg_name = self.rg_name
+        logger.error(f"Exception checking for Resource Group: {rg_name}:\n{e}")
+        response = ResourceGroupResult(
+            name=rg_name,
+            isProvisioned="Unknown",
+            location=self.location,
+            id="",
+            ReturnCode=500,
+            message=f"Exception checking for Resource Group: {rg_name}: {e}",
+            trackingId=self.trackingId,
+            correlationid="",
+        )
+        logger.info(response)
+        return response
+
+
+class AsyncResourceGroupChecker(ResourceGroupChecker):
+    """
+    Asyncio counterpart of ResourceGroupChecker.
+    """
+
+    def __init__(self, location: str, rg_name: str, trackingId: str, subscription_id: str = None):
+        super().__init__(location=location, rg_name=rg_name, trackingId=trackingId, subscription_id=subscription_id)
+        self.api_client = AsyncAzureClients(self.subscription_id)
+
+    @traced("rg_check")
+    async def rg_check(self) -> ResourceGroupResult:
+        return (await async_flights.do(self._flight_key(), self._rg_check)).with_trackingId(self.trackingId)
+
+    async def _rg_check(self) -> ResourceGroupResult:
+        resp = await self.api_client.az_group_api_client(group_name=self.rg_name, requestType="CHECK")
+        try:
+            return self._check_response(resp)
+        except Exception as e:
+            return self._exception_response(e)
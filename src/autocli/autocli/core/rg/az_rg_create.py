@@ -1,9 +1,12 @@
-import json
-import time
-
 from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION
 from ..lib.log_util import logClient
+from ..lib.metrics_util import traced
+from ..lib.drift_util import CONFLICT, NOOP, resource_drift
+from ..lib.results import PlanResult, ResourceGroupResult
+from ..lib.singleflight_util import async_flights, flights
 from ..lib.azure_clients import AzureClients
+from ..lib.async_azure_clients import AsyncAzureClients
+from ..lib.lro_util import AsyncLroPoller, LroPoller
 
 
 class ResourceGroupCreator:
@@ -11,128 +14,225 @@ class ResourceGroupCreator:
     Class to handle Resource Group creation using Azure REST API.
     """
 
-    def __init__(self, rg_name: str, location: str, trackingId: str):
+    def __init__(self, rg_name: str, location: str, trackingId: str, subscription_id: str = None):
         self.rg_name = rg_name
         self.location = location
         self.trackingId = str(trackingId)
-        self.logger = logClient("azureRGcreate")
-        self.subscription_id = DEV_AZURE_SUBSCRIPTION
+        self.logger = logClient("azureRGcreate", trackingId=trackingId)
+        self.subscription_id = subscription_id or DEV_AZURE_SUBSCRIPTION
+        self.api_client = AzureClients(self.subscription_id)
 
-    def rg_create(self) -> dict:
+    @traced("rg_create")
+    def rg_create(self) -> ResourceGroupResult:
         """
         RG Creation Method automation
         """
-        logger = self.logger
-        trackingId = self.trackingId
+        # Concurrent creates of the same Resource Group share one PUT and one wait
+        return flights.do(self._flight_key(), self._rg_create).with_trackingId(self.trackingId)
+
+    def _flight_key(self) -> tuple:
+        return ("rg_create", self.api_client.subscription, self.rg_name.lower(), self.location)
+
+    @traced("rg_plan")
+    def rg_plan(self) -> PlanResult:
+        """
+        Read the Resource Group and report what rg_create would do, without writing anything.
+        """
+        return self._plan_response(self.api_client.az_group_api_client(group_name=self.rg_name, requestType="check"))
+
+    def _plan_response(self, check_resp) -> PlanResult:
+        action, changes = resource_drift(check_resp, self.location)
+        return PlanResult(
+            kind="resourceGroup",
+            name=self.rg_name,
+            resourceGroup=self.rg_name,
+            action=action,
+            changes=changes,
+            ReturnCode=check_resp.status_code,
+            trackingId=self.trackingId,
+            correlationid=check_resp.headers.get("x-ms-correlation-request-id", ""),
+        )
+
+    def _unchanged(self, check_resp):
+        """
+        Return the result for a Resource Group that needs no PUT, or None when it has to be written.
+        """
+        action, _ = resource_drift(check_resp, self.location)
+        if action == NOOP:
+            return self._unchanged_response(check_resp)
+        if action == CONFLICT:
+            return self._existing_response(check_resp)
+        return None
+
+    def _rg_create(self) -> ResourceGroupResult:
         rg_name = self.rg_name
-        location = self.location
-        api_client = AzureClients().az_group_api_client(
-            group_name=rg_name, requestType="CREATE", body={"location": location}
+        # Read first, a Resource Group already in the desired state costs no PUT and no polling.
+        # Revalidated with ARM: a cached copy of a group deleted elsewhere would skip the PUT for good
+        unchanged = self._unchanged(self.api_client.az_group_api_client(group_name=rg_name, requestType="revalidate"))
+        if unchanged is not None:
+            return unchanged
+        resp = self.api_client.az_group_api_client(
+            group_name=rg_name, requestType="CREATE", body={"location": self.location}
         )
         try:
-            resp = api_client
-            correlation_id = resp.headers.get("x-ms-correlation-request-id", "")
             if resp.status_code in (200, 201):
-                # Poll for provisioningState Succeeded
-                poll_attempts = 30
-                poll_interval = 2  # seconds
-                rg_status = None
-                for _ in range(poll_attempts):
-                    status_resp = AzureClients().az_group_api_client(group_name=rg_name, requestType="check")
-                    if status_resp.status_code == 200:
-                        rg_status = status_resp.json()
-                        state = rg_status.get("properties", {}).get("provisioningState")
-                        if state == "Succeeded":
-                            break
-                        elif state in ("Failed", "Canceled"):
-                            logger.error(f"Provisioning failed: {state}")
-                            break
-                    time.sleep(poll_interval)
-                else:
-                    state = rg_status.get("properties", {}).get("provisioningState") if rg_status else "Unknown"
-
-                logger.info(
-                    f"ResourceGroup: {rg_name} was created with provisioningState: {state} | correlationId: {correlation_id} | trackingId : {trackingId}"
+                # Wait for provisioningState Succeeded
+                rg_status, state = LroPoller(self.api_client, logger=self.logger).wait(
+                    resp, lambda: self.api_client.az_group_api_client(group_name=rg_name, requestType="check")
                 )
-                response = {
-                    "name": rg_status.get("name") if rg_status else rg_name,
-                    "isProvisioned": "Yes" if state == "Succeeded" else "No",
-                    "location": rg_status.get("location") if rg_status else location,
-                    "id": rg_status.get("id") if rg_status else "",
-                    "ReturnCode": resp.status_code,
-                    "message": f"ResourceGroup: {rg_name} was created with provisioningState: {state}",
-                    "trackingId": trackingId,
-                    "correlationid": correlation_id,
-                }
-                response = json.dumps(response, indent=4)
-                logger.info(response)
-                return response
+                return self._created_response(resp, rg_status, state)
             elif resp.status_code == 409:
-                # Handle resource group already exists in another location
-                error_json = resp.json()
-                error_code = error_json.get("error", {}).get("code")
-                error_message = error_json.get("error", {}).get("message", "")
-                if error_code == "InvalidResourceGroupLocation" and "already exists" in error_message:
+                if self._is_existing_elsewhere(resp):
                     # Fetch the existing RG details
-                    check_resp = AzureClients().az_group_api_client(group_name=rg_name, requestType="check")
+                    check_resp = self.api_client.az_group_api_client(group_name=rg_name, requestType="check")
                     if check_resp.status_code == 200:
-                        rg_status = check_resp.json()
-                        existing_location = rg_status.get("location", "Unknown")
-                        response = {
-                            "name": rg_name,
-                            "isProvisioned": "Yes",
-                            "location": existing_location,
-                            "id": rg_status.get("id", ""),
-                            "ReturnCode": 200,
-                            "message": f"Resource Group: {rg_name} already exists in location '{existing_location}'. You requested '{location}'.",
-                            "trackingId": trackingId,
-                            "correlationid": check_resp.headers.get("x-ms-correlation-request-id", ""),
-                        }
-                        response = json.dumps(response, indent=4)
-                        logger.info(response)
-                        return response
+                        return self._existing_response(check_resp)
                 # Default error handling for other 409s
-                logger.error(f"Issue creating Resource Group: {rg_name}: {resp.text}")
-                response = {
-                    "name": rg_name,
-                    "isProvisioned": "Unknown",
-                    "location": location,
-                    "id": "",
-                    "ReturnCode": resp.status_code,
-                    "message": f"Issue creating Resource Group: {rg_name}: {resp.text}",
-                    "trackingId": trackingId,
-                    "correlationid": correlation_id,
-                }
-                response = json.dumps(response, indent=4)
-                logger.info(response)
-                return response
+                return self._error_response(resp)
+            else:
+                return self._error_response(resp)
+        except Exception as e:
+            return self._exception_response(e)
+
+    def _is_existing_elsewhere(self, resp) -> bool:
+        # Handle resource group already exists in another location
+        error_json = resp.json()
+        error_code = error_json.get("error", {}).get("code")
+        error_message = error_json.get("error", {}).get("message", "")
+        return error_code == "InvalidResourceGroupLocation" and "already exists" in error_message
+
+    def _created_response(self, resp, rg_status, state) -> ResourceGroupResult:
+        logger = self.logger
+        trackingId = self.trackingId
+        rg_name = self.rg_name
+        correlation_id = resp.headers.get("x-ms-correlation-request-id", "")
+        logger.info(
+            f"ResourceGroup: {rg_name} was created with provisioningState: {state} | correlationId: {correlation_id} | trackingId : {trackingId}"
+        )
+        response = ResourceGroupResult(
+            name=rg_status.get("name") if rg_status else rg_name,
+            isProvisioned="Yes" if state == "Succeeded" else "No",
+            location=rg_status.get("location") if rg_status else self.location,
+            id=rg_status.get("id") if rg_status else "",
+            ReturnCode=resp.status_code,
+            message=f"ResourceGroup: {rg_name} was created with provisioningState: {state}",
+            trackingId=trackingId,
+            correlationid=correlation_id,
+        )
+        logger.info(response)
+        return response
+
+    def _unchanged_response(self, check_resp) -> ResourceGroupResult:
+        rg_status = check_resp.json()
+        response = ResourceGroupResult(
+            name=rg_status.get("name", self.rg_name),
+            isProvisioned="Yes",
+            location=rg_status.get("location", self.location),
+            id=rg_status.get("id", ""),
+            ReturnCode=200,
+            message=f"ResourceGroup: {self.rg_name} already exists as requested, nothing to change",
+            trackingId=self.trackingId,
+            correlationid=check_resp.headers.get("x-ms-correlation-request-id", ""),
+        )
+        self.logger.info(response)
+        return response
+
+    def _existing_response(self, check_resp) -> ResourceGroupResult:
+        rg_status = check_resp.json()
+        existing_location = rg_status.get("location", "Unknown")
+        response = ResourceGroupResult(
+            name=self.rg_name,
+            isProvisioned="Yes",
+            location=existing_location,
+            id=rg_status.get("id", ""),
+            ReturnCode=200,
+            message=f"Resource Group: {self.rg_name} already exists in location '{existing_location}'. You requested '{self.location}'.",
+            trackingId=self.trackingId,
+            correlationid=check_resp.headers.get("x-ms-correlation-request-id", ""),
+        )
+        self.logger.info(response)
+        return response
+
+    def _error_response(self, resp) -> ResourceGroupResult:
+        logger = self.logger
+        rg_name = self.rg_name
+        logger.error(f"Issue creating Resource Group: {rg_name}: {resp.text}")
+        response = ResourceGroupResult(
+            name=rg_name,
+            isProvisioned="Unknown",
+            location=self.location,
+            id="",
+            ReturnCode=resp.status_code,
+            message=f"Issue creating Resource Group: {rg_name}: {resp.text}",
+            trackingId=self.trackingId,
+            correlationid=resp.headers.get("x-ms-correlation-request-id", ""),
+        )
+        logger.info(response)
+        return response
+
+    def _exception_response(self, e: Exception) -> ResourceGroupResult:
+        logger = self.logger
+        rg_name = self.rg_name
+        logger.error(f"Exception creating Resource Group: {rg_name}:\n{e}")
+        response = ResourceGroupResult(
+            name=rg_name,
+            isProvisioned="Unknown",
+            location=self.location,
+            id="",
+            ReturnCode=500,
+            message=f"Exception creating Resource Group: {rg_name}: {e}",
+            trackingId=self.trackingId,
+            correlationid="",
+        )
+        logger.info(response)
+        return response
+
+
+class AsyncResourceGroupCreator(ResourceGroupCreator):
+    """
+    Asyncio counterpart of ResourceGroupCreator, waits on the operation with asyncio.sleep instead of blocking.
+    """
+
+    def __init__(self, rg_name: str, location: str, trackingId: str, subscription_id: str = None):
+        super().__init__(rg_name=rg_name, location=location, trackingId=trackingId, subscription_id=subscription_id)
+        self.api_client = AsyncAzureClients(self.subscription_id)
+
+    @traced("rg_create")
+    async def rg_create(self) -> ResourceGroupResult:
+        """
+        RG Creation Method automation
+        """
+        return (await async_flights.do(self._flight_key(), self._rg_create)).with_trackingId(self.trackingId)
+
+    @traced("rg_plan")
+    async def rg_plan(self) -> PlanResult:
+        return self._plan_response(
+            await self.api_client.az_group_api_client(group_name=self.rg_name, requestType="check")
+        )
+
+    async def _rg_create(self) -> ResourceGroupResult:
+        rg_name = self.rg_name
+        unchanged = self._unchanged(
+            await self.api_client.az_group_api_client(group_name=rg_name, requestType="revalidate")
+        )
+        if unchanged is not None:
+            return unchanged
+        resp = await self.api_client.az_group_api_client(
+            group_name=rg_name, requestType="CREATE", body={"location": self.location}
+        )
+        try:
+            if resp.status_code in (200, 201):
+                rg_status, state = await AsyncLroPoller(self.api_client, logger=self.logger).wait(
+                    resp, lambda: self.api_client.az_group_api_client(group_name=rg_name, requestType="check")
+                )
+                return self._created_response(resp, rg_status, state)
+            elif resp.status_code == 409:
+                if self._is_existing_elsewhere(resp):
+                    check_resp = await self.api_client.az_group_api_client(group_name=rg_name, requestType="check")
+                    if check_resp.status_code == 200:
+                        return self._existing_response(check_resp)
+                return self._error_response(resp)
             else:
-                logger.error(f"Issue creating Resource Group: {rg_name}: {resp.text}")
-                response = {
-                    "name": rg_name,
-                    "isProvisioned": "Unknown",
-                    "location": location,
-                    "id": "",
-                    "ReturnCode": resp.status_code,
-                    "message": f"Issue creating Resource Group: {rg_name}: {resp.text}",
-                    "trackingId": trackingId,
-                    "correlationid": correlation_id,
-                }
-                response = json.dumps(response, indent=4)
-                logger.info(response)
-                return response
+                return self._error_response(resp)
         except Exception as e:
-            logger.error(f"Exception creating Resource Group: {rg_name}:\n{e}")
-            response = {
-                "name": rg_name,
-                "isProvisioned": "Unknown",
-                "location": location,
-                "id": "",
-                "ReturnCode": 500,
-                "message": f"Exception creating Resource Group: {rg_name}: {e}",
-                "trackingId": trackingId,
-                "correlationid": "",
-            }
-            response = json.dumps(response, indent=4)
-            logger.info(response)
-            return response
+            return self._exception_response(e)
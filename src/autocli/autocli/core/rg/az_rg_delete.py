@@ -0,0 +1,88 @@
+from autocli.core.lib.CONSTANTS import DEV_AZURE_SUBSCRIPTION, LRO_DELETE_TIMEOUT
+from ..lib.log_util import logClient
+from ..lib.metrics_util import traced
+from ..lib.results import ResourceGroupDeleteResult
+from ..lib.azure_clients import AzureClients
+from ..lib.lro_util import LroPoller
+
+
+class ResourceGroupDeleter:
+    """
+    Class to handle Resource Group deletion using Azure REST API, waiting for the delete to complete.
+    """
+
+    poll_timeout = LRO_DELETE_TIMEOUT
+
+    def __init__(self, rg_name: str, trackingId: str, subscription_id: str = None):
+        self.rg_name = rg_name
+        self.trackingId = str(trackingId)
+        self.logger = logClient("azureRGdelete", trackingId=trackingId)
+        self.subscription_id = subscription_id or DEV_AZURE_SUBSCRIPTION
+        self.api_client = AzureClients(self.subscription_id)
+
+    @traced("rg_delete")
+    def rg_delete(self) -> ResourceGroupDeleteResult:
+        rg_name = self.rg_name
+        resp = self.api_client.az_group_api_client(group_name=rg_name, requestType="delete")
+        try:
+            if resp.status_code in (200, 202, 204):
+                poller = LroPoller(self.api_client, timeout=self.poll_timeout, logger=self.logger)
+                state = poller.wait_for_delete(
+                    resp, lambda: self.api_client.az_group_api_client(group_name=rg_name, requestType="check")
+                )
+                return self._deleted_response(resp, state)
+            return self._error_response(resp)
+        except Exception as e:
+            return self._exception_response(e)
+
+    def _deleted_response(self, resp, state: str) -> ResourceGroupDeleteResult:
+        rg_name = self.rg_name
+        correlation_id = resp.headers.get("x-ms-correlation-request-id", "")
+        self.logger.info(
+            f"ResourceGroup: {rg_name} delete finished with status: {state} | correlationId: {correlation_id} | trackingId : {self.trackingId}"
+        )
+        response = ResourceGroupDeleteResult(
+            name=rg_name,
+            isDeleted="Yes" if state == "Succeeded" else "No" if state in ("Failed", "Canceled") else "Unknown",
+            deletionState=state,
+            ReturnCode=resp.status_code,
+            message=f"ResourceGroup: {rg_name} delete finished with status: {state}",
+            trackingId=self.trackingId,
+            correlationid=correlation_id,
+        )
+        self.logger.info(response)
+        return response
+
+    def _error_response(self, resp) -> ResourceGroupDeleteResult:
+        rg_name = self.rg_name
+        if resp.status_code == 404:
+            message = f"Resource Group: {rg_name} does not exist."
+        else:
+            message = f"Issue deleting Resource Group: {rg_name}: {resp.text}"
+            self.logger.error(message)
+        response = ResourceGroupDeleteResult(
+            name=rg_name,
+            isDeleted="Yes" if resp.status_code == 404 else "Unknown",
+            deletionState="NotFound" if resp.status_code == 404 else "Unknown",
+            ReturnCode=resp.status_code,
+            message=message,
+            trackingId=self.trackingId,
+            correlationid=resp.headers.get("x-ms-correlation-request-id", ""),
+        )
+        self.logger.info(response)
+        return response
+
+    def _exception_response(self, e: Exception) -> ResourceGroupDeleteResult:
+        rg_name = self.rg_name
+        self.logger.error(f"Exception deleting Resource Group: {rg_name}:\n{e}")
+        response = ResourceGroupDeleteResult(
+            name=rg_name,
+            isDeleted="Unknown",
+            deletionState="Unknown",
+            ReturnCode=500,
+            message=f"Exception deleting Resource Group: {rg_name}: {e}",
+            trackingId=self.trackingId,
+            correlationid="",
+        )
+        self.logger.info(response)
+        return response
@@ -0,0 +1,81 @@
+from ..lib.azure_clients import AzureClients
+from ..lib.async_azure_clients import AsyncAzureClients
+from ..lib.log_util import logClient
+
+
+class ResourceGroupLister:
+    """
+    Class to stream Resource Groups one at a time using Azure REST API, following every nextLink page.
+    """
+
+    def __init__(self, trackingId: str, top: int = None, filter: str = None, subscription_id: str = None):
+        self.trackingId = str(trackingId)
+        self.top = top
+        self.filter = filter
+        self.logger = logClient("azureRGlister", trackingId=trackingId)
+        self.api_client = AzureClients(subscription_id)
+        self.subscription_id = self.api_client.subscription
+
+    def rg_list(self):
+        """
+        Yield a summary per Resource Group. A failure part way through yields one final record with an "error" key.
+        """
+        self._log_start()
+        count = 0
+        try:
+            for rg in self.api_client.iter_resource_groups(top=self.top, filter=self.filter):
+                count += 1
+                yield self._summary(rg)
+        except Exception as e:
+            yield self._error(e, count)
+            return
+        self._log_done(count)
+
+    def _log_start(self):
+        self.logger.info(
+            f"Listing Resource Groups in subscription {self.subscription_id} (filter: {self.filter}) | trackingId: {self.trackingId}"
+        )
+
+    def _log_done(self, count: int):
+        self.logger.info(f"Listed {count} Resource Groups | trackingId: {self.trackingId}")
+
+    def _summary(self, rg: dict) -> dict:
+        return {
+            "name": rg.get("name"),
+            "location": rg.get("location"),
+            "provisioningState": rg.get("properties", {}).get("provisioningState"),
+            "tags": rg.get("tags") or {},
+            "id": rg.get("id"),
+            "subscriptionId": self.subscription_id,
+            "trackingId": self.trackingId,
+        }
+
+    def _error(self, e: Exception, count: int) -> dict:
+        self.logger.error(f"Issue listing Resource Groups after {count} results: {e} | trackingId: {self.trackingId}")
+        return {
+            "error": f"Issue listing Resource Groups after {count} results: {e}",
+            "subscriptionId": self.subscription_id,
+            "trackingId": self.trackingId,
+        }
+
+
+class AsyncResourceGroupLister(ResourceGroupLister):
+    """
+    Asyncio counterpart of ResourceGroupLister, rg_list is an async generator.
+    """
+
+    def __init__(self, trackingId: str, top: int = None, filter: str = None, subscription_id: str = None):
+        super().__init__(trackingId=trackingId, top=top, filter=filter, subscription_id=subscription_id)
+        self.api_client = AsyncAzureClients(self.subscription_id)
+
+    async def rg_list(self):
+        self._log_start()
+        count = 0
+        try:
+            async for rg in self.api_client.iter_resource_groups(top=self.top, filter=self.filter):
+                count += 1
+                yield self._summary(rg)
+        except Exception as e:
+            yield self._error(e, count)
+            return
+        self._log_done(count)
@@ -0,0 +1,300 @@
+import asyncio
+import contextvars
+import weakref
+from datetime import datetime, timezone
+
+from autocli.core.lib.CONSTANTS import (
+    DEV_AZURE_SUBSCRIPTION,
+    WATCH_INTERVAL,
+    WATCH_KEEPALIVE,
+    WATCH_MAX_INTERVAL,
+    WATCH_TIMEOUT,
+)
+from ..lib.async_azure_clients import AsyncAzureClients
+from ..lib.log_util import logClient
+from ..jobs.job_store import UNFINISHED, JobStore
+
+# provisioningState values a resource stays in until someone writes to it again
+TERMINAL_STATES = ("Succeeded", "Failed", "Canceled")
+
+_hubs = weakref.WeakKeyDictionary()
+
+
+def get_progress_hub() -> "ProgressHub":
+    """
+    Return the ProgressHub of the running event loop, building it on first use.
+    """
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = ProgressHub()
+    return hub
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class _Watch:
+    """
+    One upstream poller shared by every subscriber of a key. poll() returns [(event_key, event)] for what changed
+    since the previous poll; the latest event per event_key is replayed to subscribers joining later.
+    """
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.subscribers = set()
+        self.latest = {}
+        self.done = False
+        self.task = None
+        self.logger = logClient("azureWatch")
+        self._wake = asyncio.Event()
+
+    async def poll(self) -> list:
+        raise NotImplementedError
+
+    def wake(self):
+        # Poll now instead of at the end of the current back-off
+        self._wake.set()
+
+    async def run(self):
+        delay = WATCH_INTERVAL
+        while True:
+            try:
+                changes = await self.poll()
+            except Exception as e:
+                self.logger.warning(f"Watch {self.key} poll failed: {e}")
+                changes = []
+            for event_key, event in changes:
+                self.latest.pop(event_key, None)
+                self.latest[event_key] = event
+                for queue in self.subscribers:
+                    queue.put_nowait(event)
+            # Back off while nothing changes, a transition resets the interval
+            delay = WATCH_INTERVAL if changes else min(delay * 1.5, WATCH_MAX_INTERVAL)
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+
+class ResourceWatch(_Watch):
+    """
+    Polls a Resource Group, or a Virtual Network when vnet_name is given, straight from ARM
+    and emits a "provisioning" event on every provisioningState transition.
+    """
+
+    def __init__(self, subscription_id: str, rg_name: str, vnet_name: str = None):
+        super().__init__(resource_key(subscription_id, rg_name, vnet_name))
+        self.subscription_id = subscription_id
+        self.rg_name = rg_name
+        self.vnet_name = vnet_name
+        self.state = None
+        self.seen = False
+
+    async def poll(self) -> list:
+        api_client = AsyncAzureClients(self.subscription_id)
+        if self.vnet_name:
+            resp = await api_client.az_vnet_api_client(self.rg_name, self.vnet_name, "poll")
+        else:
+            resp = await api_client.az_group_api_client(self.rg_name, "poll")
+        if resp.status_code == 200:
+            state = resp.json().get("properties", {}).get("provisioningState") or "Unknown"
+            self.seen = True
+        elif resp.status_code == 404:
+            state = "NotFound"
+        else:
+            state = f"Error{resp.status_code}"
+        if state == self.state:
+            return []
+        previous, self.state = self.state, state
+        # A resource that disappears after being seen has finished deleting
+        self.done = state in TERMINAL_STATES or (state == "NotFound" and self.seen)
+        event = {
+            "event": "provisioning",
+            "kind": "virtualNetwork" if self.vnet_name else "resourceGroup",
+            "name": self.vnet_name or self.rg_name,
+            "resourceGroup": self.rg_name,
+            "subscriptionId": self.subscription_id,
+            "provisioningState": state,
+            "previousState": previous,
+            "terminal": self.done,
+            "timestamp": _now(),
+        }
+        return [(self.key, event)]
+
+
+class OperationsWatch(_Watch):
+    """
+    Polls the job store for the operations submitted under a trackingId and emits an "operation" event
+    whenever one changes status.
+    """
+
+    def __init__(self, trackingId: str, store: JobStore):
+        super().__init__(("operations", trackingId))
+        self.trackingId = trackingId
+        self.store = store
+        self.operations = []
+        self._status = {}
+
+    async def poll(self) -> list:
+        self.operations = await asyncio.get_running_loop().run_in_executor(
+            None, contextvars.copy_context().run, self.store.find, self.trackingId
+        )
+        changes = []
+        for operation in self.operations:
+            if self._status.get(operation["operationId"]) == operation["status"]:
+                continue
+            self._status[operation["operationId"]] = operation["status"]
+            finished = operation["status"] not in UNFINISHED
+            event = {
+                "event": "operation",
+                "operationId": operation["operationId"],
+                "kind": operation["kind"],
+                "status": operation["status"],
+                "result": operation["result"] if finished else None,
+                "error": operation["error"],
+                "trackingId": self.trackingId,
+                "timestamp": _now(),
+            }
+            changes.append((operation["operationId"], event))
+        self.done = all(operation["status"] not in UNFINISHED for operation in self.operations)
+        return changes
+
+
+def resource_key(subscription_id: str, rg_name: str, vnet_name: str = None) -> tuple:
+    return ("resource", (subscription_id or "").lower(), rg_name.lower(), (vnet_name or "").lower())
+
+
+def operation_resource(operation: dict):
+    """
+    (subscription_id, rg_name, vnet_name) of the resource a create job works on, or None for other kinds.
+    """
+    params = operation["params"]
+    subscription_id = params.get("subscription_id") or DEV_AZURE_SUBSCRIPTION
+    if operation["kind"] == "resourceGroup.create":
+        return subscription_id, params["rg_name"], None
+    if operation["kind"] == "virtualNetwork.create":
+        return subscription_id, params["rg_name"], params["vnet_name"]
+    return None
+
+
+class ProgressHub:
+    """
+    Fans provisioning progress out to any number of subscribers while polling upstream once per watched key.
+    A watch starts with its first subscriber and its poller is cancelled when the last one leaves.
+    """
+
+    def __init__(self, store: JobStore = None):
+        self._store = store
+        self._watches = {}
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            self._store = JobStore()
+        return self._store
+
+    def stats(self) -> dict:
+        return {
+            "watches": len(self._watches),
+            "subscribers": sum(len(watch.subscribers) for watch in self._watches.values()),
+        }
+
+    def _join(self, watch: _Watch, queue: asyncio.Queue) -> _Watch:
+        shared = self._watches.get(watch.key)
+        if shared is None:
+            shared = self._watches[watch.key] = watch
+            shared.task = asyncio.ensure_future(shared.run())
+        shared.subscribers.add(queue)
+        for event in shared.latest.values():
+            queue.put_nowait(event)
+        return shared
+
+    def _leave(self, watch: _Watch, queue: asyncio.Queue):
+        watch.subscribers.discard(queue)
+        if not watch.subscribers and self._watches.get(watch.key) is watch:
+            del self._watches[watch.key]
+            watch.task.cancel()
+
+    async def _stream(self, watches: list, done, follow: bool, timeout: float, on_event=None):
+        """
+        Yield the events of every watch (None as a keep-alive while idle) until done() holds with nothing queued,
+        or only until timeout when follow is set.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        joined = [self._join(watch, queue) for watch in watches]
+        deadline = loop.time() + timeout
+        try:
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    yield {"event": "timeout", "timestamp": _now()}
+                    return
+                try:
+                    event = await asyncio.wait_for(queue.get(), min(WATCH_KEEPALIVE, remaining))
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if on_event is not None:
+                    on_event(joined, event)
+                yield event
+                # Events of one poll are queued together, so an empty queue means the whole batch was sent
+                if not follow and queue.empty() and done(joined):
+                    return
+        finally:
+            for watch in joined:
+                self._leave(watch, queue)
+
+    def watch_resource(
+        self,
+        rg_name: str,
+        vnet_name: str = None,
+        subscription_id: str = None,
+        follow: bool = False,
+        timeout: float = WATCH_TIMEOUT,
+    ):
+        """
+        Stream provisioning events of a Resource Group or Virtual Network, starting with its current state.
+        Ends once it reaches Succeeded, Failed or Canceled (or is gone after being seen) unless follow is set.
+        """
+        watch = ResourceWatch(subscription_id or DEV_AZURE_SUBSCRIPTION, rg_name, vnet_name)
+        return self._stream([watch], lambda joined: joined[0].done, follow, timeout)
+
+    def watch_tracking(self, trackingId: str, operations: list, follow: bool = False, timeout: float = WATCH_TIMEOUT):
+        """
+        Stream the operation events of the jobs submitted under trackingId together with the provisioning events
+        of the resources they create. Ends once every job has finished and the resources of the succeeded ones
+        reached a terminal state.
+        """
+        resources = {}
+        for operation in operations:
+            target = operation_resource(operation)
+            if target is not None:
+                resources[operation["operationId"]] = ResourceWatch(*target)
+        watches = [OperationsWatch(trackingId, self.store)] + list({w.key: w for w in resources.values()}.values())
+
+        def shared(joined, key):
+            return next(watch for watch in joined if watch.key == key)
+
+        def on_event(joined, event):
+            # A job that just finished has its resource polled at once rather than after the back-off
+            if event["event"] == "operation" and event["status"] not in UNFINISHED:
+                watch = resources.get(event["operationId"])
+                if watch is not None:
+                    shared(joined, watch.key).wake()
+
+        def done(joined):
+            operations_watch = joined[0]
+            if not operations_watch.done:
+                return False
+            # A failed job may leave its resource absent or half built, only successes are waited for
+            return all(
+                shared(joined, resources[operation["operationId"]].key).done
+                for operation in operations_watch.operations
+                if operation["status"] == "succeeded" and operation["operationId"] in resources
+            )
+
+        return self._stream(watches, done, follow, timeout, on_event)